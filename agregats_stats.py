@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import case, func, text
+from sqlalchemy.dialects.sqlite import insert
+
+import models
+
+Agregat = models.StatAgregat.__table__
+
+RESOLUTIONS = ("jour", "semaine", "mois")
+
+# Début de période en SQL, identique à debut_periode (le 1er janvier 1970 était un jeudi)
+_SQL_DEBUT = {
+    "jour": "(date_stat / 86400) * 86400",
+    "semaine": "((date_stat / 86400) - ((date_stat / 86400) + 3) % 7) * 86400",
+    "mois": "CAST(strftime('%s', date_stat, 'unixepoch', 'start of month') AS INTEGER)",
+}
+
+
+def debut_periode(date_stat: int, resolution: str) -> int:
+    """Timestamp of the start (UTC) of the day, week (Monday) or month containing `date_stat`."""
+    jour = date_stat // 86400
+    if resolution == "jour":
+        return jour * 86400
+    if resolution == "semaine":
+        return (jour - (jour + 3) % 7) * 86400
+    date = datetime.fromtimestamp(date_stat, timezone.utc)
+    return int(datetime(date.year, date.month, 1, tzinfo=timezone.utc).timestamp())
+
+
+_UPSERT = insert(Agregat)
+_UPSERT = _UPSERT.on_conflict_do_update(
+    index_elements=[Agregat.c.pseudo_utilisateur, Agregat.c.type_stat, Agregat.c.resolution, Agregat.c.debut],
+    set_={
+        "nb": Agregat.c.nb + 1,
+        "valeur_min": func.min(Agregat.c.valeur_min, _UPSERT.excluded.valeur_min),
+        "valeur_max": func.max(Agregat.c.valeur_max, _UPSERT.excluded.valeur_max),
+        "somme": Agregat.c.somme + _UPSERT.excluded.somme,
+        "dernier": case(
+            (_UPSERT.excluded.date_dernier >= Agregat.c.date_dernier, _UPSERT.excluded.dernier),
+            else_=Agregat.c.dernier,
+        ),
+        "date_dernier": func.max(Agregat.c.date_dernier, _UPSERT.excluded.date_dernier),
+    },
+)
+
+
+def maj_agregats_stat(session, stat):
+    """Write-queue hook of a new stat: fold it into its day, week and month rollups (one executemany)."""
+    session.execute(_UPSERT, [
+        {
+            "pseudo_utilisateur": stat.pseudo_utilisateur,
+            "type_stat": stat.type_stat,
+            "resolution": resolution,
+            "debut": debut_periode(stat.date_stat, resolution),
+            "nb": 1,
+            "valeur_min": stat.valeur_stat,
+            "valeur_max": stat.valeur_stat,
+            "somme": stat.valeur_stat,
+            "dernier": stat.valeur_stat,
+            "date_dernier": stat.date_stat,
+        }
+        for resolution in RESOLUTIONS
+    ])
+
+
+def reconstruire_agregats_stats(conn):
+    """Rebuild every rollup from STATS (migration, bulk imports), one grouped statement per resolution."""
+    conn.execute(Agregat.delete())
+    for resolution, debut in _SQL_DEBUT.items():
+        conn.execute(text(
+            'INSERT INTO "STATS_AGREGAT" (pseudo_utilisateur, type_stat, resolution, debut, nb, '
+            'valeur_min, valeur_max, somme, dernier, date_dernier) '
+            'SELECT pseudo_utilisateur, type_stat, :resolution, debut, COUNT(*), '
+            'MIN(valeur_stat), MAX(valeur_stat), SUM(valeur_stat), MAX(dernier), MAX(date_stat) '
+            f'FROM (SELECT pseudo_utilisateur, type_stat, valeur_stat, date_stat, {debut} AS debut, '
+            'FIRST_VALUE(valeur_stat) OVER ('
+            f'PARTITION BY pseudo_utilisateur, type_stat, {debut} ORDER BY date_stat DESC, id_stat DESC'
+            ') AS dernier FROM "STATS") '
+            'GROUP BY pseudo_utilisateur, type_stat, debut'
+        ), {"resolution": resolution})
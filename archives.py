@@ -0,0 +1,85 @@
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import select, text
+
+import models
+from database import DATABASE_FILE
+
+logger = logging.getLogger(__name__)
+
+# Fichiers des réussites archivées, à côté de la base par défaut (volume de données sous Docker)
+ARCHIVES_DIR = Path(os.getenv("ARCHIVES_DIR", DATABASE_FILE.parent / "archives"))
+# Semaines dont les réussites brutes restent en base après le changement de semaine (0 : jamais archivées)
+REUSSITES_RETENTION_SEMAINES = int(os.getenv("REUSSITES_RETENTION_SEMAINES", "0"))
+
+Archive = models.ClassementArchive.__table__
+Reussite = models.UtilisateurDefi.__table__
+ReussitesArchivees = models.ArchiveReussites.__table__
+
+
+def archiver_classement(session, id_defi: int) -> int:
+    """
+    Freeze the final ranking of a challenge from MEILLEUR_TEMPS_DEFI, in one statement.
+
+    A challenge already archived is left untouched. Return the number of rows written.
+    The caller commits, together with the week rollover.
+    """
+    return session.execute(text(
+        'INSERT INTO "CLASSEMENT_ARCHIVE" (id_defi, rang, pseudo_utilisateur, temps_reussite) '
+        'SELECT id_defi, ROW_NUMBER() OVER (ORDER BY temps_reussite, pseudo_utilisateur), '
+        'pseudo_utilisateur, temps_reussite '
+        'FROM "MEILLEUR_TEMPS_DEFI" WHERE id_defi = :id_defi '
+        'AND NOT EXISTS (SELECT 1 FROM "CLASSEMENT_ARCHIVE" WHERE id_defi = :id_defi)'
+    ), {"id_defi": id_defi}).rowcount
+
+
+def _ecrire_archive(chemin: Path, lignes):
+    if chemin.exists():
+        raise FileExistsError(chemin)
+    temporaire = chemin.with_suffix(chemin.suffix + ".tmp")
+    with gzip.open(temporaire, "wt", encoding="utf-8") as fichier:
+        for ligne in lignes:
+            fichier.write(json.dumps(dict(ligne), default=str) + "\n")
+    # Remplacement atomique : jamais de fichier partiel sous le nom définitif
+    os.replace(temporaire, chemin)
+
+
+def archiver_reussites(session_factory, jusqu_au_defi: int, dossier: Path = ARCHIVES_DIR) -> list:
+    """
+    Move the raw attempts of archived challenges up to `jusqu_au_defi` to gzipped JSON lines files.
+
+    Each run writes a new file per challenge (attempts keep arriving on old challenges), listed
+    in ARCHIVE_REUSSITES. Rows are deleted in the transaction that writes their file, one challenge
+    per transaction. Best times, profile summaries and frozen rankings stay in the database; they are
+    no longer recomputed for these challenges. Return the archived ids.
+    """
+    with session_factory() as session:
+        ids_defis = session.execute(
+            select(Reussite.c.id_defi).distinct().where(
+                Reussite.c.id_defi <= jusqu_au_defi,
+                Reussite.c.id_defi.in_(select(Archive.c.id_defi)),
+            ).order_by(Reussite.c.id_defi)
+        ).scalars().all()
+    dossier.mkdir(parents=True, exist_ok=True)
+    for id_defi in ids_defis:
+        with session_factory() as session:
+            # DELETE ... RETURNING : exactement les lignes écrites dans le fichier, même si des
+            # réussites arrivent pendant l'archivage (annulé si l'écriture du fichier échoue)
+            lignes = session.execute(
+                Reussite.delete().where(Reussite.c.id_defi == id_defi).returning(*Reussite.c)
+            ).mappings().all()
+            horodatage = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+            fichier = f"reussites_defi_{id_defi}_{horodatage}.jsonl.gz"
+            _ecrire_archive(dossier / fichier, lignes)
+            session.execute(ReussitesArchivees.insert().values(
+                fichier=fichier, id_defi=id_defi, nb_reussites=len(lignes), date_archive=int(time.time())
+            ))
+            session.commit()
+        logger.info("Réussites du défi %s archivées (%s lignes)", id_defi, len(lignes))
+    return ids_defis
@@ -1,11 +1,21 @@
 from typing import Optional, Tuple
+import asyncio
+import math
+import multiprocessing
 import os
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dotenv import load_dotenv
 
+from fastapi import HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 from pydantic import BaseModel
+from sqlalchemy.dialects.sqlite import insert
+
+from breached_passwords import breached_passwords
+import models
 
 # Load environment variables
 load_dotenv()
@@ -25,11 +35,178 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     pseudo: Optional[str] = None
 
-# Password security config - stronger bcrypt with higher rounds (default is 12)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=14)
+# Password security config - bcrypt cost set by PASSWORD_HASH_ROUNDS, or calibrated once for the
+# cluster to PASSWORD_HASH_TARGET_MS (see configurer_cout_hachage). Hashes at any other cost are
+# rehashed on the next successful login.
+PASSWORD_HASH_ROUNDS = os.getenv("PASSWORD_HASH_ROUNDS")
+PASSWORD_HASH_TARGET_MS = float(os.getenv("PASSWORD_HASH_TARGET_MS", "250"))
+# Bornes de la calibration : le plancher protège des machines lentes au démarrage
+PASSWORD_HASH_MIN_ROUNDS = int(os.getenv("PASSWORD_HASH_MIN_ROUNDS", "10"))
+PASSWORD_HASH_MAX_ROUNDS = int(os.getenv("PASSWORD_HASH_MAX_ROUNDS", "16"))
+_COUT_REFERENCE = 10  # coût mesuré pendant la calibration (rapide), extrapolé ensuite
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _appliquer_cout(cout: int):
+    # min = max = coût courant : needs_update signale tout hash à un autre coût, plus faible ou plus fort
+    pwd_context.update(bcrypt__rounds=cout, bcrypt__min_rounds=cout, bcrypt__max_rounds=cout)
+
+
+_appliquer_cout(PASSWORD_HASH_MIN_ROUNDS)
+
+
+def cout_hachage() -> int:
+    """Current bcrypt cost (log2 of the rounds) used for new hashes."""
+    return pwd_context.to_dict()["bcrypt__rounds"]
+
+
+def calibrer_cout(cible_ms: float) -> int:
+    """Return the highest bcrypt cost whose hash time stays under `cible_ms` on this machine."""
+    cout_reference = _COUT_REFERENCE
+    handler = pwd_context.handler("bcrypt").using(rounds=cout_reference)
+    duree_ms = float("inf")
+    for _ in range(2):
+        debut = time.perf_counter()
+        handler.hash("calibration")
+        duree_ms = min(duree_ms, (time.perf_counter() - debut) * 1000)
+    # Chaque point de coût double le temps de calcul
+    cout = cout_reference + math.floor(math.log2(cible_ms / duree_ms))
+    return max(PASSWORD_HASH_MIN_ROUNDS, min(PASSWORD_HASH_MAX_ROUNDS, cout))
+
+
+def cout_calibre_cluster(session_factory) -> int:
+    """
+    Bcrypt cost shared by every worker: calibrated by the first one to start, stored in PARAMETRE_CLUSTER.
+
+    Workers booting together may all calibrate; the first insert wins and all of them read it back.
+    Delete the row to recalibrate (e.g. after a hardware change).
+    """
+    with session_factory() as session:
+        parametre = session.get(models.ParametreCluster, "bcrypt_rounds")
+        if parametre is None:
+            session.execute(insert(models.ParametreCluster).values(
+                cle="bcrypt_rounds", valeur=str(calibrer_cout(PASSWORD_HASH_TARGET_MS))
+            ).on_conflict_do_nothing())
+            session.commit()
+            parametre = session.get(models.ParametreCluster, "bcrypt_rounds")
+        return int(parametre.valeur)
+
+
+_cout_calibre = None
+
+
+def configurer_cout_hachage(cout: Optional[int] = None, session_factory=None) -> int:
+    """
+    Set the bcrypt cost from `cout`, PASSWORD_HASH_ROUNDS or a calibration (done once per process). Return it.
+
+    With `session_factory`, the calibrated cost is the one shared by the cluster (cout_calibre_cluster).
+    """
+    global _cout_calibre
+    if cout is None:
+        if PASSWORD_HASH_ROUNDS:
+            cout = int(PASSWORD_HASH_ROUNDS)
+        else:
+            if _cout_calibre is None:
+                if session_factory is not None:
+                    _cout_calibre = cout_calibre_cluster(session_factory)
+                else:
+                    _cout_calibre = calibrer_cout(PASSWORD_HASH_TARGET_MS)
+            cout = _cout_calibre
+    _appliquer_cout(cout)
+    return cout
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Password hashing process pool: bcrypt runs outside the event loop, on every core
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))  # waiting operations beyond the running ones
+
+
+def _initialiser_worker(cout: int):
+    """Pool process initializer: spawned workers re-import this module with the default cost."""
+    _appliquer_cout(cout)
+
+
+def _executer_hachage(operation: str, *args):
+    """Run a pwd_context operation in a pool process and report when it actually started."""
+    debut = time.time()
+    return getattr(pwd_context, operation)(*args), debut
+
+
+class PasswordHashPool:
+    """
+    Bounded process pool for bcrypt hashing and verification.
+
+    When more than `max_queue` operations are already waiting, new ones are rejected
+    with a 503 instead of piling up behind the running ones.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = None
+        self.en_cours = 0
+        self.total = 0
+        self.refus = 0
+        self.attente_totale_ms = 0.0
+        self.attente_max_ms = 0.0
+
+    def demarrer(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_initialiser_worker, initargs=(cout_hachage(),)
+            )
+        return self._executor
+
+    def arreter(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _soumettre(self, operation: str, *args):
+        if self.en_cours >= self.workers + self.max_queue:
+            self.refus += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Serveur surchargé, veuillez réessayer dans quelques instants.",
+                headers={"Retry-After": "1"},
+            )
+        self.en_cours += 1
+        soumis = time.time()
+        try:
+            resultat, debut = await asyncio.wrap_future(self.demarrer().submit(_executer_hachage, operation, *args))
+        finally:
+            self.en_cours -= 1
+        attente_ms = max(0.0, (debut - soumis) * 1000)
+        self.total += 1
+        self.attente_totale_ms += attente_ms
+        self.attente_max_ms = max(self.attente_max_ms, attente_ms)
+        return resultat
+
+    async def verifier(self, plain_password: str, mot_de_passe: str) -> bool:
+        return await self._soumettre("verify", plain_password, mot_de_passe)
+
+    async def hasher(self, mot_de_passe: str) -> str:
+        return await self._soumettre("hash", mot_de_passe)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "cout_bcrypt": cout_hachage(),
+            "file_max": self.max_queue,
+            "en_cours": self.en_cours,
+            "en_attente": max(0, self.en_cours - self.workers),
+            "operations": self.total,
+            "refus": self.refus,
+            "attente_moyenne_ms": self.attente_totale_ms / self.total if self.total else 0.0,
+            "attente_max_ms": self.attente_max_ms,
+        }
+
+
+password_pool = PasswordHashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE)
+
 # Password validation requirements
 PASSWORD_MIN_LENGTH = 3
 PASSWORD_REQUIRE_UPPERCASE = False
@@ -81,5 +258,5 @@ COMMON_PASSWORDS = {
 }
 
 def is_common_password(password: str) -> bool:
-    """Check if password is in list of common/leaked passwords."""
-    return password.lower() in COMMON_PASSWORDS
\ No newline at end of file
+    """Check if password is in list of common/leaked passwords (built-in list, then the compiled breach corpus)."""
+    return password.lower() in COMMON_PASSWORDS or password in breached_passwords
\ No newline at end of file
@@ -1,63 +1,63 @@
 -- Badge 1
-INSERT INTO BADGES (titre_badge, description_badge, image_badge)
-VALUES ('Top 10', 'Etre dans le top 10', '/public/BadgesDidactypo/top10.png');
+INSERT OR REPLACE INTO BADGES (id_badge, titre_badge, description_badge, image_badge)
+VALUES (1, 'Top 10', 'Etre dans le top 10', '/public/BadgesDidactypo/top10.png');
 
 -- Badge 2
-INSERT INTO BADGES (titre_badge, description_badge, image_badge)
-VALUES ('Top 5', 'Etre dans le top 5', '/public/BadgesDidactypo/top5.png');
+INSERT OR REPLACE INTO BADGES (id_badge, titre_badge, description_badge, image_badge)
+VALUES (2, 'Top 5', 'Etre dans le top 5', '/public/BadgesDidactypo/top5.png');
 
 -- Badge 3
-INSERT INTO BADGES (titre_badge, description_badge, image_badge)
-VALUES ('Top 1', 'Etre dans le top 1', '/public/BadgesDidactypo/top1.png');
+INSERT OR REPLACE INTO BADGES (id_badge, titre_badge, description_badge, image_badge)
+VALUES (3, 'Top 1', 'Etre dans le top 1', '/public/BadgesDidactypo/top1.png');
 
 -- Badge 4
-INSERT INTO BADGES (titre_badge, description_badge, image_badge)
-VALUES ('3 Jours', 'Faire le défi 3 jours d''affilée', '/public/BadgesDidactypo/log3.png');
+INSERT OR REPLACE INTO BADGES (id_badge, titre_badge, description_badge, image_badge)
+VALUES (4, '3 Jours', 'Faire le défi 3 jours d''affilée', '/public/BadgesDidactypo/log3.png');
 
 -- Badge 5
-INSERT INTO BADGES (titre_badge, description_badge, image_badge)
-VALUES ('7 Jours', 'Faire le défi 7 jours d''affilée', '/public/BadgesDidactypo/log7.png');
+INSERT OR REPLACE INTO BADGES (id_badge, titre_badge, description_badge, image_badge)
+VALUES (5, '7 Jours', 'Faire le défi 7 jours d''affilée', '/public/BadgesDidactypo/log7.png');
 
 -- Badge 6
-INSERT INTO BADGES (titre_badge, description_badge, image_badge)
-VALUES ('14 Jours', 'Faire le défi 14 jours d''affilée', '/public/BadgesDidactypo/log14.png');
+INSERT OR REPLACE INTO BADGES (id_badge, titre_badge, description_badge, image_badge)
+VALUES (6, '14 Jours', 'Faire le défi 14 jours d''affilée', '/public/BadgesDidactypo/log14.png');
 
 -- Badge 7
-INSERT INTO BADGES (titre_badge, description_badge, image_badge)
-VALUES ('20 Jours', 'Faire le défi 20 jours d''affilée', '/public/BadgesDidactypo/log20.png');
+INSERT OR REPLACE INTO BADGES (id_badge, titre_badge, description_badge, image_badge)
+VALUES (7, '20 Jours', 'Faire le défi 20 jours d''affilée', '/public/BadgesDidactypo/log20.png');
 
 -- Badge 8
-INSERT INTO BADGES (titre_badge, description_badge, image_badge)
-VALUES ('DidactyPro', 'Terminer tous les cours', '/public/BadgesDidactypo/didactypro.png');
+INSERT OR REPLACE INTO BADGES (id_badge, titre_badge, description_badge, image_badge)
+VALUES (8, 'DidactyPro', 'Terminer tous les cours', '/public/BadgesDidactypo/didactypro.png');
 
 -- Badge 9
-INSERT INTO BADGES (titre_badge, description_badge, image_badge)
-VALUES ('Caché', 'Tu n''as pas encore obtenu ce badge.', '/public/BadgesDidactypo/hidden.png');
+INSERT OR REPLACE INTO BADGES (id_badge, titre_badge, description_badge, image_badge)
+VALUES (9, 'Caché', 'Tu n''as pas encore obtenu ce badge.', '/public/BadgesDidactypo/hidden.png');
 
 -- Badge 10
-INSERT INTO BADGES (titre_badge, description_badge, image_badge)
-VALUES ('10 Mots par minute', 'Atteindre une vitesse d''écriture de moins de 10 mots par minute (tu vas y arriver)', '/public/BadgesDidactypo/mpm10.png');
+INSERT OR REPLACE INTO BADGES (id_badge, titre_badge, description_badge, image_badge)
+VALUES (10, '10 Mots par minute', 'Atteindre une vitesse d''écriture de moins de 10 mots par minute (tu vas y arriver)', '/public/BadgesDidactypo/mpm10.png');
 
 -- Badge 11
-INSERT INTO BADGES (titre_badge, description_badge, image_badge)
-VALUES ('25 Mots par minute', 'Atteindre une vitesse d''écriture de 25 mots par minute', '/public/BadgesDidactypo/mpm25.png');
+INSERT OR REPLACE INTO BADGES (id_badge, titre_badge, description_badge, image_badge)
+VALUES (11, '25 Mots par minute', 'Atteindre une vitesse d''écriture de 25 mots par minute', '/public/BadgesDidactypo/mpm25.png');
 
 -- Badge 12
-INSERT INTO BADGES (titre_badge, description_badge, image_badge)
-VALUES ('40 Mots par minute', 'Atteindre une vitesse d''écriture de 40 mots par minute', '/public/BadgesDidactypo/mpm40.png');
+INSERT OR REPLACE INTO BADGES (id_badge, titre_badge, description_badge, image_badge)
+VALUES (12, '40 Mots par minute', 'Atteindre une vitesse d''écriture de 40 mots par minute', '/public/BadgesDidactypo/mpm40.png');
 
 -- Badge 13
-INSERT INTO BADGES (titre_badge, description_badge, image_badge)
-VALUES ('60 Mots par minute', 'Atteindre une vitesse d''écriture de 60 mots par minute', '/public/BadgesDidactypo/mpm60.png');
+INSERT OR REPLACE INTO BADGES (id_badge, titre_badge, description_badge, image_badge)
+VALUES (13, '60 Mots par minute', 'Atteindre une vitesse d''écriture de 60 mots par minute', '/public/BadgesDidactypo/mpm60.png');
 
 -- Badge 14
-INSERT INTO BADGES (titre_badge, description_badge, image_badge)
-VALUES ('80 Mots par minute', 'Atteindre une vitesse d''écriture de 80 mots par minute', '/public/BadgesDidactypo/mpm80.png');
+INSERT OR REPLACE INTO BADGES (id_badge, titre_badge, description_badge, image_badge)
+VALUES (14, '80 Mots par minute', 'Atteindre une vitesse d''écriture de 80 mots par minute', '/public/BadgesDidactypo/mpm80.png');
 
 -- Badge 15
-INSERT INTO BADGES (titre_badge, description_badge, image_badge)
-VALUES ('100 Mots par minute', 'Atteindre une vitesse d''écriture de 100 mots par minute', '/public/BadgesDidactypo/mpm100.png');
+INSERT OR REPLACE INTO BADGES (id_badge, titre_badge, description_badge, image_badge)
+VALUES (15, '100 Mots par minute', 'Atteindre une vitesse d''écriture de 100 mots par minute', '/public/BadgesDidactypo/mpm100.png');
 
 -- Badge 16 
-INSERT INTO BADGES (titre_badge, description_badge, image_badge)
-VALUES ('DidacTricheur', 'Essaye de tricher pour réussir le defi de la semaine', '/public/BadgesDidactypo/didactricheur.png');
\ No newline at end of file
+INSERT OR REPLACE INTO BADGES (id_badge, titre_badge, description_badge, image_badge)
+VALUES (16, 'DidacTricheur', 'Essaye de tricher pour réussir le defi de la semaine', '/public/BadgesDidactypo/didactricheur.png');
\ No newline at end of file
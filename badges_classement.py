@@ -0,0 +1,40 @@
+from sqlalchemy import text
+
+# Badges du classement hebdomadaire : (id_badge, rang maximal pour l'obtenir)
+BADGES_CLASSEMENT = ((3, 1), (2, 5), (1, 10))
+
+# Podium du défi (meilleur temps de chaque utilisateur, départage par pseudo comme ClassementDefi)
+# croisé avec les seuils des badges. Le LIMIT est servi par l'index du classement.
+_SELECT_BADGES_CLASSEMENT = '''
+WITH podium AS (
+    SELECT pseudo_utilisateur, ROW_NUMBER() OVER (ORDER BY temps_reussite, pseudo_utilisateur) AS rang
+    FROM (
+        SELECT pseudo_utilisateur, temps_reussite FROM "MEILLEUR_TEMPS_DEFI"
+        WHERE id_defi = :id_defi ORDER BY temps_reussite, pseudo_utilisateur LIMIT :rang_max
+    )
+), seuils (id_badge, rang_max) AS (VALUES {seuils})
+SELECT podium.pseudo_utilisateur, podium.rang, seuils.id_badge
+FROM podium JOIN seuils ON podium.rang <= seuils.rang_max
+'''.format(seuils=", ".join(f"({id_badge}, {rang_max})" for id_badge, rang_max in BADGES_CLASSEMENT))
+
+
+def attribuer_badges_defi(session, id_defi: int, simulation: bool = False) -> list:
+    """
+    Award the leaderboard badges of a challenge in two statements, whatever the number of attempts.
+
+    Return one entry per (user, badge) earned, flagged `deja_obtenu` when the user already had it.
+    With `simulation`, nothing is written. The caller commits.
+    """
+    parametres = {"id_defi": id_defi, "rang_max": max(rang_max for _, rang_max in BADGES_CLASSEMENT)}
+    attributions = session.execute(text(
+        'SELECT a.pseudo_utilisateur, a.rang, a.id_badge, ub.id_badge IS NOT NULL AS deja_obtenu '
+        f'FROM ({_SELECT_BADGES_CLASSEMENT}) a LEFT JOIN "UTILISATEUR_BADGE" ub '
+        'ON ub.pseudo_utilisateur = a.pseudo_utilisateur AND ub.id_badge = a.id_badge '
+        'ORDER BY a.rang, a.id_badge'
+    ), parametres).mappings().all()
+    if not simulation and attributions:
+        session.execute(text(
+            'INSERT OR IGNORE INTO "UTILISATEUR_BADGE" (pseudo_utilisateur, id_badge) '
+            f'SELECT pseudo_utilisateur, id_badge FROM ({_SELECT_BADGES_CLASSEMENT})'
+        ), parametres)
+    return [{**attribution, "deja_obtenu": bool(attribution["deja_obtenu"])} for attribution in attributions]
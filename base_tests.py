@@ -0,0 +1,93 @@
+import atexit
+import os
+import shutil
+import tempfile
+import unittest
+import uuid
+from pathlib import Path
+
+# Base de l'application pour les tests de routes, fixée avant tout import de database (via models ou main) :
+# les tests ne touchent jamais db.sqlite3. Coût bcrypt minimal, les tests se connectent souvent.
+_DOSSIER_APP = tempfile.mkdtemp(prefix="didactypo-tests-")
+atexit.register(shutil.rmtree, _DOSSIER_APP, True)
+os.environ["DATABASE_PATH"] = str(Path(_DOSSIER_APP) / "db.sqlite3")
+os.environ.setdefault("PASSWORD_HASH_ROUNDS", "4")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+
+
+class TestBaseSQLite(unittest.TestCase):
+    """
+    Base test case: a fresh SQLite file holding every table, in a temporary directory.
+
+    Subclasses call super().setUp() first; the engine is disposed and the directory
+    removed after their own tearDown.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dossier = Path(self.tmp.name)
+        self.engine = create_engine(f"sqlite:///{self.dossier / 'test.sqlite3'}")
+        self.addCleanup(self.engine.dispose)
+        models.Base.metadata.create_all(bind=self.engine)
+        self.SessionTest = sessionmaker(bind=self.engine)
+
+
+_client = None
+
+
+def client_app():
+    """TestClient on main.app, started once per process (startup: write queue, seeds, pools) and stopped at exit."""
+    global _client
+    if _client is None:
+        from fastapi.testclient import TestClient
+
+        import main
+        _client = TestClient(main.app)
+        _client.__enter__()
+        atexit.register(_client.__exit__, None, None, None)
+    return _client
+
+
+class TestBaseApp(unittest.TestCase):
+    """
+    Base test case for routes: the application in process, on the temporary database of this test run.
+
+    The database is shared by every test of the process; tests create their own users and groups.
+    """
+
+    MOT_DE_PASSE = "Zz9!kqpw-test"
+
+    @classmethod
+    def setUpClass(cls):
+        import main
+        cls.main = main
+        cls.client = client_app()
+
+    def creer_utilisateur(self, est_admin: bool = False) -> str:
+        pseudo = "t" + uuid.uuid4().hex[:12]
+        reponse = self.client.post("/utilisateurs/", json={
+            "pseudo": pseudo, "mot_de_passe": self.MOT_DE_PASSE, "nom": "Test", "prenom": "Test",
+            "courriel": f"{pseudo}@example.com", "est_admin": est_admin, "numCours": 0, "tempsTotal": 0, "cptDefi": 0,
+        })
+        self.assertEqual(reponse.status_code, 200, reponse.text)
+        return pseudo
+
+    def entetes(self, pseudo: str) -> dict:
+        """Log `pseudo` in through /token and return the Authorization header."""
+        reponse = self.client.post("/token", data={"username": pseudo, "password": self.MOT_DE_PASSE})
+        self.assertEqual(reponse.status_code, 200, reponse.text)
+        return {"Authorization": f"Bearer {reponse.json()['access_token']}"}
+
+    def creer_groupe(self, pseudo_admin: str) -> int:
+        reponse = self.client.post("/groupe/", params={"pseudo_admin": pseudo_admin},
+                                   json={"nom_groupe": "Classe", "description_groupe": "Tests"})
+        self.assertEqual(reponse.status_code, 200, reponse.text)
+        with self.main.SessionLocal() as db:
+            return db.query(models.UtilisateurGroupe.id_groupe).filter(
+                models.UtilisateurGroupe.pseudo_utilisateur == pseudo_admin
+            ).order_by(models.UtilisateurGroupe.id_groupe.desc()).first()[0]
@@ -0,0 +1,218 @@
+"""
+Banc d'essai de l'API, en mémoire (transport ASGI), sur une base SQLite temporaire.
+
+    python benchmark.py --utilisateurs 500 --stats 20 --reussites 5 --groupes 20 --concurrence 32 --sortie bench.json
+
+Le rapport JSON (débit, p50/p95/p99 par scénario) peut être comparé d'une version à l'autre.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import math
+import os
+import random
+import secrets
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Banc d'essai de l'API Didactypo")
+    parser.add_argument("--utilisateurs", type=int, default=200, help="Nombre d'utilisateurs synthétiques")
+    parser.add_argument("--stats", type=int, default=20, help="Stats par utilisateur")
+    parser.add_argument("--reussites", type=int, default=5, help="Réussites de défi par utilisateur et par défi")
+    parser.add_argument("--groupes", type=int, default=10, help="Nombre de classes")
+    parser.add_argument("--concurrence", type=int, default=16, help="Requêtes simultanées")
+    parser.add_argument("--requetes", type=int, default=200, help="Requêtes par scénario")
+    parser.add_argument("--connexions", type=int, default=10, help="Requêtes du scénario de connexion (bcrypt)")
+    parser.add_argument("--graine", type=int, default=42, help="Graine aléatoire des données synthétiques")
+    parser.add_argument("--sortie", type=Path, help="Fichier JSON du rapport (sinon stdout)")
+    return parser.parse_args()
+
+
+def percentile(valeurs, p):
+    """Nearest-rank percentile of an already sorted list, rounded to 0.01 (None when empty)."""
+    if not valeurs:
+        return None
+    rang = max(1, math.ceil(p / 100 * len(valeurs)))
+    return round(valeurs[rang - 1], 2)
+
+
+def peupler(engine, models, mdp_hashe, args, rng):
+    """Insert the synthetic users, stats, challenge successes and classes."""
+    from sqlalchemy import insert
+
+    from agregats_stats import reconstruire_agregats_stats
+    from classement import reconstruire_meilleurs_temps, reconstruire_resumes_defi
+
+    maintenant = int(time.time())
+    pseudos = [f"bench{i}" for i in range(args.utilisateurs)]
+    with engine.begin() as conn:
+        conn.execute(insert(models.Utilisateur), [
+            {"pseudo": pseudo, "mot_de_passe": mdp_hashe, "nom": "Bench", "prenom": pseudo, "courriel": f"{pseudo}@bench",
+             "est_admin": False, "numCours": 0, "tempsTotal": 0, "cptDefi": 0}
+            for pseudo in pseudos
+        ])
+        if args.stats:
+            conn.execute(insert(models.Stat), [
+                {"pseudo_utilisateur": pseudo, "type_stat": rng.choice(["wpm", "precision", "nberreur"]),
+                 "valeur_stat": rng.uniform(10, 100), "date_stat": maintenant - rng.randint(0, 365 * 86400)}
+                for pseudo in pseudos for _ in range(args.stats)
+            ])
+            reconstruire_agregats_stats(conn)
+        if args.reussites:
+            debut = datetime.now() - timedelta(days=7)
+            conn.execute(insert(models.UtilisateurDefi), [
+                {"pseudo_utilisateur": pseudo, "id_defi": id_defi, "temps_reussite": rng.uniform(20, 120),
+                 "date_reussite": debut + timedelta(seconds=i * 60 + n)}
+                for n, pseudo in enumerate(pseudos) for id_defi in (1, 2) for i in range(args.reussites)
+            ])
+            reconstruire_meilleurs_temps(conn)
+            reconstruire_resumes_defi(conn)
+        groupes = []
+        for g in range(args.groupes):
+            id_groupe = conn.execute(insert(models.Groupe).values(
+                nom_groupe=f"Classe {g}", description_groupe="Classe de banc d'essai"
+            )).inserted_primary_key[0]
+            membres = pseudos[g::args.groupes]
+            if membres:
+                conn.execute(insert(models.UtilisateurGroupe), [
+                    {"pseudo_utilisateur": pseudo, "id_groupe": id_groupe, "est_admin": i == 0}
+                    for i, pseudo in enumerate(membres)
+                ])
+                groupes.append((id_groupe, membres[0]))
+    return pseudos, groupes
+
+
+async def executer_scenario(client, requetes, concurrence):
+    """
+    Run the `(method, url, kwargs)` requests with bounded concurrency and summarise their latencies.
+
+    Latency percentiles only cover successful (2xx) responses; the others (429, 503...) are
+    counted per status code, so that rejections do not pass for fast requests.
+    """
+    latences = []
+    codes = {}
+    semaphore = asyncio.Semaphore(concurrence)
+
+    async def une_requete(methode, url, kwargs):
+        async with semaphore:
+            debut = time.perf_counter()
+            response = await client.request(methode, url, **kwargs)
+            duree_ms = (time.perf_counter() - debut) * 1000
+            if 200 <= response.status_code < 300:
+                latences.append(duree_ms)
+            else:
+                codes[response.status_code] = codes.get(response.status_code, 0) + 1
+
+    debut = time.perf_counter()
+    await asyncio.gather(*(une_requete(*requete) for requete in requetes))
+    duree = time.perf_counter() - debut
+    latences.sort()
+    return {
+        "requetes": len(requetes),
+        "erreurs": sum(codes.values()),
+        "codes_erreur": {str(code): nombre for code, nombre in sorted(codes.items())},
+        "duree_s": round(duree, 3),
+        "debit_rps": round(len(latences) / duree, 1),
+        "p50_ms": percentile(latences, 50),
+        "p95_ms": percentile(latences, 95),
+        "p99_ms": percentile(latences, 99),
+    }
+
+
+async def lancer(args):
+    import httpx
+
+    # L'application doit être importée après avoir fixé DATABASE_PATH
+    import main
+    import models
+    from database import engine, async_engine
+    from instrumentation import lire_stats_routes
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    rng = random.Random(args.graine)
+    mot_de_passe = "Bench-mdp-1"
+    # Même coût bcrypt que celui retenu au démarrage de l'application, sinon chaque connexion rehacherait
+    main.configurer_cout_hachage(session_factory=main.SessionLocal)
+    pseudos, groupes = peupler(engine, models, main.pwd_context.hash(mot_de_passe), args, rng)
+    jetons = {pseudo: main.creer_token_acces({"sub": pseudo}, timedelta(hours=1)) for pseudo in pseudos}
+
+    scenarios = {
+        "connexion": [
+            ("POST", "/token", {"data": {"username": rng.choice(pseudos), "password": mot_de_passe}})
+            for _ in range(args.connexions)
+        ],
+        "classement_defi": [
+            ("GET", f"/reussites_defi/defi/{rng.choice((1, 2))}", {})
+            for _ in range(args.requetes)
+        ],
+        "ajout_stat": [
+            ("POST", "/stat/", {"params": {
+                "pseudo_utilisateur": rng.choice(pseudos), "type_stat": "wpm", "valeur_stat": rng.uniform(10, 100)
+            }})
+            for _ in range(args.requetes)
+        ],
+        "lecture_stats": [
+            ("GET", "/stat/", {"params": {"pseudo_utilisateur": rng.choice(pseudos), "type_stat": "wpm"}})
+            for _ in range(args.requetes)
+        ],
+        "courbe_stats": [
+            ("GET", "/stat/agregats", {"params": {
+                "pseudo_utilisateur": rng.choice(pseudos), "type_stat": "wpm", "resolution": "semaine"
+            }})
+            for _ in range(args.requetes)
+        ],
+        "membres_classe": [
+            ("GET", f"/membres_classe_par_groupe/{id_groupe}", {"headers": {"Authorization": f"Bearer {jetons[admin]}"}})
+            for id_groupe, admin in (rng.choice(groupes) for _ in range(args.requetes if groupes else 0))
+        ],
+    }
+
+    rapport = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "parametres": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+        "scenarios": {},
+    }
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for nom, requetes in scenarios.items():
+                if requetes:
+                    rapport["scenarios"][nom] = await executer_scenario(client, requetes, args.concurrence)
+    rapport["sql_par_route"] = lire_stats_routes()
+
+    engine.dispose()
+    await async_engine.dispose()
+    return rapport
+
+
+def main_cli():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as dossier:
+        os.environ["DATABASE_PATH"] = str(Path(dossier) / "bench.sqlite3")
+        os.environ.setdefault("JWT_SECRET_KEY", secrets.token_hex(32))
+        # Le scénario de connexion mesure bcrypt, pas la limitation : toutes les connexions simultanées
+        # sont admises et les seaux (un seul client, quelques pseudos) ne se vident pas
+        os.environ.setdefault("LOGIN_MAX_CONCURRENT", str(args.concurrence))
+        for variable in ("LOGIN_RATE_PSEUDO_BURST", "LOGIN_RATE_IP_BURST"):
+            os.environ.setdefault(variable, str(10 ** 6))
+        # Les messages de l'application vont sur stderr, stdout est réservé au rapport JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            rapport = asyncio.run(lancer(args))
+
+    sortie = json.dumps(rapport, indent=2, ensure_ascii=False)
+    if args.sortie:
+        args.sortie.write_text(sortie, encoding="utf-8")
+    else:
+        print(sortie, file=sys.stdout)
+
+
+if __name__ == "__main__":
+    main_cli()
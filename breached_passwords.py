@@ -0,0 +1,130 @@
+"""
+Liste de mots de passe compromis, compilée en un fichier binaire trié et lu par mmap.
+
+    python breached_passwords.py rockyou.txt                  # un mot de passe par ligne
+    python breached_passwords.py pwned-passwords-sha1.txt --sha1   # lignes "SHA1HEX[:compte]"
+
+Format : en-tête de 16 octets (MAGIC + nombre d'entrées, uint64 little-endian), puis les
+8 premiers octets du SHA-1 de chaque mot de passe, big-endian, triés et dédoublonnés.
+Le fichier est partagé entre les workers par le cache de pages du système.
+"""
+import argparse
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"DIDPWD1\0"
+TAILLE_ENTETE = 16
+TAILLE_ENTREE = 8
+
+BREACHED_PASSWORDS_FILE = Path(os.getenv(
+    "BREACHED_PASSWORDS_FILE", Path(__file__).parent / "breached_passwords.bin"
+))
+
+
+def empreinte(mot_de_passe: str) -> bytes:
+    """Return the fixed-width key stored for a password: the first 8 bytes of its SHA-1."""
+    return hashlib.sha1(mot_de_passe.encode("utf-8")).digest()[:TAILLE_ENTREE]
+
+
+def compiler(source: Path, destination: Path, sha1: bool = False) -> int:
+    """Compile a wordlist (or a list of SHA-1 hex digests) into the sorted lookup file. Return the entry count."""
+    cles = set()
+    with open(source, "rb") as fichier:
+        for ligne in fichier:
+            ligne = ligne.rstrip(b"\r\n")
+            if not ligne:
+                continue
+            if sha1:
+                cles.add(bytes.fromhex(ligne.split(b":", 1)[0].decode("ascii"))[:TAILLE_ENTREE])
+            else:
+                try:
+                    cles.add(empreinte(ligne.decode("utf-8")))
+                except UnicodeDecodeError:
+                    # Un mot de passe reçu en JSON est toujours de l'UTF-8 valide
+                    continue
+
+    temporaire = destination.with_suffix(destination.suffix + ".tmp")
+    with open(temporaire, "wb") as fichier:
+        fichier.write(MAGIC + struct.pack("<Q", len(cles)))
+        fichier.write(b"".join(sorted(cles)))
+    # Remplacement atomique : les workers qui lisent l'ancien fichier gardent leur mmap valide
+    os.replace(temporaire, destination)
+    return len(cles)
+
+
+class BreachedPasswordList:
+    """Read-only, memory-mapped sorted array of password keys, searched by bisection."""
+
+    def __init__(self, chemin: Path):
+        self.chemin = Path(chemin)
+        self._mmap = None
+        self.nb_entrees = 0
+        self._charge = False
+        self._lock = threading.Lock()
+
+    def charger(self):
+        with self._lock:
+            if self._charge:
+                return
+            self._charge = True
+            if not self.chemin.exists():
+                logger.warning("Liste de mots de passe compromis absente : %s", self.chemin)
+                return
+            with open(self.chemin, "rb") as fichier:
+                contenu = mmap.mmap(fichier.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(contenu) < TAILLE_ENTETE or contenu[:8] != MAGIC:
+                contenu.close()
+                raise ValueError(f"Fichier de mots de passe compromis invalide : {self.chemin}")
+            nb_entrees = struct.unpack("<Q", contenu[8:TAILLE_ENTETE])[0]
+            if len(contenu) != TAILLE_ENTETE + nb_entrees * TAILLE_ENTREE:
+                contenu.close()
+                raise ValueError(f"Fichier de mots de passe compromis tronqué : {self.chemin}")
+            self._mmap = contenu
+            self.nb_entrees = nb_entrees
+            logger.info("Liste de mots de passe compromis chargée : %s entrées", nb_entrees)
+
+    def _contient_cle(self, cle: bytes) -> bool:
+        contenu = self._mmap
+        bas, haut = 0, self.nb_entrees
+        while bas < haut:
+            milieu = (bas + haut) // 2
+            debut = TAILLE_ENTETE + milieu * TAILLE_ENTREE
+            # Clés big-endian : l'ordre des octets est l'ordre numérique
+            if contenu[debut:debut + TAILLE_ENTREE] < cle:
+                bas = milieu + 1
+            else:
+                haut = milieu
+        debut = TAILLE_ENTETE + bas * TAILLE_ENTREE
+        return bas < self.nb_entrees and contenu[debut:debut + TAILLE_ENTREE] == cle
+
+    def __contains__(self, mot_de_passe: str) -> bool:
+        if not self._charge:
+            self.charger()
+        if self._mmap is None:
+            return False
+        return any(self._contient_cle(empreinte(variante)) for variante in {mot_de_passe, mot_de_passe.lower()})
+
+
+breached_passwords = BreachedPasswordList(BREACHED_PASSWORDS_FILE)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Compile une liste de mots de passe compromis pour l'API.")
+    parser.add_argument("source", type=Path, help="Liste source, une entrée par ligne")
+    parser.add_argument("--sortie", type=Path, default=BREACHED_PASSWORDS_FILE, help="Fichier compilé")
+    parser.add_argument("--sha1", action="store_true", help="La source contient des empreintes SHA-1 hexadécimales")
+    args = parser.parse_args()
+    nb = compiler(args.source, args.sortie, sha1=args.sha1)
+    print(f"{nb} entrées écrites dans {args.sortie}")
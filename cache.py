@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with a time-to-live and LRU eviction.
+
+    Each worker process has its own cache: entries must be invalidated explicitly
+    by the routes that modify them, the TTL bounds staleness across workers.
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._donnees = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, cle, defaut=None):
+        with self._lock:
+            entree = self._donnees.get(cle)
+            if entree is None or entree[0] < time.monotonic():
+                if entree is not None:
+                    del self._donnees[cle]
+                self.misses += 1
+                return defaut
+            self._donnees.move_to_end(cle)
+            self.hits += 1
+            return entree[1]
+
+    def set(self, cle, valeur):
+        with self._lock:
+            self._donnees[cle] = (time.monotonic() + self.ttl, valeur)
+            self._donnees.move_to_end(cle)
+            while len(self._donnees) > self.maxsize:
+                self._donnees.popitem(last=False)
+
+    def invalider(self, cle):
+        with self._lock:
+            self._donnees.pop(cle, None)
+
+    def invalider_si(self, predicat):
+        """Drop every entry whose key matches `predicat` (e.g. all entries of one group)."""
+        with self._lock:
+            for cle in [cle for cle in self._donnees if predicat(cle)]:
+                del self._donnees[cle]
+
+    def vider(self):
+        with self._lock:
+            self._donnees.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entrees": len(self._donnees), "hits": self.hits, "misses": self.misses}
+
+
+class KeySet:
+    """
+    Thread-safe in-process set of the keys of a table, loaded at startup.
+
+    Like TTLCache it is per worker: a missing key may have been added by another
+    worker, so callers keep the database constraint as the final check.
+    """
+
+    def __init__(self):
+        self._cles = set()
+        self._lock = threading.Lock()
+        self.charge = False
+
+    def charger(self, cles):
+        nouvelles = set(cles)
+        with self._lock:
+            self._cles = nouvelles
+            self.charge = True
+
+    def ajouter(self, cle):
+        with self._lock:
+            self._cles.add(cle)
+
+    def retirer(self, cle):
+        with self._lock:
+            self._cles.discard(cle)
+
+    def __contains__(self, cle) -> bool:
+        return cle in self._cles
+
+    def __len__(self):
+        return len(self._cles)
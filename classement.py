@@ -0,0 +1,199 @@
+import logging
+
+from sqlalchemy import case, func, select, text
+from sqlalchemy.dialects.sqlite import insert
+
+import models
+
+logger = logging.getLogger(__name__)
+
+MeilleurTemps = models.MeilleurTempsDefi.__table__
+Resume = models.ResumeDefiUtilisateur.__table__
+Reussite = models.UtilisateurDefi.__table__
+ReussitesArchivees = models.ArchiveReussites.__table__
+
+# Défis dont une partie des réussites brutes a été déplacée en fichier (archives.py) :
+# les recalculs à partir de UTILISATEUR_DEFI les laissent tels quels
+_DEFIS_ARCHIVES = 'SELECT id_defi FROM "ARCHIVE_REUSSITES"'
+
+# Meilleure réussite restante pour chaque (défi, utilisateur). SQLite renvoie les colonnes
+# non agrégées (date_reussite) de la ligne qui porte le MIN.
+_SELECT_MEILLEURS = (
+    'SELECT id_defi, pseudo_utilisateur, MIN(temps_reussite), date_reussite '
+    'FROM "UTILISATEUR_DEFI" WHERE temps_reussite IS NOT NULL {filtre} '
+    'GROUP BY id_defi, pseudo_utilisateur'
+)
+
+
+def maj_meilleur_temps(session, reussite):
+    """Record `reussite` as the user's best time on its challenge if it beats the current one."""
+    if reussite.temps_reussite is None:
+        return
+    instruction = insert(MeilleurTemps).values(
+        id_defi=reussite.id_defi,
+        pseudo_utilisateur=reussite.pseudo_utilisateur,
+        temps_reussite=reussite.temps_reussite,
+        date_reussite=reussite.date_reussite,
+    )
+    session.execute(instruction.on_conflict_do_update(
+        index_elements=[MeilleurTemps.c.id_defi, MeilleurTemps.c.pseudo_utilisateur],
+        set_={
+            "temps_reussite": instruction.excluded.temps_reussite,
+            "date_reussite": instruction.excluded.date_reussite,
+        },
+        where=instruction.excluded.temps_reussite < MeilleurTemps.c.temps_reussite,
+    ))
+
+
+def reussites_archivees(session, id_defi: int) -> bool:
+    """Whether some raw attempts of the challenge were moved to archive files."""
+    return session.execute(
+        select(ReussitesArchivees.c.id_defi).where(ReussitesArchivees.c.id_defi == id_defi).limit(1)
+    ).first() is not None
+
+
+def _meilleur_temps(session, id_defi: int, pseudo_utilisateur: str):
+    return session.execute(
+        select(MeilleurTemps.c.temps_reussite).where(
+            MeilleurTemps.c.id_defi == id_defi, MeilleurTemps.c.pseudo_utilisateur == pseudo_utilisateur
+        )
+    ).scalar()
+
+
+def recalculer_meilleur_temps(session, id_defi: int, pseudo_utilisateur: str):
+    """
+    Recompute one user's best time on a challenge from the remaining attempts (after a deletion). Return it.
+
+    On a challenge whose attempts were partly archived, the stored best time is kept:
+    the archived attempts cannot be recomputed from UTILISATEUR_DEFI.
+    """
+    if reussites_archivees(session, id_defi):
+        logger.warning("Défi %s archivé : meilleur temps de %s conservé", id_defi, pseudo_utilisateur)
+        return _meilleur_temps(session, id_defi, pseudo_utilisateur)
+    parametres = {"id_defi": id_defi, "pseudo": pseudo_utilisateur}
+    session.execute(
+        MeilleurTemps.delete().where(
+            MeilleurTemps.c.id_defi == id_defi, MeilleurTemps.c.pseudo_utilisateur == pseudo_utilisateur
+        )
+    )
+    session.execute(text(
+        'INSERT INTO "MEILLEUR_TEMPS_DEFI" (id_defi, pseudo_utilisateur, temps_reussite, date_reussite) '
+        + _SELECT_MEILLEURS.format(filtre="AND id_defi = :id_defi AND pseudo_utilisateur = :pseudo")
+    ), parametres)
+    return _meilleur_temps(session, id_defi, pseudo_utilisateur)
+
+
+def reconstruire_meilleurs_temps(conn):
+    """Rebuild the best-time table from UTILISATEUR_DEFI (migration, bulk imports), except archived challenges."""
+    conn.execute(text(f'DELETE FROM "MEILLEUR_TEMPS_DEFI" WHERE id_defi NOT IN ({_DEFIS_ARCHIVES})'))
+    conn.execute(text(
+        'INSERT INTO "MEILLEUR_TEMPS_DEFI" (id_defi, pseudo_utilisateur, temps_reussite, date_reussite) '
+        + _SELECT_MEILLEURS.format(filtre=f"AND id_defi NOT IN ({_DEFIS_ARCHIVES})")
+    ))
+
+
+def _centile(id_defi, pseudo_utilisateur):
+    """SQL expression: share (%) of the challenge's players whose best time is greater than or equal to the user's."""
+    tous, moi, autres = MeilleurTemps.alias(), MeilleurTemps.alias(), MeilleurTemps.alias()
+    # Sous-requêtes corrélées à la requête englobante quand id_defi/pseudo sont des colonnes
+    meilleur = select(moi.c.temps_reussite).where(
+        moi.c.id_defi == id_defi, moi.c.pseudo_utilisateur == pseudo_utilisateur
+    ).correlate_except(moi).scalar_subquery()
+    total = select(func.count()).select_from(tous).where(tous.c.id_defi == id_defi).correlate_except(tous).scalar_subquery()
+    # Deux comptages servis par l'index du classement
+    return select(100.0 * func.count() / total).select_from(autres).where(
+        autres.c.id_defi == id_defi, autres.c.temps_reussite >= meilleur
+    ).correlate_except(autres).scalar_subquery()
+
+
+def maj_resume_defi(session, reussite):
+    """Fold one new attempt into the user's summary on its challenge (after maj_meilleur_temps, for the percentile)."""
+    if reussite.temps_reussite is None:
+        return
+    instruction = insert(Resume).values(
+        pseudo_utilisateur=reussite.pseudo_utilisateur,
+        id_defi=reussite.id_defi,
+        nb_tentatives=1,
+        somme_temps=reussite.temps_reussite,
+        meilleur_temps=reussite.temps_reussite,
+        dernier_temps=reussite.temps_reussite,
+        derniere_reussite=reussite.date_reussite,
+        centile=_centile(reussite.id_defi, reussite.pseudo_utilisateur),
+    )
+    nouvelle = instruction.excluded
+    session.execute(instruction.on_conflict_do_update(
+        index_elements=[Resume.c.pseudo_utilisateur, Resume.c.id_defi],
+        set_={
+            "nb_tentatives": Resume.c.nb_tentatives + 1,
+            "somme_temps": Resume.c.somme_temps + nouvelle.somme_temps,
+            "meilleur_temps": func.min(Resume.c.meilleur_temps, nouvelle.meilleur_temps),
+            "dernier_temps": case(
+                (nouvelle.derniere_reussite >= Resume.c.derniere_reussite, nouvelle.dernier_temps),
+                else_=Resume.c.dernier_temps,
+            ),
+            "derniere_reussite": func.max(Resume.c.derniere_reussite, nouvelle.derniere_reussite),
+            "centile": nouvelle.centile,
+        },
+    ))
+
+
+def maj_apres_reussite(session, reussite):
+    """Write-queue hook of a new success: best time, then the user's summary."""
+    maj_meilleur_temps(session, reussite)
+    maj_resume_defi(session, reussite)
+
+
+def _select_resumes(*filtres):
+    # Résumés recalculés à partir des réussites (MEILLEUR_TEMPS_DEFI doit être à jour pour le centile)
+    derniere = Reussite.alias()
+    dernier_temps = select(derniere.c.temps_reussite).where(
+        derniere.c.pseudo_utilisateur == Reussite.c.pseudo_utilisateur,
+        derniere.c.id_defi == Reussite.c.id_defi,
+        derniere.c.temps_reussite.is_not(None),
+    ).order_by(derniere.c.date_reussite.desc()).limit(1).scalar_subquery()
+    return select(
+        Reussite.c.pseudo_utilisateur,
+        Reussite.c.id_defi,
+        func.count(),
+        func.sum(Reussite.c.temps_reussite),
+        func.min(Reussite.c.temps_reussite),
+        dernier_temps,
+        func.max(Reussite.c.date_reussite),
+        _centile(Reussite.c.id_defi, Reussite.c.pseudo_utilisateur),
+    ).where(Reussite.c.temps_reussite.is_not(None), *filtres).group_by(
+        Reussite.c.pseudo_utilisateur, Reussite.c.id_defi
+    )
+
+
+_COLONNES_RESUME = [
+    "pseudo_utilisateur", "id_defi", "nb_tentatives", "somme_temps",
+    "meilleur_temps", "dernier_temps", "derniere_reussite", "centile",
+]
+
+
+def recalculer_resume_defi(session, id_defi: int, pseudo_utilisateur: str):
+    """Recompute one user's summary on a challenge from the remaining attempts (after recalculer_meilleur_temps)."""
+    if reussites_archivees(session, id_defi):
+        return
+    session.execute(Resume.delete().where(
+        Resume.c.id_defi == id_defi, Resume.c.pseudo_utilisateur == pseudo_utilisateur
+    ))
+    session.execute(Resume.insert().from_select(_COLONNES_RESUME, _select_resumes(
+        Reussite.c.id_defi == id_defi, Reussite.c.pseudo_utilisateur == pseudo_utilisateur
+    )))
+
+
+def reconstruire_resumes_defi(conn):
+    """Rebuild the summaries from UTILISATEUR_DEFI (migration, bulk imports), after reconstruire_meilleurs_temps."""
+    archives = select(ReussitesArchivees.c.id_defi)
+    conn.execute(Resume.delete().where(Resume.c.id_defi.not_in(archives)))
+    conn.execute(Resume.insert().from_select(_COLONNES_RESUME, _select_resumes(Reussite.c.id_defi.not_in(archives))))
+
+
+def lire_meilleurs_temps(session, id_defi: int):
+    """Return the (temps_reussite, pseudo) pairs of a challenge, from the best-time table."""
+    return session.execute(
+        select(MeilleurTemps.c.temps_reussite, MeilleurTemps.c.pseudo_utilisateur).where(
+            MeilleurTemps.c.id_defi == id_defi
+        )
+    ).all()
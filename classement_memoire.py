@@ -0,0 +1,169 @@
+import itertools
+import os
+import threading
+from collections import OrderedDict
+
+from sortedcontainers import SortedList
+
+from classement import lire_meilleurs_temps
+
+# Nombre de défis gardés en mémoire par worker, et période de resynchronisation avec la base
+CLASSEMENT_MAX_DEFIS = int(os.getenv("CLASSEMENT_MAX_DEFIS", "16"))
+CLASSEMENT_RESYNC_S = int(os.getenv("CLASSEMENT_RESYNC_S", "30"))
+# Nombre de premiers envoyés aux abonnés du classement en direct
+CLASSEMENT_DIRECT_TOP = int(os.getenv("CLASSEMENT_DIRECT_TOP", "100"))
+
+# Versions uniques entre instances : clé des instantanés sérialisés du classement en direct
+_versions = itertools.count(1)
+
+
+class ClassementDefi:
+    """
+    Ranked best times of one challenge, kept sorted by (time, pseudo).
+
+    Rank, top-K and neighbourhood lookups are O(log n) and never touch the database.
+    Updates return the move they caused, `{pseudo_utilisateur, temps_reussite, rang,
+    ancien_rang}` (a rank is None when the user enters or leaves the ranking), or None.
+    """
+
+    def __init__(self, lignes=()):
+        self._temps = {pseudo: temps for temps, pseudo in lignes}
+        self._tries = SortedList((temps, pseudo) for pseudo, temps in self._temps.items())
+        self._lock = threading.Lock()
+        self.version = next(_versions)
+
+    def __len__(self):
+        return len(self._tries)
+
+    def _deplacer(self, pseudo: str, temps) -> dict:
+        # Appelé sous le verrou
+        actuel = self._temps.pop(pseudo, None)
+        ancien_rang = None
+        if actuel is not None:
+            ancien_rang = self._tries.index((actuel, pseudo)) + 1
+            self._tries.remove((actuel, pseudo))
+        rang = None
+        if temps is not None:
+            self._temps[pseudo] = temps
+            self._tries.add((temps, pseudo))
+            rang = self._tries.index((temps, pseudo)) + 1
+        self.version = next(_versions)
+        return {"pseudo_utilisateur": pseudo, "temps_reussite": temps, "rang": rang, "ancien_rang": ancien_rang}
+
+    def proposer(self, pseudo: str, temps: float):
+        """Record a new attempt; only an improvement changes the ranking."""
+        with self._lock:
+            actuel = self._temps.get(pseudo)
+            if actuel is not None and actuel <= temps:
+                return None
+            return self._deplacer(pseudo, temps)
+
+    def remplacer(self, pseudo: str, temps):
+        """Set a user's best time after a deletion (`None` removes the user)."""
+        with self._lock:
+            if self._temps.get(pseudo) == temps:
+                return None
+            return self._deplacer(pseudo, temps)
+
+    def _position(self, index: int) -> dict:
+        temps, pseudo = self._tries[index]
+        return {"rang": index + 1, "pseudo_utilisateur": pseudo, "temps_reussite": temps}
+
+    def rang(self, pseudo: str):
+        """Return the user's position, or None when they have no time on this challenge."""
+        with self._lock:
+            temps = self._temps.get(pseudo)
+            if temps is None:
+                return None
+            return self._position(self._tries.index((temps, pseudo)))
+
+    def top(self, k: int) -> list:
+        with self._lock:
+            return [self._position(i) for i in range(min(k, len(self._tries)))]
+
+    def voisins(self, pseudo: str, n: int):
+        """Return the `n` positions above the user, the user's own position and the `n` below, or None."""
+        with self._lock:
+            temps = self._temps.get(pseudo)
+            if temps is None:
+                return None
+            index = self._tries.index((temps, pseudo))
+            return (
+                [self._position(i) for i in range(max(0, index - n), index)],
+                self._position(index),
+                [self._position(i) for i in range(index + 1, min(len(self._tries), index + 1 + n))],
+            )
+
+
+class ClassementsEnMemoire:
+    """
+    Per-worker ClassementDefi of the most recently used challenges (LRU, `max_defis` entries).
+
+    Updated by the routes that write successes; `resynchroniser` reloads them from the
+    database so that successes recorded by other workers show up. Challenges for which
+    `epingle(id_defi)` is true (live subscribers) are never evicted.
+    """
+
+    def __init__(self, max_defis: int, epingle=None):
+        self.max_defis = max_defis
+        self.epingle = epingle or (lambda id_defi: False)
+        self._classements = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, id_defi: int):
+        with self._lock:
+            classement = self._classements.get(id_defi)
+            if classement is not None:
+                self._classements.move_to_end(id_defi)
+            return classement
+
+    def installer(self, id_defi: int, lignes) -> ClassementDefi:
+        classement = ClassementDefi(lignes)
+        with self._lock:
+            self._classements[id_defi] = classement
+            self._classements.move_to_end(id_defi)
+            while len(self._classements) > self.max_defis:
+                # Le moins récemment utilisé parmi les défis non épinglés ; tous épinglés : dépassement toléré
+                evince = next((autre for autre in self._classements if autre != id_defi and not self.epingle(autre)), None)
+                if evince is None:
+                    break
+                del self._classements[evince]
+        return classement
+
+    def proposer(self, id_defi: int, pseudo: str, temps):
+        """Forward an attempt to the challenge's ranking if it is in memory. Return the move, or None."""
+        classement = self.get(id_defi)
+        if classement is not None and temps is not None:
+            return classement.proposer(pseudo, temps)
+        return None
+
+    def remplacer(self, id_defi: int, pseudo: str, temps):
+        classement = self.get(id_defi)
+        if classement is not None:
+            return classement.remplacer(pseudo, temps)
+        return None
+
+    def resynchroniser(self, session_factory) -> list:
+        """Reload every challenge held in memory from the best-time table. Return the ids that changed."""
+        with self._lock:
+            ids_defis = list(self._classements)
+        with session_factory() as session:
+            lignes = {id_defi: lire_meilleurs_temps(session, id_defi) for id_defi in ids_defis}
+        modifies = []
+        for id_defi, lignes_defi in lignes.items():
+            actuel = self.get(id_defi)
+            # Défi évincé entre-temps : inutile de le réinstaller
+            if actuel is None:
+                continue
+            # Classement inchangé : on garde l'instance (et sa version)
+            if actuel._temps != {pseudo: temps for temps, pseudo in lignes_defi}:
+                self.installer(id_defi, lignes_defi)
+                modifies.append(id_defi)
+        return modifies
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {id_defi: len(classement) for id_defi, classement in self._classements.items()}
+
+
+classements = ClassementsEnMemoire(CLASSEMENT_MAX_DEFIS)
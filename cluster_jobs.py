@@ -0,0 +1,159 @@
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+
+import models
+
+logger = logging.getLogger(__name__)
+
+# Durée du bail d'une exécution : une occurrence restée "en_cours" au-delà (worker arrêté) peut être reprise
+SCHEDULER_LEASE_S = int(os.getenv("SCHEDULER_LEASE_S", "900"))
+# Ancienneté maximale d'une occurrence manquée rattrapée au démarrage
+SCHEDULER_CATCHUP_MAX_S = int(os.getenv("SCHEDULER_CATCHUP_MAX_S", str(7 * 24 * 3600)))
+
+EN_COURS, SUCCES, ECHEC, IGNOREE = "en_cours", "succes", "echec", "ignoree"
+
+Execution = models.ExecutionTache.__table__
+
+
+def _utc(date: datetime) -> datetime:
+    """Naive UTC datetime, as stored in the database."""
+    return date.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _maintenant() -> datetime:
+    return _utc(datetime.now(timezone.utc))
+
+
+def derniere_occurrence(trigger, maintenant: datetime, fenetre: timedelta):
+    """Return the latest fire time of an APScheduler trigger in (maintenant - fenetre, maintenant], or None."""
+    precedente = None
+    occurrence = trigger.get_next_fire_time(None, maintenant - fenetre)
+    while occurrence is not None and occurrence <= maintenant:
+        precedente = occurrence
+        occurrence = trigger.get_next_fire_time(occurrence, occurrence + timedelta(microseconds=1))
+    return precedente
+
+
+class ClusterJobs:
+    """
+    Scheduled jobs that run once per cluster instead of once per worker.
+
+    Every worker schedules the jobs, but each occurrence is claimed in EXECUTION_TACHE
+    (primary key: job id and scheduled time). The worker whose claim succeeds runs it,
+    the others skip it. A claim is a lease: an occurrence left "en_cours" by a dead
+    worker can be taken over once the lease expired. The same rows are the run history,
+    and tell a booting worker which occurrence was missed while every worker was down.
+    """
+
+    def __init__(self, session_factory, bail_s: int = SCHEDULER_LEASE_S,
+                 rattrapage_max_s: int = SCHEDULER_CATCHUP_MAX_S, detenteur: str | None = None):
+        self.session_factory = session_factory
+        self.bail = timedelta(seconds=bail_s)
+        self.rattrapage_max = timedelta(seconds=rattrapage_max_s)
+        self.detenteur = detenteur or f"{socket.gethostname()}:{os.getpid()}"
+        self._taches = {}
+
+    def ajouter(self, scheduler, fonction, trigger, id: str):
+        """Register `fonction` and schedule it on this worker's scheduler, guarded by the cluster claim."""
+        self._taches[id] = (fonction, trigger)
+        # Pas de délai de grâce : une occurrence en retard reste exécutée au plus une fois grâce au verrou
+        scheduler.add_job(
+            self.executer, trigger=trigger, args=[id], id=id,
+            replace_existing=True, coalesce=True, misfire_grace_time=None,
+        )
+
+    def executer(self, id_tache: str, date_prevue: datetime | None = None) -> bool:
+        """Run the occurrence due at `date_prevue` (default: the latest one) if this worker claims it."""
+        fonction, trigger = self._taches[id_tache]
+        if date_prevue is None:
+            date_prevue = derniere_occurrence(trigger, datetime.now(trigger.timezone), self.rattrapage_max)
+            if date_prevue is None:
+                return False
+        date_prevue = _utc(date_prevue)
+        if not self._reserver(id_tache, date_prevue):
+            return False
+
+        debut = time.perf_counter()
+        try:
+            fonction()
+        except Exception as e:
+            logger.exception("Échec de la tâche %s (%s)", id_tache, date_prevue)
+            self._terminer(id_tache, date_prevue, ECHEC, debut, repr(e)[:500])
+        else:
+            self._terminer(id_tache, date_prevue, SUCCES, debut)
+        return True
+
+    def rattraper(self):
+        """
+        Run once per cluster the latest occurrence of each job missed while no worker was up.
+
+        A job without any history only records its latest occurrence as skipped: it was
+        run by the previous, per-worker scheduler and must not run a second time.
+        """
+        for id_tache, (_, trigger) in self._taches.items():
+            with self.session_factory() as session:
+                deja_executee = session.execute(
+                    select(Execution.c.id_tache).where(Execution.c.id_tache == id_tache).limit(1)
+                ).first()
+            if deja_executee:
+                self.executer(id_tache)
+                continue
+            date_prevue = derniere_occurrence(trigger, datetime.now(trigger.timezone), self.rattrapage_max)
+            if date_prevue is not None and self._reserver(id_tache, _utc(date_prevue)):
+                self._terminer(id_tache, _utc(date_prevue), IGNOREE, time.perf_counter())
+
+    def _reserver(self, id_tache: str, date_prevue: datetime) -> bool:
+        maintenant = _maintenant()
+        instruction = insert(Execution).values(
+            id_tache=id_tache,
+            date_prevue=date_prevue,
+            statut=EN_COURS,
+            detenteur=self.detenteur,
+            date_debut=maintenant,
+            bail_expire=maintenant + self.bail,
+        )
+        # Reprise uniquement d'une exécution abandonnée (bail expiré) ; une occurrence terminée n'est jamais rejouée
+        instruction = instruction.on_conflict_do_update(
+            index_elements=[Execution.c.id_tache, Execution.c.date_prevue],
+            set_={
+                "statut": EN_COURS,
+                "detenteur": instruction.excluded.detenteur,
+                "date_debut": instruction.excluded.date_debut,
+                "bail_expire": instruction.excluded.bail_expire,
+            },
+            where=(Execution.c.statut == EN_COURS) & (Execution.c.bail_expire < instruction.excluded.date_debut),
+        )
+        with self.session_factory() as session:
+            resultat = session.execute(instruction)
+            session.commit()
+            return resultat.rowcount == 1
+
+    def _terminer(self, id_tache: str, date_prevue: datetime, statut: str, debut: float, erreur: str | None = None):
+        with self.session_factory() as session:
+            session.execute(
+                Execution.update().where(
+                    Execution.c.id_tache == id_tache,
+                    Execution.c.date_prevue == date_prevue,
+                    Execution.c.detenteur == self.detenteur,
+                ).values(
+                    statut=statut,
+                    date_fin=_maintenant(),
+                    duree_ms=round((time.perf_counter() - debut) * 1000, 3),
+                    erreur=erreur,
+                )
+            )
+            session.commit()
+
+    def historique(self, limit: int = 50) -> list:
+        """Latest executions, most recent scheduled time first."""
+        with self.session_factory() as session:
+            lignes = session.execute(
+                select(Execution).order_by(Execution.c.date_prevue.desc(), Execution.c.id_tache).limit(limit)
+            ).mappings().all()
+        return [dict(ligne) for ligne in lignes]
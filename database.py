@@ -1,15 +1,20 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-import sqlite3
 from pathlib import Path
 import os
+from dotenv import load_dotenv
+
+load_dotenv()
 
 # Check if we're running in Docker by looking for the environment variable
 is_docker = os.environ.get('DOCKER_ENV', False)
 
-# Set database path - if in Docker, use the data directory, otherwise use the current directory
-if is_docker:
+# Set database path - DATABASE_PATH wins (benchmarks, tests), then the Docker data directory, otherwise the current directory
+if os.getenv('DATABASE_PATH'):
+    DATABASE_FILE = Path(os.getenv('DATABASE_PATH'))
+elif is_docker:
     # Ensure data directory exists
     data_dir = Path('/app/data')
     data_dir.mkdir(exist_ok=True)
@@ -17,20 +22,48 @@ if is_docker:
 else:
     DATABASE_FILE = Path(__file__).parent / 'db.sqlite3'  # Dynamically set database path
 
+# SQLite performance profile, applied to every pooled connection (see .env.example)
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-64000")),  # negative value = size in KiB
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", "268435456")),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000")),  # milliseconds
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+_PRAGMA_CHOICES = {
+    "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+    "temp_store": {"DEFAULT", "FILE", "MEMORY"},
+}
+
+for pragma, choices in _PRAGMA_CHOICES.items():
+    SQLITE_PRAGMAS[pragma] = SQLITE_PRAGMAS[pragma].upper()
+    if SQLITE_PRAGMAS[pragma] not in choices:
+        raise RuntimeError(f"Invalid value for SQLite pragma {pragma}: {SQLITE_PRAGMAS[pragma]}")
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply the configured SQLite profile on a freshly opened connection."""
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+
+def read_sqlite_pragmas(db):
+    """Return the pragma values actually in effect on the session's connection."""
+    return {pragma: db.execute(text(f"PRAGMA {pragma}")).scalar() for pragma in SQLITE_PRAGMAS}
+
+
 engine = create_engine(f'sqlite:///{DATABASE_FILE}', connect_args={"check_same_thread": False})
+event.listen(engine, "connect", apply_sqlite_pragmas)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
-
 
-def execute_sql_file(file_path: Path):
-    """Execute the SQL commands from a file."""
-    with sqlite3.connect(DATABASE_FILE) as conn:
-        with open(file_path, "r", encoding='UTF-8') as file:
-            sql_script = file.read()
-            conn.executescript(sql_script)
-        conn.commit()
+# Async engine used by the `async def` routes so SQLite queries don't run on the event loop thread
+async_engine = create_async_engine(f'sqlite+aiosqlite:///{DATABASE_FILE}')
+event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+Base = declarative_base()
 
-def is_initialized(db, model):
-    """Check if the database is initialized."""
-    cursor = db.query(model).first()
-    return cursor is not None
\ No newline at end of file
@@ -1,5 +1,5 @@
-INSERT INTO DEFI (titre_defi, description_defi) VALUES
-('Defi premiere semaine', 'Dans les profondeurs de la jungle, l''explorateur intrépide trouva un temple oublié. Chaque gravure sur les murs semblait raconter une histoire mystérieuse, une énigme à résoudre avant que le soleil ne se couche. Attention aux pièges !');
+INSERT OR REPLACE INTO DEFI (id_defi, titre_defi, description_defi) VALUES
+(1, 'Defi premiere semaine', 'Dans les profondeurs de la jungle, l''explorateur intrépide trouva un temple oublié. Chaque gravure sur les murs semblait raconter une histoire mystérieuse, une énigme à résoudre avant que le soleil ne se couche. Attention aux pièges !');
 
-INSERT INTO DEFI (titre_defi, description_defi) VALUES
-('Defi deuxieme semaine', 'Sous un ciel orageux, le capitaine Barbe-Noire guida son équipage vers une île cachée. Le trésor y était enfoui, protégé par des légendes terrifiantes. Entre les éclairs et le rugissement des vagues, les pirates avancèrent, bravant tous les dangers.');
\ No newline at end of file
+INSERT OR REPLACE INTO DEFI (id_defi, titre_defi, description_defi) VALUES
+(2, 'Defi deuxieme semaine', 'Sous un ciel orageux, le capitaine Barbe-Noire guida son équipage vers une île cachée. Le trésor y était enfoui, protégé par des légendes terrifiantes. Entre les éclairs et le rugissement des vagues, les pirates avancèrent, bravant tous les dangers.');
\ No newline at end of file
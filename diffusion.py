@@ -0,0 +1,124 @@
+import asyncio
+import json
+import os
+
+# Messages en attente par abonné : au-delà, l'abonné trop lent est déconnecté (EventSource se reconnecte seul)
+DIFFUSION_MAX_ATTENTE = int(os.getenv("DIFFUSION_MAX_ATTENTE", "100"))
+# Commentaire SSE périodique : garde la connexion ouverte derrière les proxys et détecte les clients partis
+DIFFUSION_PING_S = float(os.getenv("DIFFUSION_PING_S", "15"))
+
+PING = b": ping\n\n"
+
+
+def message_sse(evenement: str, donnees) -> bytes:
+    """Serialize one server-sent event."""
+    return f"event: {evenement}\ndata: {json.dumps(donnees, separators=(',', ':'), default=str)}\n\n".encode()
+
+
+class _Abonnement:
+    def __init__(self, max_attente: int):
+        self.file = asyncio.Queue(max_attente)
+        self.deconnecte = False
+
+
+class Diffuseur:
+    """
+    Server-sent events fan-out, per channel (here, a challenge id).
+
+    An event is serialized once and the same bytes are queued for every subscriber
+    of its channel, so an idle subscriber costs a pending queue read and nothing is
+    serialized for a channel nobody listens to. Subscribers more than `max_attente`
+    messages behind are disconnected. Subscriptions live on the event loop;
+    `publier` may be called from any thread.
+    """
+
+    def __init__(self, max_attente: int = DIFFUSION_MAX_ATTENTE, ping_s: float = DIFFUSION_PING_S):
+        self.max_attente = max_attente
+        self.ping_s = ping_s
+        self._abonnes = {}
+        self._instantanes = {}
+        self._boucle = None
+        self.publies = 0
+        self.deconnexions = 0
+
+    def a_des_abonnes(self, canal) -> bool:
+        return bool(self._abonnes.get(canal))
+
+    def publier(self, canal, evenement: str, donnees):
+        if self._abonnes.get(canal):
+            self._diffuser(canal, message_sse(evenement, donnees))
+
+    def publier_instantane(self, canal, version, evenement: str, construire):
+        """Send the channel's snapshot to its current subscribers (after a change they cannot derive)."""
+        if self._abonnes.get(canal):
+            self._diffuser(canal, self.instantane(canal, version, evenement, construire))
+
+    def instantane(self, canal, version, evenement: str, construire) -> bytes:
+        """Serialized snapshot of a channel, shared by subscribers until `version` changes."""
+        en_cache = self._instantanes.get(canal)
+        if en_cache is None or en_cache[0] != version:
+            en_cache = (version, message_sse(evenement, construire()))
+            self._instantanes[canal] = en_cache
+        return en_cache[1]
+
+    def _diffuser(self, canal, message: bytes):
+        try:
+            courante = asyncio.get_running_loop()
+        except RuntimeError:
+            courante = None
+        if courante is self._boucle:
+            self._distribuer(canal, message)
+            return
+        try:
+            self._boucle.call_soon_threadsafe(self._distribuer, canal, message)
+        except RuntimeError:
+            # Boucle fermée (arrêt du worker)
+            pass
+
+    def _distribuer(self, canal, message: bytes):
+        self.publies += 1
+        for abonnement in list(self._abonnes.get(canal, ())):
+            try:
+                abonnement.file.put_nowait(message)
+            except asyncio.QueueFull:
+                abonnement.deconnecte = True
+                self.deconnexions += 1
+                self._retirer(canal, abonnement)
+
+    def _retirer(self, canal, abonnement: _Abonnement):
+        abonnes = self._abonnes.get(canal)
+        if abonnes is not None:
+            abonnes.discard(abonnement)
+            if not abonnes:
+                del self._abonnes[canal]
+                self._instantanes.pop(canal, None)
+
+    async def flux(self, canal, premier_message):
+        """
+        Event stream of one subscriber: `premier_message()` (the snapshot), then the channel's events.
+
+        The subscriber is registered before the snapshot is built, with no await in
+        between, so no event published after the snapshot can be missed.
+        """
+        self._boucle = asyncio.get_running_loop()
+        abonnement = _Abonnement(self.max_attente)
+        self._abonnes.setdefault(canal, set()).add(abonnement)
+        try:
+            yield premier_message()
+            while True:
+                try:
+                    message = await asyncio.wait_for(abonnement.file.get(), self.ping_s)
+                except asyncio.TimeoutError:
+                    message = PING
+                if abonnement.deconnecte:
+                    return
+                yield message
+        finally:
+            self._retirer(canal, abonnement)
+
+    def stats(self) -> dict:
+        return {
+            "abonnes": {canal: len(abonnes) for canal, abonnes in self._abonnes.items()},
+            "evenements_publies": self.publies,
+            "deconnexions_lenteur": self.deconnexions,
+        }
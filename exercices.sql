@@ -1,14 +1,14 @@
-INSERT INTO EXERCICE (titre_exercice, description_exercice) VALUES
-('Exercice 1 ', 'j f jjj fff jjff jffj qsdf jklm qm sl dk fj sd kl fq mj qjskdlfm');
+INSERT OR REPLACE INTO EXERCICE (id_exercice, titre_exercice, description_exercice) VALUES
+(1, 'Exercice 1 ', 'j f jjj fff jjff jffj qsdf jklm qm sl dk fj sd kl fq mj qjskdlfm');
 
-INSERT INTO EXERCICE (titre_exercice, description_exercice) VALUES
-('Exercice 2 ', 'tarze pyiou mjlk hgfd qds wncbxv !;!,: IOa YTf');
+INSERT OR REPLACE INTO EXERCICE (id_exercice, titre_exercice, description_exercice) VALUES
+(2, 'Exercice 2 ', 'tarze pyiou mjlk hgfd qds wncbxv !;!,: IOa YTf');
 
-INSERT INTO EXERCICE (titre_exercice, description_exercice) VALUES
-('Exercice 3 ', 'Les étudiants de l''université dactylographient tous les jours avec entrain.');
+INSERT OR REPLACE INTO EXERCICE (id_exercice, titre_exercice, description_exercice) VALUES
+(3, 'Exercice 3 ', 'Les étudiants de l''université dactylographient tous les jours avec entrain.');
 
-INSERT INTO EXERCICE (titre_exercice, description_exercice) VALUES
-('Exercice 4 ', 'Dans un zoo, les koalas et les pandas sont souvent les plus visités.');
+INSERT OR REPLACE INTO EXERCICE (id_exercice, titre_exercice, description_exercice) VALUES
+(4, 'Exercice 4 ', 'Dans un zoo, les koalas et les pandas sont souvent les plus visités.');
 
-INSERT INTO EXERCICE (titre_exercice, description_exercice) VALUES
-('Exercice 5 ', 'Le grand sphinx de Gizeh, au bord du Nil, invite à rêver.');
+INSERT OR REPLACE INTO EXERCICE (id_exercice, titre_exercice, description_exercice) VALUES
+(5, 'Exercice 5 ', 'Le grand sphinx de Gizeh, au bord du Nil, invite à rêver.');
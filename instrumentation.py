@@ -0,0 +1,105 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "1") == "1"
+# Au-delà de ce nombre d'exécutions d'une même requête SQL dans une requête HTTP, on signale un N+1
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "10"))
+
+
+class MesuresRequete:
+    """SQL statements run while serving one HTTP request."""
+
+    def __init__(self):
+        self.nb_requetes = 0
+        self.duree_ms = 0.0
+        self.formes = Counter()
+
+
+_mesures_courantes: ContextVar[MesuresRequete | None] = ContextVar("mesures_sql", default=None)
+
+# Agrégats par route : {route: {"appels", "requetes_sql", "duree_sql_ms", "max_requetes_sql"}}
+_stats_routes = {}
+_stats_lock = threading.Lock()
+
+
+def _avant_execution(conn, cursor, statement, parameters, context, executemany):
+    # Porté par le contexte d'exécution : une requête en échec ne laisse rien sur la connexion
+    context._debut_requete = time.perf_counter()
+
+
+def _apres_execution(conn, cursor, statement, parameters, context, executemany):
+    debut = context._debut_requete
+    mesures = _mesures_courantes.get()
+    if mesures is None:
+        return
+    mesures.nb_requetes += 1
+    mesures.duree_ms += (time.perf_counter() - debut) * 1000
+    # Les paramètres sont liés (?), le texte SQL identifie donc la forme de la requête
+    mesures.formes[statement] += 1
+
+
+def instrumenter_engine(engine):
+    """Register the statement counters on a (sync) engine."""
+    event.listen(engine, "before_cursor_execute", _avant_execution)
+    event.listen(engine, "after_cursor_execute", _apres_execution)
+
+
+def _enregistrer(route: str, mesures: MesuresRequete):
+    with _stats_lock:
+        stats = _stats_routes.setdefault(
+            route, {"appels": 0, "requetes_sql": 0, "duree_sql_ms": 0.0, "max_requetes_sql": 0}
+        )
+        stats["appels"] += 1
+        stats["requetes_sql"] += mesures.nb_requetes
+        stats["duree_sql_ms"] += mesures.duree_ms
+        stats["max_requetes_sql"] = max(stats["max_requetes_sql"], mesures.nb_requetes)
+
+
+def lire_stats_routes():
+    """Return the per-route SQL aggregates, with averages per call."""
+    with _stats_lock:
+        return {
+            route: {
+                **stats,
+                "moyenne_requetes_sql": stats["requetes_sql"] / stats["appels"],
+                "moyenne_duree_sql_ms": stats["duree_sql_ms"] / stats["appels"],
+            }
+            for route, stats in _stats_routes.items()
+        }
+
+
+async def mesurer_requetes_sql(request, call_next):
+    """HTTP middleware: counts SQL statements and DB time, exposed in the Server-Timing header."""
+    if not SQL_INSTRUMENTATION:
+        return await call_next(request)
+
+    mesures = MesuresRequete()
+    jeton = _mesures_courantes.set(mesures)
+    try:
+        response = await call_next(request)
+    finally:
+        _mesures_courantes.reset(jeton)
+
+    route = request.scope.get("route")
+    nom_route = f"{request.method} {route.path if route else request.url.path}"
+    _enregistrer(nom_route, mesures)
+
+    for statement, nb in mesures.formes.items():
+        if nb > SQL_N_PLUS_ONE_THRESHOLD:
+            logger.warning(
+                "N+1 probable sur %s : requête exécutée %s fois : %s",
+                nom_route, nb, " ".join(statement.split())[:200]
+            )
+
+    response.headers.append(
+        "Server-Timing", f'db;desc="SQL ({mesures.nb_requetes})";dur={mesures.duree_ms:.2f}'
+    )
+    return response
@@ -3,33 +3,51 @@ import logging
 from datetime import datetime, timedelta, timezone
 import os
 from pathlib import Path
-from typing import Annotated, List, Optional
+from typing import Annotated, List, Literal, Optional
 import asyncio
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
 # Imports tiers
 import jwt
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import FastAPI, HTTPException, Depends, Query, Response, status, Request, Path as FastAPIPath
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse
 from fastapi.openapi.utils import get_openapi
 from jwt.exceptions import InvalidTokenError
 import time
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 
 # Imports internes
-from database import SessionLocal, engine, execute_sql_file, is_initialized
-from auth import Token, ACCESS_TOKEN_EXPIRE_MINUTES, SECRET_KEY, ALGORITHM, pwd_context, oauth2_scheme, validate_password, is_common_password
+from database import SessionLocal, AsyncSessionLocal, engine, async_engine, SQLITE_PRAGMAS, read_sqlite_pragmas
+from auth import Token, ACCESS_TOKEN_EXPIRE_MINUTES, SECRET_KEY, ALGORITHM, pwd_context, oauth2_scheme, validate_password, is_common_password, password_pool, configurer_cout_hachage
+from breached_passwords import breached_passwords
+from rate_limit import login_admission
 import models
+from write_queue import write_queue
+from migrations import appliquer_migrations
+from seeds import appliquer_seeds
+from instrumentation import instrumenter_engine, mesurer_requetes_sql, lire_stats_routes
+from cache import TTLCache, KeySet
+from pagination import paginer, page, EN_TETE_CURSEUR
+from cluster_jobs import ClusterJobs
+from diffusion import Diffuseur
+from agregats_stats import maj_agregats_stat, debut_periode
+from archives import archiver_classement, archiver_reussites, REUSSITES_RETENTION_SEMAINES
+from classement import maj_apres_reussite, recalculer_meilleur_temps, recalculer_resume_defi, lire_meilleurs_temps
+from badges_classement import attribuer_badges_defi
+from classement_memoire import classements, CLASSEMENT_RESYNC_S, CLASSEMENT_DIRECT_TOP
 from pydantic_models import (
     IdClasses, UtilisateurBase,  UtilisateurModele,
-    StatsUtilisateur, UtilisateurRenvoye,
+    StatsUtilisateur, LotStats, AgregatStat, UtilisateurRenvoye,
     DefiBase, DefiModele,
-    UtilisateurDefiBase, UtilisateurDefiModele,
+    UtilisateurDefiBase, UtilisateurDefiModele, PositionClassement, RangClassement, VoisinsClassement, ResumeDefiModele, ClassementArchiveModele,
     BadgeBase, BadgeModele,
     CoursBase, CoursModele,UtilisateurCoursBase,
     UtilisateurCoursModele,
@@ -38,12 +56,33 @@ from pydantic_models import (
     UtilisateurGroupeBase, UtilisateurGroupeModele,
     ExerciceBase, ExerciceModele,
     ExerciceUtilisateurBase, ExerciceUtilisateurModele,UpdateCptDefiRequest,
-    PasswordChangeRequest, ProfilePicture, UpdatePdp,utilisateurPdp, UtilisateurCompte,
+    PasswordChangeRequest, ProfilePicture, UpdatePdp,utilisateurPdp, UtilisateurCompte, UtilisateurCourant,
     ExerciceGroupeBase,ExerciceGroupeModel
 )
 
 app = FastAPI()
 scheduler = BackgroundScheduler()
+# Tâches exécutées une seule fois par cluster (verrou par occurrence en base), quel que soit le nombre de workers
+cluster_jobs = ClusterJobs(SessionLocal)
+# Abonnés au classement en direct de chaque défi (Server-Sent Events)
+diffuseur = Diffuseur()
+# Un défi suivi en direct reste en mémoire : sinon ses abonnés ne recevraient plus rien
+classements.epingle = diffuseur.a_des_abonnes
+
+# Cache des utilisateurs authentifiés (clé : sujet du jeton), invalidé par les routes qui les modifient
+principal_cache = TTLCache(
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", "60")),
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")),
+)
+# Pseudos existants (par worker) : refus d'un pseudo déjà pris avant tout calcul bcrypt
+pseudos_existants = KeySet()
+# Classements par classe (clé : (id_groupe, id_defi)), invalidés par les réussites et les changements de membres
+classements_groupe = TTLCache(
+    ttl=float(os.getenv("CLASSEMENT_GROUPE_CACHE_TTL", "30")),
+    maxsize=int(os.getenv("CLASSEMENT_GROUPE_CACHE_SIZE", "2000")),
+)
+# Nombre maximal de stats par envoi groupé (POST /stat/lot)
+STATS_LOT_MAX = int(os.getenv("STATS_LOT_MAX", "500"))
 
 
 
@@ -59,12 +98,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[EN_TETE_CURSEUR],  # curseur de pagination lisible par le front
 )
 
 # Configuration du logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Mesure des requêtes SQL par requête HTTP (en-tête Server-Timing, détection des N+1)
+instrumenter_engine(engine)
+instrumenter_engine(async_engine.sync_engine)
+app.middleware("http")(mesurer_requetes_sql)
+
 # Dependency to get the DB session
 def get_db():
     db = SessionLocal()
@@ -73,58 +118,50 @@ def get_db():
     finally:
         db.close()
 
-# Create tables if they don't exist
+# Dependency to get the async DB session (routes `async def` les plus sollicitées)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Create tables if they don't exist, then apply pending schema migrations (index...)
 models.Base.metadata.create_all(bind=engine)
+appliquer_migrations(engine)
 
 @app.on_event("startup")
 async def on_startup():
-    sql_file_path = Path(__file__).parent / "cours.sql"
-    exercices_sql_file_path = Path(__file__).parent / "exercices.sql"
-    badges_sql_file_path = Path(__file__).parent / "badges.sql"
-    defi_sql_file_path = Path(__file__).parent / "defi.sql"
-    pp_sql_file_path = Path(__file__).parent / "photodeprofil.sql"
     scheduler.start()
+    write_queue.start()
+    # Coût bcrypt fixé, ou calibré une fois pour le cluster, avant de démarrer le pool (transmis aux processus du pool)
+    print(f"Coût bcrypt : {configurer_cout_hachage(session_factory=SessionLocal)}")
+    password_pool.demarrer()
+    # mmap de la liste compilée (partagée entre workers par le cache de pages)
+    breached_passwords.charger()
+
+    with engine.connect() as conn:
+        pseudos_existants.charger(conn.execute(select(models.Utilisateur.pseudo)).scalars())
+
+    # Classement en mémoire du défi de la semaine, prêt avant les premières requêtes
+    with SessionLocal() as db:
+        defi_semaine = db.query(models.DefiSemaine).first()
+        if defi_semaine:
+            classements.installer(defi_semaine.numero_defi, lire_meilleurs_temps(db, defi_semaine.numero_defi))
 
-    db = SessionLocal()
-
-    print(is_initialized(db, models.ProfilePicture))  # Doit afficher False si pas encore initialisé
-    try:
-        if not is_initialized(db, models.Cours):
-            # Run the SQL file only if the database is uninitialized
-            execute_sql_file(sql_file_path)
-            print("La base de donnée a été initialisée avec les données des cours.")
-        else:
-            print("Les données des cours sont déjà initialisées.")
+    # Appliquer les fichiers de données initiales nouveaux ou modifiés (cours, exercices, badges, défis, photos de profil)
+    fichiers_appliques = appliquer_seeds(engine)
+    if fichiers_appliques:
+        print(f"La base de données a été initialisée avec : {', '.join(fichiers_appliques)}")
+    else:
+        print("Les données initiales sont déjà à jour.")
 
-        # Vérifie et initialise les données pour les exercices
-        if not is_initialized(db, models.Exercice):
-            execute_sql_file(exercices_sql_file_path)
-            print("La base de données a été initialisée avec les données des exercices.")
-        else:
-            print("Les données des exercices sont déjà initialisées.")
-        
-        # Vérifie et initialise les données pour les badges
-        if not is_initialized(db, models.Badge):
-            execute_sql_file(badges_sql_file_path)
-            print("La base de données a été initialisée avec les données des badges.")
-        else:
-            print("Les données des badges sont déjà initialisées.")
+    # Occurrences manquées pendant que tous les workers étaient arrêtés (dans le thread du scheduler)
+    scheduler.add_job(cluster_jobs.rattraper, id='rattraper_taches', replace_existing=True)
 
-        # Vérifie et initialise les données pour les defis
-        if not is_initialized(db, models.Defi):
-            execute_sql_file(defi_sql_file_path)
-            print("La base de données a été initialisée avec les données des defi.")
-        else:
-            print("Les données des badges sont déjà initialisées.")
 
-        # Vérifie et initialise les données pour les photos de profil
-        if not is_initialized(db, models.ProfilePicture): # Debug
-            execute_sql_file(pp_sql_file_path)
-            print("La base de données a été intialisée avec les données des photos de profil. ")
-        else:
-            print("Les données des photos de profil sont déjà initialisées.")
-    finally:
-        db.close()
+@app.on_event("shutdown")
+def on_shutdown():
+    # Écrire les insertions encore en attente avant l'arrêt du worker
+    write_queue.stop()
+    password_pool.arreter()
 
 
 def increment_weekly_challenge():
@@ -138,21 +175,65 @@ def increment_weekly_challenge():
             db.commit()
         else:
             attribuer_badges_classement(defi_semaine.numero_defi, db)
+            # Classement final figé dans la même transaction que le changement de semaine
+            nb_archives = archiver_classement(db, defi_semaine.numero_defi)
             defi_semaine.numero_defi += 1
             db.commit()
-            print(f"✅ Nouveau numéro de défi : {defi_semaine.numero_defi}")
+            print(f"✅ Nouveau numéro de défi : {defi_semaine.numero_defi} ({nb_archives} places archivées)")
+            if REUSSITES_RETENTION_SEMAINES > 0:
+                archives = archiver_reussites(SessionLocal, defi_semaine.numero_defi - 1 - REUSSITES_RETENTION_SEMAINES)
+                if archives:
+                    print(f"🗄️ Réussites brutes archivées pour les défis : {archives}")
         
     except Exception as e:
         print(f"❌ Erreur lors de la mise à jour du défi : {str(e)}")
+        # Échec enregistré dans l'historique des tâches
+        raise
     finally:
         db.close()
 
 
-# Modifier le scheduler pour utiliser directement la fonction synchrone
-scheduler.add_job(
+# Changement de défi hebdomadaire : une seule fois par cluster, rattrapé au démarrage s'il a été manqué
+cluster_jobs.ajouter(
+    scheduler,
     increment_weekly_challenge,
     trigger=CronTrigger(day_of_week='mon', hour=4, minute=0),
-    id='increment_weekly_challenge',
+    id='increment_weekly_challenge'
+)
+
+def instantane_classement(classement) -> dict:
+    return {"top": classement.top(CLASSEMENT_DIRECT_TOP), "total": len(classement)}
+
+
+def publier_instantane_classement(id_defi: int):
+    classement = classements.get(id_defi)
+    if classement is not None:
+        diffuseur.publier_instantane(id_defi, classement.version, "classement", lambda: instantane_classement(classement))
+
+
+def publier_changement_classement(id_defi: int, changement):
+    # Seuls les mouvements qui touchent le top diffusé sont envoyés
+    if changement is None:
+        return
+    if min(rang for rang in (changement["rang"], changement["ancien_rang"]) if rang is not None) > CLASSEMENT_DIRECT_TOP:
+        return
+    if changement["rang"] is None or (changement["ancien_rang"] is not None and changement["rang"] > changement["ancien_rang"]):
+        # Recul ou sortie (suppression) : les clients ne connaissent pas le nouvel entrant du top
+        publier_instantane_classement(id_defi)
+    else:
+        diffuseur.publier(id_defi, "rang", changement)
+
+
+def resynchroniser_classements():
+    for id_defi in classements.resynchroniser(SessionLocal):
+        publier_instantane_classement(id_defi)
+
+
+# Recharger les classements en mémoire : prise en compte des réussites enregistrées par les autres workers
+scheduler.add_job(
+    resynchroniser_classements,
+    trigger=IntervalTrigger(seconds=CLASSEMENT_RESYNC_S),
+    id='resynchroniser_classements',
     replace_existing=True
 )
 
@@ -163,10 +244,36 @@ def get_utilisateur(db, pseudo: str):
         return utilisateur
     return None
 
+async def get_utilisateur_async(db: AsyncSession, pseudo: str):
+    result = await db.execute(select(models.Utilisateur).filter(models.Utilisateur.pseudo == pseudo))
+    return result.scalars().first()
+
+def pseudo_pris(db: Session, pseudo: str) -> bool:
+    # Absent de l'ensemble : libre pour ce worker ; un pseudo créé par un autre worker est arrêté par la contrainte de la base
+    if pseudo not in pseudos_existants:
+        return False
+    # Présent : on confirme, l'utilisateur a pu être supprimé par un autre worker
+    if db.query(models.Utilisateur.pseudo).filter(models.Utilisateur.pseudo == pseudo).first():
+        return True
+    pseudos_existants.retirer(pseudo)
+    return False
+
+def erreur_creation_utilisateur(erreur: IntegrityError, pseudo: str) -> HTTPException:
+    # Seul un doublon de pseudo est un 409 « pseudo déjà pris » ; les autres contraintes sont signalées telles quelles
+    message = str(erreur.orig)
+    if "UTILISATEUR.pseudo" in message:
+        pseudos_existants.ajouter(pseudo)
+        return HTTPException(status_code=409, detail="Ce pseudo est déjà utilisé")
+    return HTTPException(status_code=400, detail=f"Données refusées par la base : {message}")
+
 # Utilisateur Routes
 @app.post('/utilisateurs/', response_model=UtilisateurModele)
 async def creer_utilisateur(utilisateur: UtilisateurBase, db: Session = Depends(get_db)):
     try:
+        # Pseudo déjà pris : refus immédiat, sans hacher le mot de passe
+        if pseudo_pris(db, utilisateur.pseudo):
+            raise HTTPException(status_code=409, detail="Ce pseudo est déjà utilisé")
+
         # Validate the password security requirements
         is_valid, error_message = validate_password(utilisateur.mot_de_passe)
         if not is_valid:
@@ -180,7 +287,7 @@ async def creer_utilisateur(utilisateur: UtilisateurBase, db: Session = Depends(
             )
             
         # Hash the password before storing
-        utilisateur.mot_de_passe = get_mdp_hashe(utilisateur.mot_de_passe)
+        utilisateur.mot_de_passe = await get_mdp_hashe(utilisateur.mot_de_passe)
         db_utilisateur = models.Utilisateur(
             pseudo=utilisateur.pseudo,
             mot_de_passe=utilisateur.mot_de_passe,
@@ -195,7 +302,11 @@ async def creer_utilisateur(utilisateur: UtilisateurBase, db: Session = Depends(
         db.add(db_utilisateur)
         db.commit()
         db.refresh(db_utilisateur)
+        pseudos_existants.ajouter(db_utilisateur.pseudo)
         return db_utilisateur
+    except IntegrityError as e:
+        db.rollback()
+        raise erreur_creation_utilisateur(e, utilisateur.pseudo)
     except SQLAlchemyError as e:
         db.rollback()
         # Handle specific database errors
@@ -207,14 +318,24 @@ async def creer_utilisateur(utilisateur: UtilisateurBase, db: Session = Depends(
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erreur interne: {str(e)}")
 
+@app.get('/pseudo_disponible/{pseudo}', response_model=bool)
+async def verifier_pseudo_disponible(pseudo: str):
+    # Pour les formulaires d'inscription : réponse en mémoire, sans requête. Elle est indicative
+    # (ensemble propre au worker) ; la création reste arbitrée par la contrainte de la base.
+    return pseudo not in pseudos_existants
+
 @app.get('/utilisateurs/', response_model=List[UtilisateurRenvoye])
-async def lire_utilisateurs(db: Session = Depends(get_db), skip: int = 0, limit: int = 100):
+async def lire_utilisateurs(response: Response, db: Session = Depends(get_db), skip: int = 0, limit: int = 100, curseur: Optional[str] = None):
     try:
-        utilisateurs = db.query(models.Utilisateur).offset(skip).limit(limit).all()
+        cle = [models.Utilisateur.pseudo]
+        utilisateurs = page(paginer(db.query(models.Utilisateur), cle, curseur, skip, limit).all(), cle, limit, response)
         if not utilisateurs:
             return Response(status_code=204)
         valUtilisateurs = [UtilisateurRenvoye(pseudo=user.pseudo, nom=user.nom, prenom=user.prenom, cptDefi=user.cptDefi) for user in utilisateurs]
         return valUtilisateurs
+    except HTTPException as e:
+        raise e
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching users: {str(e)}")
     
@@ -250,6 +371,8 @@ async def supprimer_utilisateur(pseudo: str, db: Session = Depends(get_db)):
     
     db.delete(db_utilisateur)
     db.commit()
+    principal_cache.invalider(pseudo)
+    pseudos_existants.retirer(pseudo)
     return {"message": f"Utilisateur '{pseudo}' supprimé avec succès."}
 
 @app.get('/utilisateurs/{pseudo}', response_model=UtilisateurModele)
@@ -287,6 +410,7 @@ async def mettre_a_jour_cpt_defi(
         # Mettre à jour le champ `cptDefi`
         utilisateur.cptDefi = update_request.cptDefi
         db.commit()
+        principal_cache.invalider(pseudo)
         db.refresh(utilisateur)  # Recharger les données mises à jour depuis la DB
         return utilisateur
     except Exception as e:
@@ -307,6 +431,7 @@ async def mettre_a_jour_pdp(
         # Mettre à jour le champ `cptDefi`
         utilisateur.pdpActuelle = update_request.pdpActuelle
         db.commit()
+        principal_cache.invalider(pseudo)
         db.refresh(utilisateur)  # Recharger les données mises à jour depuis la DB
         return utilisateur
     except Exception as e:
@@ -323,7 +448,7 @@ async def modifier_mdp(request: PasswordChangeRequest, db: Session = Depends(get
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     
     # Vérification de l'ancien mot de passe
-    if not (verifier_mdp(ancien_mdp,db_utilisateur.mot_de_passe)):
+    if not (await verifier_mdp(ancien_mdp,db_utilisateur.mot_de_passe)):
         raise HTTPException(status_code=401, detail="L'ancien mot de passe est incorrect")
 
     # Vérification du nouveau mot de passe
@@ -343,7 +468,7 @@ async def modifier_mdp(request: PasswordChangeRequest, db: Session = Depends(get
         )
     
     # S'assurer que le nouveau mot de passe est différent de l'ancien
-    if verifier_mdp(new_mdp, db_utilisateur.mot_de_passe):
+    if await verifier_mdp(new_mdp, db_utilisateur.mot_de_passe):
         raise HTTPException(
             status_code=400, 
             detail="Le nouveau mot de passe doit être différent de l'ancien."
@@ -351,8 +476,9 @@ async def modifier_mdp(request: PasswordChangeRequest, db: Session = Depends(get
     
     try:
         # Mise à jour du mot de passe
-        db_utilisateur.mot_de_passe = get_mdp_hashe(new_mdp)
+        db_utilisateur.mot_de_passe = await get_mdp_hashe(new_mdp)
         db.commit()
+        principal_cache.invalider(pseudo)
         return {"message": f"Mot de passe de '{pseudo}' modifié avec succès."}
     except SQLAlchemyError as e:
         db.rollback()
@@ -361,40 +487,53 @@ async def modifier_mdp(request: PasswordChangeRequest, db: Session = Depends(get
         db.rollback()
         raise HTTPException(status_code=500, detail="Erreur interne, veuillez réessayer plus tard.")
 
-# Admin logic
-def is_admin(
-        pseudo: str,
-        db: Session
-        ) -> bool:
-    
-    try:
-        user = get_utilisateur(db, pseudo)
-        
-        if not user:
-            return False
-        
-        if user.est_admin:
-            return True
-        else :
-            raise HTTPException(status_code=403, detail="Accès restreint : vous n'êtes pas administrateur")
-    
-    except Exception as e:
-        raise e
-    
+# Admin logic (lu dans les claims du jeton, sans requête)
+def is_admin(utilisateur: UtilisateurCourant) -> bool:
+    if utilisateur.est_admin:
+        return True
+    else :
+        raise HTTPException(status_code=403, detail="Accès restreint : vous n'êtes pas administrateur")
+
+def est_admin_classe(utilisateur: UtilisateurCourant, id_groupe: int, db: Session) -> bool:
+    # Jeton avec claims : décision en mémoire
+    if utilisateur.classes_admin is not None:
+        return id_groupe in utilisateur.classes_admin
+    # Ancien jeton sans claims : vérification en base
+    return db.query(models.UtilisateurGroupe).filter(
+        models.UtilisateurGroupe.id_groupe == id_groupe,
+        models.UtilisateurGroupe.pseudo_utilisateur == utilisateur.pseudo,
+        models.UtilisateurGroupe.est_admin == True
+    ).first() is not None
+
+def incrementer_version_permissions(db: Session, *pseudos: str):
+    # A appeler avant le commit de tout changement de rôle : les jetons émis avant deviennent périmés
+    if not pseudos:
+        return
+    db.query(models.Utilisateur).filter(models.Utilisateur.pseudo.in_(pseudos)).update(
+        {models.Utilisateur.version_permissions: models.Utilisateur.version_permissions + 1},
+        synchronize_session=False
+    )
+    for pseudo in pseudos:
+        principal_cache.invalider(pseudo)
+
 
-# Define password hash verification
-def verifier_mdp(plain_password, mot_de_passe):
-    return pwd_context.verify(plain_password, mot_de_passe)
+# Define password hash verification (bcrypt dans le pool de processus, hors de la boucle d'événements)
+async def verifier_mdp(plain_password, mot_de_passe):
+    return await password_pool.verifier(plain_password, mot_de_passe)
 
-def get_mdp_hashe(mot_de_passe):
-    return pwd_context.hash(mot_de_passe)
+async def get_mdp_hashe(mot_de_passe):
+    return await password_pool.hasher(mot_de_passe)
 
-def authenticate_user(db, pseudo: str, mot_de_passe: str):
-    utilisateur = get_utilisateur(db, pseudo)
+async def authenticate_user(db: AsyncSession, pseudo: str, mot_de_passe: str):
+    utilisateur = await get_utilisateur_async(db, pseudo)
     if not utilisateur:
         return False
-    if not verifier_mdp(mot_de_passe, utilisateur.mot_de_passe):
+    if not await verifier_mdp(mot_de_passe, utilisateur.mot_de_passe):
         return False
+    # Hash créé avec un autre coût bcrypt : on le recalcule au coût actuel, le mot de passe étant connu
+    if pwd_context.needs_update(utilisateur.mot_de_passe):
+        utilisateur.mot_de_passe = await get_mdp_hashe(mot_de_passe)
+        await db.commit()
     return utilisateur
 
 # Token creation logic
@@ -408,8 +547,17 @@ def creer_token_acces(data: dict, expires_delta: timedelta | None = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+async def lire_classes_admin(db: AsyncSession, pseudo: str) -> tuple:
+    result = await db.execute(
+        select(models.UtilisateurGroupe.id_groupe).where(
+            models.UtilisateurGroupe.pseudo_utilisateur == pseudo,
+            models.UtilisateurGroupe.est_admin == True
+        )
+    )
+    return tuple(sorted(result.scalars().all()))
+
 # JWT decode & user authentication
-async def get_utilisateur_courant(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)):
+async def get_utilisateur_courant(token: Annotated[str, Depends(oauth2_scheme)], db: AsyncSession = Depends(get_async_db)):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         pseudo: str = payload.get("sub")
@@ -418,72 +566,63 @@ async def get_utilisateur_courant(token: Annotated[str, Depends(oauth2_scheme)],
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials"
             )
-        utilisateur = db.query(models.Utilisateur).filter(models.Utilisateur.pseudo == pseudo).first()
-        if not utilisateur:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="L'utilisateur n'éxiste pas"
+        version_jeton = payload.get("pv")
+        utilisateur = principal_cache.get(pseudo)
+        # Jeton plus récent que l'entrée du cache (rôle modifié par un autre worker) : on relit la base
+        if not utilisateur or (version_jeton is not None and version_jeton > utilisateur.version_permissions):
+            db_utilisateur = await get_utilisateur_async(db, pseudo)
+            if not db_utilisateur:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="L'utilisateur n'éxiste pas"
+                )
+            utilisateur = UtilisateurCourant(
+                pseudo=db_utilisateur.pseudo,
+                nom=db_utilisateur.nom,
+                prenom=db_utilisateur.prenom,
+                courriel=db_utilisateur.courriel,
+                est_admin=db_utilisateur.est_admin,
+                version_permissions=db_utilisateur.version_permissions,
             )
-        return utilisateur
+            principal_cache.set(pseudo, utilisateur)
+        # Ancien jeton sans claims : les rôles de classe seront vérifiés en base
+        if version_jeton is None:
+            return utilisateur.model_copy(update={"classes_admin": None})
+        if version_jeton != utilisateur.version_permissions:
+            # Rôles modifiés depuis l'émission du jeton : on reprend ceux de la base (gardés en cache)
+            if utilisateur.classes_admin is None:
+                utilisateur = utilisateur.model_copy(update={"classes_admin": await lire_classes_admin(db, pseudo)})
+                principal_cache.set(pseudo, utilisateur)
+            # Seul le retrait d'un droit porté par le jeton oblige à se reconnecter (une promotion s'applique tout de suite)
+            if (payload.get("adm") and not utilisateur.est_admin) or not set(payload.get("cls", ())) <= set(utilisateur.classes_admin):
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Vos droits ont changé, veuillez vous reconnecter",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            return utilisateur
+        return utilisateur.model_copy(update={
+            "est_admin": bool(payload.get("adm")),
+            "classes_admin": tuple(payload.get("cls", ())),
+        })
     except jwt.PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
         )
 
-# Utilisateur Routes
-@app.post('/utilisateurs/', response_model=UtilisateurModele)
-async def creer_utilisateur(utilisateur: UtilisateurBase, db: Session = Depends(get_db)):
-    try:
-        # Validate the password security requirements
-        is_valid, error_message = validate_password(utilisateur.mot_de_passe)
-        if not is_valid:
-            raise HTTPException(status_code=400, detail=error_message)
-            
-        # Check if password is in list of common/leaked passwords
-        if is_common_password(utilisateur.mot_de_passe):
-            raise HTTPException(
-                status_code=400, 
-                detail="Ce mot de passe est trop commun et facilement piratable. Veuillez choisir un mot de passe plus sécurisé."
-            )
-            
-        # Hash the password before storing
-        utilisateur.mot_de_passe = get_mdp_hashe(utilisateur.mot_de_passe)
-        db_utilisateur = models.Utilisateur(
-            pseudo=utilisateur.pseudo,
-            mot_de_passe=utilisateur.mot_de_passe,
-            nom=utilisateur.nom,
-            prenom=utilisateur.prenom,
-            courriel=utilisateur.courriel,
-            est_admin=utilisateur.est_admin,
-            numCours=utilisateur.numCours,
-            tempsTotal=utilisateur.tempsTotal,
-            cptDefi=0  # Valeur par défaut pour cptDefi
-            )
-        db.add(db_utilisateur)
-        db.commit()
-        db.refresh(db_utilisateur)
-        return db_utilisateur
-    except SQLAlchemyError as e:
-        db.rollback()
-        # Handle specific database errors
-        raise HTTPException(status_code=500, detail=f"Erreur de base de données: {str(e)}")
-    except HTTPException as e:
-        # Re-raise HTTP exceptions without modification
-        raise e
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Erreur interne: {str(e)}")
-
 @app.get('/utilisateurs/', response_model=List[UtilisateurRenvoye])
 async def lire_utilisateurs(
-    current_user: Annotated[models.Utilisateur, Depends(get_utilisateur_courant)],
+    current_user: Annotated[UtilisateurCourant, Depends(get_utilisateur_courant)],
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
-    limit: int = 100):
+    limit: int = 100,
+    curseur: Optional[str] = None):
     try:
-        if is_admin(current_user.pseudo, db):
-            utilisateurs = db.query(models.Utilisateur).offset(skip).limit(limit).all()
+        if is_admin(current_user):
+            cle = [models.Utilisateur.pseudo]
+            utilisateurs = page(paginer(db.query(models.Utilisateur), cle, curseur, skip, limit).all(), cle, limit, response)
             if not utilisateurs:
                 return Response(status_code=204)
             valUtilisateurs = [UtilisateurRenvoye(pseudo=user.pseudo, nom=user.nom, prenom=user.prenom, cptDefi=user.cptDefi) for user in utilisateurs]
@@ -498,16 +637,18 @@ async def lire_utilisateurs(
 @app.delete('/utilisateurs/{pseudo}', response_model=dict)
 async def supprimer_utilisateur(
     pseudo: str,
-    current_user: Annotated[models.Utilisateur, Depends(get_utilisateur_courant)],
+    current_user: Annotated[UtilisateurCourant, Depends(get_utilisateur_courant)],
     db: Session = Depends(get_db),
     ):
-    if is_admin(current_user.pseudo, db):
+    if is_admin(current_user):
         db_utilisateur = get_utilisateur(db, pseudo)
         if not db_utilisateur:
             raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
         
         db.delete(db_utilisateur)
         db.commit()
+        principal_cache.invalider(pseudo)
+        pseudos_existants.retirer(pseudo)
         return {"message": f"Utilisateur '{pseudo}' supprimé avec succès."}
         
 @app.get('/utilisateur/{pseudo}', response_model=UtilisateurRenvoye)
@@ -530,11 +671,11 @@ async def  lire_utilisateur(
 @app.get('/utilisateur_full/{pseudo}', response_model=UtilisateurModele)
 async def lire_utilisateur_full(
     pseudo: str,
-    current_user: Annotated[models.Utilisateur, Depends(get_utilisateur_courant)],
+    current_user: Annotated[UtilisateurCourant, Depends(get_utilisateur_courant)],
     db: Session = Depends(get_db),
     ):
     try :
-        if is_admin(current_user.pseudo, db):
+        if is_admin(current_user):
             try:
                 utilisateur = db.query(models.Utilisateur).filter(models.Utilisateur.pseudo == pseudo).first()
                 if not utilisateur:
@@ -562,6 +703,7 @@ async def mettre_a_jour_cpt_defi(
         # Mettre à jour le champ `cptDefi`
         utilisateur.cptDefi = update_request.cptDefi
         db.commit()
+        principal_cache.invalider(pseudo)
         db.refresh(utilisateur)  # Recharger les données mises à jour depuis la DB
         return utilisateur
     except Exception as e:
@@ -579,7 +721,7 @@ async def modifier_mdp(request: PasswordChangeRequest, db: Session = Depends(get
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     
     # Vérification de l'ancien mot de passe
-    if not (verifier_mdp(ancien_mdp,db_utilisateur.mot_de_passe)):
+    if not (await verifier_mdp(ancien_mdp,db_utilisateur.mot_de_passe)):
         raise HTTPException(status_code=401, detail="L'ancien mot de passe est incorrect")
 
     # Vérification du nouveau mot de passe
@@ -599,7 +741,7 @@ async def modifier_mdp(request: PasswordChangeRequest, db: Session = Depends(get
         )
     
     # S'assurer que le nouveau mot de passe est différent de l'ancien
-    if verifier_mdp(new_mdp, db_utilisateur.mot_de_passe):
+    if await verifier_mdp(new_mdp, db_utilisateur.mot_de_passe):
         raise HTTPException(
             status_code=400, 
             detail="Le nouveau mot de passe doit être différent de l'ancien."
@@ -607,8 +749,9 @@ async def modifier_mdp(request: PasswordChangeRequest, db: Session = Depends(get
     
     try:
         # Mise à jour du mot de passe
-        db_utilisateur.mot_de_passe = get_mdp_hashe(new_mdp)
+        db_utilisateur.mot_de_passe = await get_mdp_hashe(new_mdp)
         db.commit()
+        principal_cache.invalider(pseudo)
         return {"message": f"Mot de passe de '{pseudo}' modifié avec succès."}
     except SQLAlchemyError as e:
         db.rollback()
@@ -617,29 +760,92 @@ async def modifier_mdp(request: PasswordChangeRequest, db: Session = Depends(get
         db.rollback()
         raise HTTPException(status_code=500, detail="Erreur interne, veuillez réessayer plus tard.")
 
+# Diagnostic : profil SQLite configuré et valeurs effectives sur la connexion
+@app.get('/admin/sqlite', response_model=dict)
+async def lire_profil_sqlite(
+    current_user: Annotated[UtilisateurCourant, Depends(get_utilisateur_courant)],
+    db: Session = Depends(get_db),
+):
+    if is_admin(current_user):
+        return {"configuration": SQLITE_PRAGMAS, "effectif": read_sqlite_pragmas(db)}
+
+# Diagnostic : nombre de requêtes SQL et temps base de données agrégés par route
+@app.get('/admin/sql_stats', response_model=dict)
+async def lire_stats_sql(
+    current_user: Annotated[UtilisateurCourant, Depends(get_utilisateur_courant)],
+    db: Session = Depends(get_db),
+):
+    if is_admin(current_user):
+        return lire_stats_routes()
+
+# Diagnostic : pool de hachage des mots de passe (file d'attente, temps d'attente)
+@app.get('/admin/hachage', response_model=dict)
+async def lire_stats_hachage(
+    current_user: Annotated[UtilisateurCourant, Depends(get_utilisateur_courant)],
+    db: Session = Depends(get_db),
+):
+    if is_admin(current_user):
+        return password_pool.stats()
+
+# Diagnostic : cache des utilisateurs authentifiés
+@app.get('/admin/cache_utilisateurs', response_model=dict)
+async def lire_stats_cache_utilisateurs(
+    current_user: Annotated[UtilisateurCourant, Depends(get_utilisateur_courant)],
+    db: Session = Depends(get_db),
+):
+    if is_admin(current_user):
+        return principal_cache.stats()
+
+# Diagnostic : limitation des tentatives de connexion
+@app.get('/admin/connexions', response_model=dict)
+async def lire_stats_connexions(
+    current_user: Annotated[UtilisateurCourant, Depends(get_utilisateur_courant)],
+):
+    if is_admin(current_user):
+        return login_admission.stats()
+
+@app.get('/admin/taches', response_model=List[dict])
+def lire_historique_taches(
+    current_user: Annotated[UtilisateurCourant, Depends(get_utilisateur_courant)],
+    limit: int = 50
+):
+    if is_admin(current_user):
+        return cluster_jobs.historique(limit)
+
 #/default/lire_utilisateurs_utilisateurs__get
 # Token endpoint
 @app.post("/token")
 async def login_pour_token_acces(
+    request: Request,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    db=Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Token:
-    utilisateur = authenticate_user(db, form_data.username, form_data.password)
+    # Limitation par pseudo, par IP et du nombre de vérifications simultanées, avant tout calcul bcrypt
+    with login_admission.admettre(form_data.username, request.client.host if request.client else None):
+        utilisateur = await authenticate_user(db, form_data.username, form_data.password)
     if not utilisateur:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Mot de passe ou pseudo incorrecte",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    # Rôles embarqués dans le jeton : les contrôles d'autorisation n'interrogent plus la base
+    classes_admin = await lire_classes_admin(db, utilisateur.pseudo)
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = creer_token_acces(
-        data={"sub": utilisateur.pseudo}, expires_delta=access_token_expires
+        data={
+            "sub": utilisateur.pseudo,
+            "adm": bool(utilisateur.est_admin),
+            "cls": list(classes_admin),
+            "pv": utilisateur.version_permissions or 0,
+        },
+        expires_delta=access_token_expires
     )
     return Token(access_token=access_token, token_type="bearer")
 
 @app.get('/utilisateur/moi')
 async def lire_utilisateur_courant(
-    current_user: Annotated[models.Utilisateur, Depends(get_utilisateur_courant)]
+    current_user: Annotated[UtilisateurCourant, Depends(get_utilisateur_courant)]
 ):
     nom = current_user.nom
     prenom = current_user.prenom
@@ -660,9 +866,9 @@ async def ajouter_defi(defi: DefiBase, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'ajout du défi : {str(e)}")
 
 @app.get('/defis/', response_model=List[DefiModele])
-async def lire_defis(db: Session = Depends(get_db), skip: int = 0, limit: int = 1000):
-    defis = db.query(models.Defi).offset(skip).limit(limit).all()
-    return defis
+async def lire_defis(response: Response, db: Session = Depends(get_db), skip: int = 0, limit: int = 1000, curseur: Optional[str] = None):
+    cle = [models.Defi.id_defi]
+    return page(paginer(db.query(models.Defi), cle, curseur, skip, limit).all(), cle, limit, response)
 
 @app.get('/defis/{id_defi}', response_model=DefiModele)
 async def lire_infos_defi(id_defi: int, db: Session = Depends(get_db)):
@@ -694,15 +900,12 @@ async def supprimer_defi(id_defi: int, db: Session = Depends(get_db)):
 async def ajout_reussite_defi(
     id_defi: int,  # ID du défi (passé en paramètre de la requête)
     temps_reussite: float,  # Temps de réussite du défi
-    current_user: Annotated[models.Utilisateur, Depends(get_utilisateur_courant)],
-    db: Session = Depends(get_db)  # Dépendance pour obtenir la session de base de données
+    current_user: Annotated[UtilisateurCourant, Depends(get_utilisateur_courant)],
+    db: AsyncSession = Depends(get_async_db)  # Dépendance pour obtenir la session de base de données
 ):
     try:
-        # Vérifier si l'utilisateur existe dans la base de données
-        db_utilisateur = get_utilisateur(db, current_user.pseudo)
-
         # Vérifier si le défi existe dans la base de données
-        db_defi = db.query(models.Defi).filter(models.Defi.id_defi == id_defi).first()
+        db_defi = await db.get(models.Defi, id_defi)
         if not db_defi:
             raise HTTPException(status_code=404, detail="Défi non trouvé")
     
@@ -712,43 +915,39 @@ async def ajout_reussite_defi(
             temps_reussite=temps_reussite,
             date_reussite=datetime.now()  # Définir la date de réussite à l'heure actuelle
         )
-        db.add(db_utilisateur_defi)  # Ajouter la nouvelle réussite dans la base de données
-        db.commit()  # Commit les changements
-        db.refresh(db_utilisateur_defi)  # Rafraîchir l'instance pour obtenir les données mises à jour
-        return db_utilisateur_defi  # Retourner la nouvelle réussite ajoutée
+        # Ajouter la nouvelle réussite via la file d'écriture (commit groupé),
+        # le meilleur temps et le résumé du profil étant mis à jour dans la même transaction
+        reussite = await write_queue.ajouter(db_utilisateur_defi, apres=maj_apres_reussite)
+        publier_changement_classement(id_defi, classements.proposer(id_defi, current_user.pseudo, temps_reussite))
+        await invalider_classements_groupes_de(db, current_user.pseudo, id_defi)
+        return reussite
+
+    except HTTPException as e:
+        raise e
     
     except Exception as e:
         # Si une erreur se produit, annuler la transaction et retourner un message d'erreur
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'ajout de la réussite du défi : {str(e)}")
 
 #Récupérer toutes les réussites de défi
 @app.get('/reussites_defi', response_model=List[UtilisateurDefiModele])
 async def lire_reussite_defi(
-    db: Session = Depends(get_db),  # Dépendance pour obtenir la session de base de données
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),  # Dépendance pour obtenir la session de base de données
     skip: int = 0,  # Paramètre optionnel pour le décalage (pagination)
-    limit: int = 100  # Paramètre optionnel pour la limite du nombre de résultats
+    limit: int = 100,  # Paramètre optionnel pour la limite du nombre de résultats
+    curseur: Optional[str] = None  # Curseur de la page suivante (en-tête X-Next-Cursor)
 ):
     try:
-        # Récupérer toutes les réussites de défi pour tous les utilisateurs
-        reussites_defi = db.query(models.UtilisateurDefi).offset(skip).limit(limit).all()
-        # Subquery to get the minimum time for each user and challenge
-        subquery = db.query(
-            models.UtilisateurDefi.pseudo_utilisateur,
-            models.UtilisateurDefi.id_defi,
-            func.min(models.UtilisateurDefi.temps_reussite).label('min_temps_reussite')
-        ).group_by(
-            models.UtilisateurDefi.pseudo_utilisateur,
-            models.UtilisateurDefi.id_defi
-        ).subquery()
-
-        # Join the subquery with the main table to get the full records
-        reussites_defi = db.query(models.UtilisateurDefi).join(
-            subquery,
-            (models.UtilisateurDefi.pseudo_utilisateur == subquery.c.pseudo_utilisateur) &
-            (models.UtilisateurDefi.id_defi == subquery.c.id_defi) &
-            (models.UtilisateurDefi.temps_reussite == subquery.c.min_temps_reussite)
-        ).offset(skip).limit(limit).all()
+        # Meilleur temps de chaque utilisateur pour chaque défi (table tenue à jour)
+        cle = [
+            models.MeilleurTempsDefi.id_defi,
+            models.MeilleurTempsDefi.temps_reussite,
+            models.MeilleurTempsDefi.pseudo_utilisateur
+        ]
+        result = await db.execute(paginer(select(models.MeilleurTempsDefi), cle, curseur, skip, limit))
+        reussites_defi = page(result.scalars().all(), cle, limit, response)
 
         # Si aucune réussite de défi n'est trouvée
         if not reussites_defi:
@@ -756,6 +955,9 @@ async def lire_reussite_defi(
         
         return reussites_defi  # Retourner la liste complète des réussites de défi
     
+    except HTTPException as e:
+        raise e
+
     except Exception as e:
         # Gestion des erreurs (rollback en cas d'exception)
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération des réussites de défi : {str(e)}")
@@ -764,19 +966,20 @@ async def lire_reussite_defi(
 @app.get('/reussites_defi/utilisateurs/{pseudo_utilisateur}', response_model=List[UtilisateurDefiModele])
 async def lire_reussite_defi_utilisateur(
     pseudo_utilisateur: str,  # Pseudo de l'utilisateur passé en paramètre de l'URL
-
+    response: Response,
 
     id_defi: int = None,  # Paramètre optionnel pour filtrer par défi spécifique
 
     # mettre au dessus la valeur de l'id actuel
 
-    db: Session = Depends(get_db),  # Dépendance pour obtenir la session de base de données
+    db: AsyncSession = Depends(get_async_db),  # Dépendance pour obtenir la session de base de données
     skip: int = 0,  # Paramètre optionnel pour le décalage (pagination)
-    limit: int = 100  # Paramètre optionnel pour la limite du nombre de résultats
+    limit: int = 100,  # Paramètre optionnel pour la limite du nombre de résultats
+    curseur: Optional[str] = None  # Curseur de la page suivante (en-tête X-Next-Cursor)
 ):
     try:
         # Commencer la requête de base
-        query = db.query(models.UtilisateurDefi).filter(
+        query = select(models.UtilisateurDefi).filter(
             models.UtilisateurDefi.pseudo_utilisateur == pseudo_utilisateur
         )
 
@@ -784,8 +987,10 @@ async def lire_reussite_defi_utilisateur(
         if id_defi is not None:
             query = query.filter(models.UtilisateurDefi.id_defi == id_defi)
 
-        # Appliquer la pagination et récupérer les résultats
-        reussites_defi = query.offset(skip).limit(limit).all()
+        # Appliquer la pagination (clé primaire de l'utilisateur) et récupérer les résultats
+        cle = [models.UtilisateurDefi.id_defi, models.UtilisateurDefi.date_reussite]
+        result = await db.execute(paginer(query, cle, curseur, skip, limit))
+        reussites_defi = page(result.scalars().all(), cle, limit, response)
 
         # Si aucune réussite n'est trouvée
         if not reussites_defi:
@@ -797,39 +1002,49 @@ async def lire_reussite_defi_utilisateur(
         
         return reussites_defi
 
+    except HTTPException as e:
+        raise e
+
     except Exception as e:
         # Gestion des erreurs (rollback en cas d'exception)
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération des réussites de défi : {str(e)}")
     
+# Résumé des réussites d'un utilisateur par défi (meilleur temps, moyenne, nombre, dernière tentative, centile)
+@app.get('/reussites_defi/utilisateurs/{pseudo_utilisateur}/resume', response_model=List[ResumeDefiModele])
+async def lire_resume_defis_utilisateur(
+    pseudo_utilisateur: str,
+    id_defi: Optional[int] = None,  # Paramètre optionnel pour filtrer par défi spécifique
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Une ligne par défi joué, lue sur la clé primaire (pseudo_utilisateur, id_defi)
+    query = select(models.ResumeDefiUtilisateur).filter(
+        models.ResumeDefiUtilisateur.pseudo_utilisateur == pseudo_utilisateur
+    )
+    if id_defi is not None:
+        query = query.filter(models.ResumeDefiUtilisateur.id_defi == id_defi)
+    result = await db.execute(query.order_by(models.ResumeDefiUtilisateur.id_defi))
+    return result.scalars().all()
+
 # Récupérer les résuiste défi par défi
 @app.get('/reussites_defi/defi/{id_defi}', response_model=List[UtilisateurDefiModele])
 async def lire_reussite_defi_utilisateur_id_defi(
     id_defi: int,  # id du défi passé en paramètre de l'URL
-    db: Session = Depends(get_db),  # Dépendance pour obtenir la session de base de données
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),  # Dépendance pour obtenir la session de base de données
     skip: int = 0,  # Paramètre optionnel pour le décalage (pagination)
-    limit: int = 100  # Paramètre optionnel pour la limite du nombre de résultats
+    limit: int = 100,  # Paramètre optionnel pour la limite du nombre de résultats
+    curseur: Optional[str] = None  # Curseur de la page suivante (en-tête X-Next-Cursor)
 ):
     try:
-        # Sous-requête pour obtenir le meilleur temps de chaque utilisateur pour ce défi
-        subquery = db.query(
-            models.UtilisateurDefi.pseudo_utilisateur,
-            func.min(models.UtilisateurDefi.temps_reussite).label('min_temps_reussite')
-        ).filter(
-            models.UtilisateurDefi.id_defi == id_defi
-        ).group_by(
-            models.UtilisateurDefi.pseudo_utilisateur
-        ).subquery()
-
-        # Requête principale qui joint avec la sous-requête pour obtenir les enregistrements complets
-        reussites_defi = db.query(models.UtilisateurDefi).join(
-            subquery,
-            (models.UtilisateurDefi.pseudo_utilisateur == subquery.c.pseudo_utilisateur) &
-            (models.UtilisateurDefi.temps_reussite == subquery.c.min_temps_reussite)
-        ).filter(
-            models.UtilisateurDefi.id_defi == id_defi
-        ).order_by(
-            models.UtilisateurDefi.temps_reussite  # Tri par temps croissant
-        ).offset(skip).limit(limit).all()
+        # Meilleur temps de chaque utilisateur pour ce défi : parcours de l'index (id_defi, temps)
+        cle = [
+            models.MeilleurTempsDefi.temps_reussite,  # Tri par temps croissant
+            models.MeilleurTempsDefi.pseudo_utilisateur
+        ]
+        result = await db.execute(paginer(select(models.MeilleurTempsDefi).filter(
+            models.MeilleurTempsDefi.id_defi == id_defi
+        ), cle, curseur, skip, limit))
+        reussites_defi = page(result.scalars().all(), cle, limit, response)
 
         # Si aucune réussite n'est trouvée pour cet utilisateur
         if not reussites_defi:
@@ -837,6 +1052,9 @@ async def lire_reussite_defi_utilisateur_id_defi(
         
         return reussites_defi  # Retourner la liste des réussites de défi
     
+    except HTTPException as e:
+        raise e
+
     except Exception as e:
         # Gestion des erreurs (rollback en cas d'exception)
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération des réussites de défi : {str(e)}")
@@ -846,31 +1064,157 @@ async def lire_reussite_defi_utilisateur_id_defi(
 async def supprimer_reussite_defi(
     pseudo_utilisateur: str,  # Pseudo de l'utilisateur dont la réussite sera supprimée
     id_defi: int,  # ID du défi de la réussite à supprimer
-    db: Session = Depends(get_db)  # Dépendance pour obtenir la session de base de données
+    db: AsyncSession = Depends(get_async_db)  # Dépendance pour obtenir la session de base de données
 ):
     try:
         # Récupérer la réussite de défi spécifique en fonction du pseudo de l'utilisateur et de l'ID du défi
-        reussite_defi = db.query(models.UtilisateurDefi).filter(
+        result = await db.execute(select(models.UtilisateurDefi).filter(
             models.UtilisateurDefi.pseudo_utilisateur == pseudo_utilisateur,
             models.UtilisateurDefi.id_defi == id_defi
-        ).first()
+        ))
+        reussite_defi = result.scalars().first()
 
         # Si la réussite n'est pas trouvée, renvoyer une erreur 404
         if not reussite_defi:
             raise HTTPException(status_code=404, detail="Réussite de défi non trouvée.")
         
-        # Supprimer l'élément trouvé
-        db.delete(reussite_defi)
-        db.commit()
+        # Supprimer l'élément trouvé, puis recalculer le meilleur temps restant de l'utilisateur
+        await db.delete(reussite_defi)
+        await db.flush()
+        meilleur_temps = await db.run_sync(recalculer_meilleur_temps, id_defi, pseudo_utilisateur)
+        await db.run_sync(recalculer_resume_defi, id_defi, pseudo_utilisateur)
+        await db.commit()
+        publier_changement_classement(id_defi, classements.remplacer(id_defi, pseudo_utilisateur, meilleur_temps))
+        await invalider_classements_groupes_de(db, pseudo_utilisateur, id_defi)
         
         # Retourner un message de succès
         return {"message": f"La réussite du défi avec l'ID {id_defi} pour l'utilisateur '{pseudo_utilisateur}' a été supprimée avec succès."}
     
     except Exception as e:
         # Gestion des erreurs (rollback en cas d'exception)
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Erreur lors de la suppression de la réussite du défi : {str(e)}")
 
+# Classement en mémoire d'un défi (rang, top, voisins) : aucune requête SQL une fois le défi chargé
+async def obtenir_classement(id_defi: int, db: AsyncSession):
+    classement = classements.get(id_defi)
+    if classement is None:
+        # Défi inconnu : 404, sans installer (ni garder en cache) un classement vide
+        if await db.get(models.Defi, id_defi) is None:
+            raise HTTPException(status_code=404, detail="Défi non trouvé")
+        # Premier accès à ce défi dans ce worker : chargement depuis MEILLEUR_TEMPS_DEFI
+        classement = classements.installer(id_defi, await db.run_sync(lire_meilleurs_temps, id_defi))
+        # Abonnés restés connectés pendant que le défi n'était plus en mémoire : on les remet à jour
+        publier_instantane_classement(id_defi)
+    return classement
+
+async def invalider_classements_groupes_de(db: AsyncSession, pseudo_utilisateur: str, id_defi: int):
+    # Classes de l'utilisateur : préfixe de la clé primaire de UTILISATEUR_GROUPE
+    result = await db.execute(select(models.UtilisateurGroupe.id_groupe).filter(
+        models.UtilisateurGroupe.pseudo_utilisateur == pseudo_utilisateur
+    ))
+    for id_groupe in result.scalars():
+        classements_groupe.invalider((id_groupe, id_defi))
+
+def invalider_classements_groupe(id_groupe: int):
+    classements_groupe.invalider_si(lambda cle: cle[0] == id_groupe)
+
+@app.get('/classement/{id_defi}/top', response_model=List[PositionClassement])
+async def lire_top_classement(
+    id_defi: int,
+    k: int = Query(10, ge=1, le=1000),  # Nombre de premiers à renvoyer
+    db: AsyncSession = Depends(get_async_db)
+):
+    classement = await obtenir_classement(id_defi, db)
+    return classement.top(k)
+
+@app.get('/classement/{id_defi}/rang/{pseudo_utilisateur}', response_model=RangClassement)
+async def lire_rang_classement(
+    id_defi: int,
+    pseudo_utilisateur: str,
+    db: AsyncSession = Depends(get_async_db)
+):
+    classement = await obtenir_classement(id_defi, db)
+    position = classement.rang(pseudo_utilisateur)
+    if position is None:
+        raise HTTPException(status_code=404, detail="Aucune réussite de ce défi pour cet utilisateur")
+    return RangClassement(**position, total=len(classement))
+
+@app.get('/classement/{id_defi}/voisins/{pseudo_utilisateur}', response_model=VoisinsClassement)
+async def lire_voisins_classement(
+    id_defi: int,
+    pseudo_utilisateur: str,
+    n: int = Query(3, ge=0, le=100),  # Nombre d'utilisateurs au-dessus et en dessous
+    db: AsyncSession = Depends(get_async_db)
+):
+    classement = await obtenir_classement(id_defi, db)
+    voisins = classement.voisins(pseudo_utilisateur, n)
+    if voisins is None:
+        raise HTTPException(status_code=404, detail="Aucune réussite de ce défi pour cet utilisateur")
+    au_dessus, utilisateur, en_dessous = voisins
+    return VoisinsClassement(au_dessus=au_dessus, utilisateur=utilisateur, en_dessous=en_dessous, total=len(classement))
+
+# Classement en direct (Server-Sent Events) : instantané du top, puis mouvements de rang à chaque réussite
+@app.get('/classement/{id_defi}/direct')
+async def suivre_classement(id_defi: int, db: AsyncSession = Depends(get_async_db)):
+    classement = await obtenir_classement(id_defi, db)
+
+    def instantane():
+        actuel = classements.get(id_defi) or classement
+        return diffuseur.instantane(id_defi, actuel.version, "classement", lambda: instantane_classement(actuel))
+
+    return StreamingResponse(
+        diffuseur.flux(id_defi, instantane),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Historique : classements figés au changement de semaine, servis sans agrégation
+@app.get('/classement/{id_defi}/archive', response_model=List[ClassementArchiveModele])
+async def lire_classement_archive(
+    id_defi: int,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    curseur: Optional[str] = None  # Curseur de la page suivante (en-tête X-Next-Cursor)
+):
+    cle = [models.ClassementArchive.rang]
+    result = await db.execute(paginer(
+        select(models.ClassementArchive).where(models.ClassementArchive.id_defi == id_defi),
+        cle, curseur, skip, limit
+    ))
+    positions = page(result.scalars().all(), cle, limit, response)
+    if not positions:
+        # Page vide (fin de liste) : 204 comme les autres listes ; 404 seulement si le défi n'a pas d'archive
+        archive = await db.execute(select(models.ClassementArchive.rang).filter(
+            models.ClassementArchive.id_defi == id_defi
+        ).limit(1))
+        if archive.first() is None:
+            raise HTTPException(status_code=404, detail="Aucun classement archivé pour ce défi")
+        return Response(status_code=204)
+    return positions
+
+# Places d'un utilisateur dans les classements des semaines passées
+@app.get('/classement/archives/utilisateurs/{pseudo_utilisateur}', response_model=List[ClassementArchiveModele])
+async def lire_archives_utilisateur(
+    pseudo_utilisateur: str,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    curseur: Optional[str] = None  # Curseur de la page suivante (en-tête X-Next-Cursor)
+):
+    cle = [models.ClassementArchive.id_defi]
+    result = await db.execute(paginer(
+        select(models.ClassementArchive).where(models.ClassementArchive.pseudo_utilisateur == pseudo_utilisateur),
+        cle, curseur, skip, limit
+    ))
+    positions = page(result.scalars().all(), cle, limit, response)
+    if not positions:
+        return Response(status_code=204)
+    return positions
+
 #Cours
 @app.post('/cours/', response_model=CoursModele)
 async def ajouter_cour(cour: CoursBase, db: Session = Depends(get_db)):
@@ -885,9 +1229,9 @@ async def ajouter_cour(cour: CoursBase, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'ajout du cours : {str(e)}")
 
 @app.get('/cours/', response_model=List[CoursModele])
-async def lire_cours(db: Session = Depends(get_db), skip: int = 0, limit: int = 100):
-    cours = db.query(models.Cours).offset(skip).limit(limit).all()
-    return cours
+async def lire_cours(response: Response, db: Session = Depends(get_db), skip: int = 0, limit: int = 100, curseur: Optional[str] = None):
+    cle = [models.Cours.id_cours]
+    return page(paginer(db.query(models.Cours), cle, curseur, skip, limit).all(), cle, limit, response)
 
 @app.get('/cours/{id_cour}', response_model=CoursModele)
 async def lire_infos_cour(id_cour: int, db: Session = Depends(get_db)):
@@ -1071,6 +1415,7 @@ async def ajouter_groupe(
         )
         
         db.add(db_utilisateur_groupe)
+        incrementer_version_permissions(db, pseudo_admin)
         db.commit()
         db.refresh(db_utilisateur_groupe)
 
@@ -1084,9 +1429,9 @@ async def ajouter_groupe(
 
 
 @app.get('/groupe/', response_model=List[GroupeModele])
-async def lire_groupe(db: Session = Depends(get_db), skip: int = 0, limit: int = 100):
-    groupe = db.query(models.Groupe).offset(skip).limit(limit).all()
-    return groupe
+async def lire_groupe(response: Response, db: Session = Depends(get_db), skip: int = 0, limit: int = 100, curseur: Optional[str] = None):
+    cle = [models.Groupe.id_groupe]
+    return page(paginer(db.query(models.Groupe), cle, curseur, skip, limit).all(), cle, limit, response)
 
 @app.get('/groupe/{id_groupe}', response_model=GroupeModele)
 async def lire_infos_groupe(id_groupe: int, db: Session = Depends(get_db)):
@@ -1108,32 +1453,68 @@ async def supprimer_groupe(id_groupe: int, db: Session = Depends(get_db)):
     # Récupérer nom du groupe pour le message de succès
     nom_groupe = db_groupe.nom_groupe
     
+    # Les admins de la classe perdent ce rôle : leurs jetons deviennent périmés
+    admins = [lien.pseudo_utilisateur for lien in db_groupe.utilisateurs if lien.est_admin]
+    incrementer_version_permissions(db, *admins)
+
     # Supprimer le groupe
     db.delete(db_groupe)
     db.commit()
+    invalider_classements_groupe(id_groupe)
     
     # Message de réussite
     return {"message": f"groupe '{nom_groupe}' supprimé avec succès."}
 
 
 
+# Classement d'un défi restreint aux élèves d'une classe (mis en cache par classe et par défi)
+@app.get('/groupe/{id_groupe}/classement/{id_defi}', response_model=List[PositionClassement])
+async def lire_classement_groupe(
+    id_groupe: int,
+    id_defi: int,
+    current_user: Annotated[UtilisateurCourant, Depends(get_utilisateur_courant)],
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Réservé aux membres de la classe (admins de la classe : décision sur les claims du jeton)
+    if current_user.classes_admin is None or id_groupe not in current_user.classes_admin:
+        membre = await db.get(models.UtilisateurGroupe, (current_user.pseudo, id_groupe))
+        if membre is None:
+            raise HTTPException(status_code=403, detail="Accès restreint : vous ne faites pas partie de cette classe")
+
+    classement = classements_groupe.get((id_groupe, id_defi))
+    if classement is None:
+        # Meilleurs temps des élèves de la classe, en une requête (index des membres et clé du classement)
+        result = await db.execute(select(
+            models.MeilleurTempsDefi.pseudo_utilisateur, models.MeilleurTempsDefi.temps_reussite
+        ).join(
+            models.UtilisateurGroupe,
+            models.UtilisateurGroupe.pseudo_utilisateur == models.MeilleurTempsDefi.pseudo_utilisateur
+        ).filter(
+            models.UtilisateurGroupe.id_groupe == id_groupe,
+            models.UtilisateurGroupe.est_admin == False,
+            models.MeilleurTempsDefi.id_defi == id_defi
+        ).order_by(models.MeilleurTempsDefi.temps_reussite, models.MeilleurTempsDefi.pseudo_utilisateur))
+        classement = [
+            {"rang": rang, "pseudo_utilisateur": pseudo, "temps_reussite": temps}
+            for rang, (pseudo, temps) in enumerate(result.all(), start=1)
+        ]
+        classements_groupe.set((id_groupe, id_defi), classement)
+    return classement
+
+
 #Groupe d'utilisateurs
 
 @app.post('/membre_classe/', response_model=UtilisateurGroupeModele)
 async def ajout_membre_classe(
     id_groupe : int,  # ID du groupe (passé en paramètre de la requête)
     pseudo_utilisateur: str,  # Pseudo de l'utilisateur (passé en paramètre de la requête)
-    current_user: Annotated[models.Utilisateur, Depends(get_utilisateur_courant)],
+    current_user: Annotated[UtilisateurCourant, Depends(get_utilisateur_courant)],
     est_admin : bool,  # booleen pour definir l'admin du groupe
     db: Session = Depends(get_db)  # Dépendance pour obtenir la session de base de données
 ):
     try:
         # Vérifier si l'utilisateur est admin de la classe ou éssaie de s'ajouter eux-même
-        admin_of_class = db.query(models.UtilisateurGroupe).filter(
-            (models.UtilisateurGroupe.est_admin == True) & 
-            (models.UtilisateurGroupe.pseudo_utilisateur == current_user.pseudo) & 
-            (models.UtilisateurGroupe.id_groupe == id_groupe)
-        ).first()
+        admin_of_class = est_admin_classe(current_user, id_groupe, db)
 
         if (admin_of_class or current_user.pseudo == pseudo_utilisateur):
 
@@ -1164,7 +1545,10 @@ async def ajout_membre_classe(
                     est_admin=est_admin,
                 )
                 db.add(db_utilisateur_groupe)  # Ajouter la nouvelle réussite dans la base de données
+                if est_admin:
+                    incrementer_version_permissions(db, pseudo_utilisateur)
                 db.commit()  # Commit les changements
+                invalider_classements_groupe(id_groupe)
                 db.refresh(db_utilisateur_groupe)  # Rafraîchir l'instance pour obtenir les données mises à jour
                 return db_utilisateur_groupe  # Retourner la nouvelle réussite ajoutée
         else:
@@ -1182,10 +1566,12 @@ async def ajout_membre_classe(
 @app.get('/admins_par_groupe/{id_groupe}', response_model=List[UtilisateurRenvoye])
 async def lire_admin_groupe(
     id_groupe: int,
-    current_user: Annotated[models.Utilisateur, Depends(get_utilisateur_courant)],
+    current_user: Annotated[UtilisateurCourant, Depends(get_utilisateur_courant)],
+    response: Response,
     db: Session = Depends(get_db),  # Dépendance pour obtenir la session de base de données
     skip: int = 0,  # Paramètre optionnel pour le décalage (pagination)
-    limit: int = 100  # Paramètre optionnel pour la limite du nombre de résultats
+    limit: int = 100,  # Paramètre optionnel pour la limite du nombre de résultats
+    curseur: Optional[str] = None  # Curseur de la page suivante (en-tête X-Next-Cursor)
 ):
     try:
         # Ne retourner les infos uniquement si l'utilisateur fait lui même parti de cette classe
@@ -1198,26 +1584,18 @@ async def lire_admin_groupe(
             raise HTTPException(status_code=403, detail="Accès restreint : vous ne faites pas parti de cette classe")
         
         else :
-            # Récupérer les utilisateurs du groupe qui sont des administrateurs
-            pseudo_admins = db.query(models.UtilisateurGroupe).filter(
-                (models.UtilisateurGroupe.id_groupe == id_groupe) & 
-                (models.UtilisateurGroupe.est_admin == True)
-            ).offset(skip).limit(limit).all()
-            
-            if not pseudo_admins:
-                raise HTTPException(status_code=404, detail=f"Aucun administrateur dans la classe : {id_groupe}")
-            
-            # Récupérer les informations des administrateurs
-            db_admins = db.query(models.Utilisateur).join(
+            # Récupérer les informations des administrateurs de la classe, triés par pseudo
+            cle = [models.Utilisateur.pseudo]
+            db_admins = page(paginer(db.query(models.Utilisateur).join(
                 models.UtilisateurGroupe, 
                 models.Utilisateur.pseudo == models.UtilisateurGroupe.pseudo_utilisateur
             ).filter(
                 models.UtilisateurGroupe.id_groupe == id_groupe, 
                 models.UtilisateurGroupe.est_admin == True
-            ).offset(skip).limit(limit).all()
+            ), cle, curseur, skip, limit).all(), cle, limit, response)
             
             if not db_admins:
-                raise HTTPException(status_code=404, detail="Aucune information trouvée pour les administrateurs")
+                raise HTTPException(status_code=404, detail=f"Aucun administrateur dans la classe : {id_groupe}")
             
             # Retourner les informations des administrateurs sous forme de liste d'objets UtilisateurRenvoye
             infos_admins = [UtilisateurRenvoye(pseudo=admin.pseudo, nom=admin.nom, prenom=admin.prenom) for admin in db_admins]
@@ -1232,11 +1610,13 @@ async def lire_admin_groupe(
 
 @app.get('/membres_classe_par_groupe/{id_groupe}', response_model=List[UtilisateurRenvoye])
 async def lire_membres_classe_groupe(
-    current_user: Annotated[models.Utilisateur, Depends(get_utilisateur_courant)],
+    current_user: Annotated[UtilisateurCourant, Depends(get_utilisateur_courant)],
     id_groupe: int,
+    response: Response,
     db: Session = Depends(get_db),  # Dépendance pour obtenir la session de base de données
     skip: int = 0,  # Paramètre optionnel pour le décalage (pagination)
     limit: int = 100,  # Paramètre optionnel pour la limite du nombre de résultats
+    curseur: Optional[str] = None  # Curseur de la page suivante (en-tête X-Next-Cursor)
 ):
     try:
         # Ne retourner ces infos que si l'utilisateur fait partie de cette classe
@@ -1247,26 +1627,18 @@ async def lire_membres_classe_groupe(
         
         if not membre_groupe:
             raise HTTPException(status_code=403, detail="Accès restreint : vous ne faites pas partie de cette classe")
-        # Récupérer les utilisateurs du groupe qui ne sont pas des administrateurs
-        pseudo_membres = db.query(models.UtilisateurGroupe).filter(
-            (models.UtilisateurGroupe.id_groupe == id_groupe) & 
-            (models.UtilisateurGroupe.est_admin == False)
-        ).offset(skip).limit(limit).all()
-        
-        if not pseudo_membres:
-            raise HTTPException(status_code=404, detail=f"Aucun membre dans la classe : {id_groupe}")
-        
-        # Renvoyer les ifnos des membres
-        db_membres = db.query(models.Utilisateur).join(
+        # Renvoyer les infos des membres du groupe qui ne sont pas des administrateurs, triés par pseudo
+        cle = [models.Utilisateur.pseudo]
+        db_membres = page(paginer(db.query(models.Utilisateur).join(
             models.UtilisateurGroupe,
             models.Utilisateur.pseudo == models.UtilisateurGroupe.pseudo_utilisateur
         ).filter(
             models.UtilisateurGroupe.id_groupe == id_groupe,
             models.UtilisateurGroupe.est_admin == False
-        ).offset(skip).limit(limit).all()
+        ), cle, curseur, skip, limit).all(), cle, limit, response)
 
         if not db_membres:
-            return Response(status_code=204)
+            raise HTTPException(status_code=404, detail=f"Aucun membre dans la classe : {id_groupe}")
 
         infos_membres = [UtilisateurRenvoye(pseudo=membre.pseudo, nom=membre.nom, prenom=membre.prenom) for membre in db_membres]
 
@@ -1295,20 +1667,12 @@ def get_admin_count(
 @app.get('/membre_est_admin/{id_groupe}', response_model=bool)
 async def verifier_admin_classe(
     id_groupe: int,  # ID du groupe à vérifier
-    current_user: Annotated[models.Utilisateur, Depends(get_utilisateur_courant)],
+    current_user: Annotated[UtilisateurCourant, Depends(get_utilisateur_courant)],
     db: Session = Depends(get_db)
 ):
     try:
         # Vérifier si l'utilisateur courant est admin de la classe
-        lien_utilisateur_courant_classe = db.query(models.UtilisateurGroupe).filter(
-            models.UtilisateurGroupe.id_groupe == id_groupe,
-            models.UtilisateurGroupe.pseudo_utilisateur == current_user.pseudo,
-            models.UtilisateurGroupe.est_admin == True
-        ).first()
-        if lien_utilisateur_courant_classe:
-            return True
-        else:
-            return False
+        return est_admin_classe(current_user, id_groupe, db)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la vérification du statut administrateur : {str(e)}")
@@ -1318,7 +1682,7 @@ async def changer_admin_classe(
     id_groupe: int,  # ID du groupe à donner
     pseudo_utilisateur: str,  # Pseudo de l'utilisateur à promouvoir/démouvoir
     est_admin: bool,  # Booléen pour promouvoir/démouvoir l'utilisateur
-    current_user: Annotated[models.Utilisateur, Depends(get_utilisateur_courant)],
+    current_user: Annotated[UtilisateurCourant, Depends(get_utilisateur_courant)],
     db: Session = Depends(get_db)
 ):
     try:
@@ -1327,12 +1691,7 @@ async def changer_admin_classe(
             raise HTTPException(status_code=403, detail="Vous ne pouvez pas changer votre propre statut administrateur")
         
         # Vérifier si l'utilisateur courant est admin de la classe
-        lien_utilisateur_courant_classe = db.query(models.UtilisateurGroupe).filter(
-            models.UtilisateurGroupe.id_groupe == id_groupe,
-            models.UtilisateurGroupe.pseudo_utilisateur == current_user.pseudo,
-            models.UtilisateurGroupe.est_admin == True
-        ).first()
-        if not lien_utilisateur_courant_classe:
+        if not est_admin_classe(current_user, id_groupe, db):
             raise HTTPException(status_code=403, detail="Accès refusé : Vous devez être administrateur de cette classe")
 
         # Vérifier si l'utilisateur à promouvoir/démouvoir existe et est dans la classe
@@ -1355,7 +1714,9 @@ async def changer_admin_classe(
             
             # Promouvoir l'utilisateur en tant qu'administrateur
             lien_utilisateur_classe.est_admin = est_admin
+            incrementer_version_permissions(db, pseudo_utilisateur)
             db.commit()
+            invalider_classements_groupe(id_groupe)
 
             return {"message": f"Utilisateur '{pseudo_utilisateur}' promu administrateur de la classe"}
         
@@ -1367,7 +1728,9 @@ async def changer_admin_classe(
             
             # Démouvoir l'administrateur
             lien_utilisateur_classe.est_admin = est_admin
+            incrementer_version_permissions(db, pseudo_utilisateur)
             db.commit()
+            invalider_classements_groupe(id_groupe)
 
             return {"message": f"Statut administrateur mis à jour pour l'utilisateur '{pseudo_utilisateur}'"}
 
@@ -1428,16 +1791,12 @@ async def lire_classes_utilisateur(pseudo_utilisateur: str, db: Session = Depend
 async def supprimer_relation_utilisateur_groupe(
     id_groupe: int,  # ID du groupe à supprimer
     pseudo_utilisateur: str,  # Pseudo de l'utilisateur dont on veut supprimer la relation
-    current_user: Annotated[models.Utilisateur, Depends(get_utilisateur_courant)],
+    current_user: Annotated[UtilisateurCourant, Depends(get_utilisateur_courant)],
     db: Session = Depends(get_db)  # Dépendance pour obtenir la session de base de données
 ):
     try:
         # Vérifie que la requête est soit appelée par un admin de la classe, soit par l'utilisateur concerné
-        admin_of_class = db.query(models.UtilisateurGroupe).filter(
-            (models.UtilisateurGroupe.id_groupe == id_groupe) &
-            (models.UtilisateurGroupe.pseudo_utilisateur == current_user.pseudo) &
-            (models.UtilisateurGroupe.est_admin == True)
-        ).first()
+        admin_of_class = est_admin_classe(current_user, id_groupe, db)
 
         if admin_of_class or pseudo_utilisateur == current_user.pseudo:
             # Chercher la relation entre l'utilisateur et le groupe
@@ -1451,8 +1810,11 @@ async def supprimer_relation_utilisateur_groupe(
                 raise HTTPException(status_code=404, detail="L'utilisateur n'est pas membre de cette classe")
             
             # Supprimer la relation utilisateur-groupe
+            if relation.est_admin:
+                incrementer_version_permissions(db, pseudo_utilisateur)
             db.delete(relation)
             db.commit()  # Commit après suppression de la relation
+            invalider_classements_groupe(id_groupe)
             
             # Vérifier le nombre d'administrateurs restants dans le groupe
             admin_count = get_admin_count(id_groupe=id_groupe, db=db)
@@ -1498,9 +1860,9 @@ async def ajouter_exercice_groupe(ex_data : ExerciceGroupeBase,db: Session = Dep
 
 
 @app.get("/exercice_groupe/", response_model=List[ExerciceGroupeModel])
-async def lire_tous_exercice_groupe(db: Session = Depends(get_db), skip: int = 0, limit: int = 100):
-    e = db.query(models.ExerciceGroupe).offset(skip).limit(limit).all()
-    return e
+async def lire_tous_exercice_groupe(response: Response, db: Session = Depends(get_db), skip: int = 0, limit: int = 100, curseur: Optional[str] = None):
+    cle = [models.ExerciceGroupe.id_exercice, models.ExerciceGroupe.id_groupe]
+    return page(paginer(db.query(models.ExerciceGroupe), cle, curseur, skip, limit).all(), cle, limit, response)
 
 #retourne tous les exercices liés au groupe
 @app.get("/exercice_groupe/{id_groupe}",response_model=List[ExerciceModele])
@@ -1609,12 +1971,17 @@ async def supprimer_tous_les_badges(
 @app.get("/badge/{pseudo}", response_model=List[BadgeModele])
 async def lire_ses_badges(
     pseudo: str,
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    curseur: Optional[str] = None,
 ):
     # Query only badges belonging to the authenticated user
-    infos_badges = db.query(models.UtilisateurBadge).filter(models.UtilisateurBadge.pseudo_utilisateur == pseudo).offset(skip).limit(limit).all()
+    cle = [models.UtilisateurBadge.id_badge]
+    infos_badges = page(paginer(
+        db.query(models.UtilisateurBadge).filter(models.UtilisateurBadge.pseudo_utilisateur == pseudo), cle, curseur, skip, limit
+    ).all(), cle, limit, response)
     # Serialize database models into Pydantic models
     
     badges = [db.query(models.Badge).filter(models.Badge.id_badge == badge.id_badge).first() for badge in infos_badges]
@@ -1654,50 +2021,32 @@ async def recuperer_membres_badge(
    
 
 def attribuer_badges_classement(idDefi, db):
+    # Classement et attribution en requêtes ensemblistes (nombre de requêtes indépendant du nombre de réussites)
     try:
-        reussites_defi = db.query(models.UtilisateurDefi).filter(models.UtilisateurDefi.id_defi == idDefi).all()
-        if not reussites_defi:
+        attributions = attribuer_badges_defi(db, idDefi)
+        if not attributions:
             print(f"Aucune réussite trouvée pour le défi {idDefi}")
             return
-        
-        reussites_defi_triees = sorted(reussites_defi, key=lambda x: x.temps_reussite)
-        utilisateurs_traites = set()
-        position = 0
-                
-        for reussite in reussites_defi_triees:
-            pseudo = reussite.pseudo_utilisateur
-            
-            if pseudo in utilisateurs_traites:
-                continue
-                
-            position += 1
-            utilisateurs_traites.add(pseudo)
-            if position > 10:
-                break
-            
-            # Récupérer les badges actuels de l'utilisateur
-            badges_utilisateur = db.query(models.UtilisateurBadge).filter(models.UtilisateurBadge.pseudo_utilisateur == pseudo).all()
-            badge_ids_utilisateur = [badge.id_badge for badge in badges_utilisateur]
-            
-            if position == 1 and 3 not in badge_ids_utilisateur:
-                new_badge = models.UtilisateurBadge(pseudo_utilisateur=pseudo, id_badge=3)
-                db.add(new_badge)
-            if position <= 5 and 2 not in badge_ids_utilisateur:
-                new_badge = models.UtilisateurBadge(pseudo_utilisateur=pseudo, id_badge=2)
-                db.add(new_badge)
-            if position <= 10 and 1 not in badge_ids_utilisateur:
-                new_badge = models.UtilisateurBadge(pseudo_utilisateur=pseudo, id_badge=1)
-                db.add(new_badge)
-
-        if position == 0:
-            return    
         db.commit()
+        nouveaux = sum(not attribution["deja_obtenu"] for attribution in attributions)
+        print(f"🏅 {nouveaux} badge(s) attribué(s) pour le défi {idDefi}")
 
     except Exception as e:
         db.rollback()
         print(f"Erreur lors de l'attribution des badges : {str(e)}")
 
 
+# Simulation de l'attribution hebdomadaire des badges (rien n'est écrit)
+@app.get('/admin/badges_classement/{id_defi}', response_model=List[dict])
+def simuler_badges_classement(
+    id_defi: int,
+    current_user: Annotated[UtilisateurCourant, Depends(get_utilisateur_courant)],
+    db: Session = Depends(get_db)
+):
+    if is_admin(current_user):
+        return attribuer_badges_defi(db, id_defi, simulation=True)
+
+
 # Créer un exercice
 @app.post('/exercices/', response_model=ExerciceModele)
 async def creer_exercice(exercice: ExerciceBase, db: Session = Depends(get_db)):
@@ -1713,12 +2062,16 @@ async def creer_exercice(exercice: ExerciceBase, db: Session = Depends(get_db)):
 
 # Lire tous les exercices
 @app.get('/exercices/', response_model=List[ExerciceModele])
-async def lire_exercices(db: Session = Depends(get_db), skip: int = 0, limit: int = 100):
+async def lire_exercices(response: Response, db: Session = Depends(get_db), skip: int = 0, limit: int = 100, curseur: Optional[str] = None):
     try:
-        exercices = db.query(models.Exercice).offset(skip).limit(limit).all()
+        cle = [models.Exercice.id_exercice]
+        exercices = page(paginer(db.query(models.Exercice), cle, curseur, skip, limit).all(), cle, limit, response)
         if not exercices:
             raise HTTPException(status_code=404, detail="Aucun exercice trouvé")
         return exercices
+    except HTTPException as e:
+        raise e
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération des exercices: {str(e)}")
 
@@ -1780,10 +2133,7 @@ async def ajouter_exercice_realise(
             pseudo=pseudo,
             exercice_fait=True  # Marquer comme réalisé
         )
-        db.add(exercice_realise)
-        db.commit()
-        db.refresh(exercice_realise)
-        return exercice_realise
+        return await write_queue.ajouter(exercice_realise)
     
     except HTTPException as e:
         raise e
@@ -1796,9 +2146,11 @@ async def ajouter_exercice_realise(
 @app.get('/exercices_realises/{pseudo}', response_model=List[ExerciceUtilisateurModele])
 async def lire_exercices_realises(
     pseudo: str,  # Pseudo de l'utilisateur
+    response: Response,
     db: Session = Depends(get_db),  # Session de base de données
     skip: int = 0,  # Pagination : décalage
-    limit: int = 100  # Pagination : limite
+    limit: int = 100,  # Pagination : limite
+    curseur: Optional[str] = None  # Pagination : curseur de la page suivante (en-tête X-Next-Cursor)
 ):
     try:
         # Vérifier si l'utilisateur existe
@@ -1807,10 +2159,11 @@ async def lire_exercices_realises(
             raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
 
         # Récupérer les exercices réalisés
-        exercices = db.query(models.ExerciceUtilisateur).filter(
+        cle = [models.ExerciceUtilisateur.id_exercice]
+        exercices = page(paginer(db.query(models.ExerciceUtilisateur).filter(
             models.ExerciceUtilisateur.pseudo == pseudo,
             models.ExerciceUtilisateur.exercice_fait == True
-        ).offset(skip).limit(limit).all()
+        ), cle, curseur, skip, limit).all(), cle, limit, response)
 
         if not exercices:
             return Response(status_code=204)
@@ -1855,7 +2208,7 @@ async def ajouter_stat(
     pseudo_utilisateur: str,
     type_stat: str,
     valeur_stat: float,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         db_stat = models.Stat(
@@ -1865,33 +2218,91 @@ async def ajouter_stat(
             date_stat=int(time.time())
         )
         
-        utilisateur_db = get_utilisateur(db, db_stat.pseudo_utilisateur)
+        utilisateur_db = await get_utilisateur_async(db, db_stat.pseudo_utilisateur)
 
         if not utilisateur_db:
             raise HTTPException(status_code=404, detail="Aucun utilisateur trouvé")
 
-        db.add(db_stat)
-        db.commit()
-        db.refresh(db_stat)
-        return db_stat
+        return await write_queue.ajouter(db_stat, apres=maj_agregats_stat)
     
     except HTTPException as e:
         raise e
     
     except Exception as e:
-        db.rollback()  # Rollback the transaction if an error occurs
+        await db.rollback()  # Rollback the transaction if an error occurs
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'ajout de la stat : {str(e)}")
     
+# Envoi groupé des stats d'un exercice (wpm, precision, nberreur...) : une requête, un contrôle de l'utilisateur.
+# Écriture différée : les lignes sont confiées à la file d'écriture et la réponse n'attend pas le commit.
+@app.post('/stat/lot', status_code=202)
+async def ajouter_stats_lot(lot: LotStats, db: AsyncSession = Depends(get_async_db)):
+    if not lot.stats:
+        raise HTTPException(status_code=400, detail="Aucune stat à ajouter")
+    if len(lot.stats) > STATS_LOT_MAX:
+        raise HTTPException(status_code=413, detail=f"Pas plus de {STATS_LOT_MAX} stats par envoi")
+
+    utilisateur_db = await get_utilisateur_async(db, lot.pseudo_utilisateur)
+    if not utilisateur_db:
+        raise HTTPException(status_code=404, detail="Aucun utilisateur trouvé")
+
+    maintenant = int(time.time())
+    # File d'écriture saturée : 503 (Retry-After) levé ici, avant d'avoir accepté le lot
+    write_queue.submit_lot([
+        models.Stat(
+            pseudo_utilisateur=lot.pseudo_utilisateur,
+            type_stat=stat.type_stat,
+            valeur_stat=stat.valeur_stat,
+            # Pas de date dans le futur (horloge du client)
+            date_stat=maintenant if stat.date_stat is None else min(stat.date_stat, maintenant)
+        )
+        for stat in lot.stats
+    ], apres=maj_agregats_stat, description=f"stats de {lot.pseudo_utilisateur}")
+    return {"nb_stats": len(lot.stats)}
+
 @app.get('/stat/', response_model=List[StatsUtilisateur])
 async def lire_stats_utilisateur(
     pseudo_utilisateur: str,
     type_stat: str,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     skip: int = 0,
-    limit: int = 200
+    limit: int = 200,
+    curseur: Optional[str] = None
 ):
-    stats = db.query(models.Stat).filter(models.Stat.pseudo_utilisateur == pseudo_utilisateur, models.Stat.type_stat == type_stat).offset(skip).limit(limit).all()
-    return stats
+    # Ordre chronologique, servi par l'index (pseudo_utilisateur, type_stat, date_stat)
+    cle = [models.Stat.date_stat, models.Stat.id_stat]
+    result = await db.execute(paginer(
+        select(models.Stat).filter(models.Stat.pseudo_utilisateur == pseudo_utilisateur, models.Stat.type_stat == type_stat),
+        cle, curseur, skip, limit
+    ))
+    return page(result.scalars().all(), cle, limit, response)
+
+# Courbe de progression : une valeur agrégée (nb, min, max, moyenne, dernière) par jour, semaine ou mois
+@app.get('/stat/agregats', response_model=List[AgregatStat])
+async def lire_agregats_stats(
+    pseudo_utilisateur: str,
+    type_stat: str,
+    response: Response,
+    resolution: Literal["jour", "semaine", "mois"] = "jour",
+    debut: Optional[int] = None,  # Timestamp de début (la période qui le contient est incluse)
+    fin: Optional[int] = None,  # Timestamp de fin (exclu)
+    db: AsyncSession = Depends(get_async_db),
+    limit: int = Query(1000, ge=1, le=5000),
+    curseur: Optional[str] = None
+):
+    # Servi par la clé primaire (pseudo_utilisateur, type_stat, resolution, debut)
+    query = select(models.StatAgregat).filter(
+        models.StatAgregat.pseudo_utilisateur == pseudo_utilisateur,
+        models.StatAgregat.type_stat == type_stat,
+        models.StatAgregat.resolution == resolution,
+    )
+    if debut is not None:
+        query = query.filter(models.StatAgregat.debut >= debut_periode(debut, resolution))
+    if fin is not None:
+        query = query.filter(models.StatAgregat.debut < fin)
+    cle = [models.StatAgregat.debut]
+    result = await db.execute(paginer(query, cle, curseur, 0, limit))
+    return page(result.scalars().all(), cle, limit, response)
 
 
 @app.get("/defi_semaine")
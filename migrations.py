@@ -0,0 +1,122 @@
+import argparse
+import logging
+import time
+
+from sqlalchemy import text
+
+from agregats_stats import reconstruire_agregats_stats
+from classement import reconstruire_meilleurs_temps, reconstruire_resumes_defi
+from database import engine
+import models
+
+logger = logging.getLogger(__name__)
+
+
+def ajouter_colonne(table: str, colonne: str, definition: str):
+    """Migration step adding a column only if it is missing (SQLite has no ADD COLUMN IF NOT EXISTS)."""
+    def etape(conn):
+        colonnes = {row[1] for row in conn.execute(text(f'PRAGMA table_info("{table}")'))}
+        if colonne not in colonnes:
+            conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN {colonne} {definition}'))
+    return etape
+
+
+# Migrations versionnées, appliquées dans l'ordre et une seule fois par base.
+# Chaque instruction (SQL ou fonction recevant la connexion) doit être idempotente
+# (IF NOT EXISTS...) : plusieurs workers peuvent démarrer en même temps sur la même base.
+MIGRATIONS = [
+    (1, "index_stats_utilisateur_type", [
+        # lire_stats_utilisateur : filtre (pseudo_utilisateur, type_stat), tri par date
+        'CREATE INDEX IF NOT EXISTS ix_stats_utilisateur_type_date '
+        'ON "STATS" (pseudo_utilisateur, type_stat, date_stat)',
+    ]),
+    (2, "index_utilisateur_defi_classement", [
+        # Classements : GROUP BY id_defi, pseudo avec min(temps_reussite), tri par temps
+        'CREATE INDEX IF NOT EXISTS ix_utilisateur_defi_defi_pseudo_temps '
+        'ON "UTILISATEUR_DEFI" (id_defi, pseudo_utilisateur, temps_reussite)',
+    ]),
+    (3, "index_utilisateur_groupe_membres", [
+        # Membres et admins d'une classe : filtre (id_groupe, est_admin)
+        'CREATE INDEX IF NOT EXISTS ix_utilisateur_groupe_groupe_admin '
+        'ON "UTILISATEUR_GROUPE" (id_groupe, est_admin, pseudo_utilisateur)',
+    ]),
+    (4, "utilisateur_version_permissions", [
+        # Version des rôles, portée par les jetons d'accès pour détecter les jetons périmés
+        ajouter_colonne("UTILISATEUR", "version_permissions", "INTEGER NOT NULL DEFAULT 0"),
+    ]),
+    (5, "meilleur_temps_defi", [
+        # Table créée par create_all ; on la remplit à partir des réussites existantes
+        reconstruire_meilleurs_temps,
+    ]),
+    (6, "resume_defi_utilisateur", [
+        # Agrégats par (utilisateur, défi) de la page de profil, à partir des réussites existantes
+        reconstruire_resumes_defi,
+    ]),
+    (7, "stats_agregat", [
+        # Agrégats jour / semaine / mois des courbes de progression, à partir des stats existantes
+        reconstruire_agregats_stats,
+    ]),
+]
+
+
+def _creer_table_versions(conn):
+    conn.execute(text(
+        'CREATE TABLE IF NOT EXISTS "SCHEMA_MIGRATIONS" ('
+        'version INTEGER PRIMARY KEY, '
+        'nom VARCHAR(128) NOT NULL, '
+        'date_application INTEGER NOT NULL, '
+        'duree_ms FLOAT NOT NULL)'
+    ))
+
+
+def versions_appliquees(bind=engine):
+    """Return the set of migration versions already applied to the database."""
+    with bind.begin() as conn:
+        _creer_table_versions(conn)
+        return {row[0] for row in conn.execute(text('SELECT version FROM "SCHEMA_MIGRATIONS"'))}
+
+
+def appliquer_migrations(bind=engine):
+    """Apply every pending migration, each one in its own transaction. Return the applied versions."""
+    deja_appliquees = versions_appliquees(bind)
+    appliquees = []
+    for version, nom, instructions in MIGRATIONS:
+        if version in deja_appliquees:
+            continue
+        debut = time.perf_counter()
+        with bind.begin() as conn:
+            for instruction in instructions:
+                if callable(instruction):
+                    instruction(conn)
+                else:
+                    conn.execute(text(instruction))
+            conn.execute(
+                text('INSERT OR IGNORE INTO "SCHEMA_MIGRATIONS" (version, nom, date_application, duree_ms) '
+                     'VALUES (:version, :nom, :date_application, :duree_ms)'),
+                {
+                    "version": version,
+                    "nom": nom,
+                    "date_application": int(time.time()),
+                    "duree_ms": (time.perf_counter() - debut) * 1000,
+                },
+            )
+        logger.info("Migration %s (%s) appliquée", version, nom)
+        appliquees.append(version)
+    return appliquees
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Applique les migrations de schéma en attente.")
+    parser.add_argument("--status", action="store_true", help="Afficher l'état des migrations sans rien appliquer")
+    args = parser.parse_args()
+    models.Base.metadata.create_all(bind=engine)
+
+    if args.status:
+        deja_appliquees = versions_appliquees()
+        for version, nom, _ in MIGRATIONS:
+            etat = "appliquée" if version in deja_appliquees else "en attente"
+            print(f"{version:>4}  {nom:<40} {etat}")
+    else:
+        appliquees = appliquer_migrations()
+        print(f"{len(appliquees)} migration(s) appliquée(s) : {appliquees}" if appliquees else "Base à jour.")
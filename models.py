@@ -1,5 +1,5 @@
 from database import Base
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Float, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Float, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -16,6 +16,8 @@ class Utilisateur(Base):
     tempsTotal = Column(Integer)
     cptDefi = Column(Integer, default=0)
     pdpActuelle = Column(Integer, default=1)
+    # Incrémentée à chaque changement de rôle (admin de classe...) : invalide les jetons émis avant
+    version_permissions = Column(Integer, nullable=False, default=0)
 
     # Relation avec ExerciceUtilisateur
     exercices_realises = relationship("ExerciceUtilisateur", back_populates="utilisateur")
@@ -30,6 +32,9 @@ class Utilisateur(Base):
         cascade="all, delete-orphan"
     )
 
+    # Agrégats des statistiques par période, supprimés avec l'utilisateur
+    agregats_stat = relationship("StatAgregat", cascade="all, delete-orphan")
+
 
 
 class Cours(Base):
@@ -99,6 +104,11 @@ class Stat(Base):
     # Relation avec Utilisateur
     utilisateur_concerne = relationship("Utilisateur", back_populates="stat_concerne")
 
+    # Index aussi créés sur les bases existantes par migrations.py
+    __table_args__ = (
+        Index('ix_stats_utilisateur_type_date', 'pseudo_utilisateur', 'type_stat', 'date_stat'),
+    )
+
 class ProfilePicture(Base):
     __tablename__ = 'PROFILEPICTURE'
     
@@ -125,6 +135,10 @@ class UtilisateurGroupe(Base):
     
      # Relation inverse avec Groupe
     groupe = relationship("Groupe", back_populates="utilisateurs")
+
+    __table_args__ = (
+        Index('ix_utilisateur_groupe_groupe_admin', 'id_groupe', 'est_admin', 'pseudo_utilisateur'),
+    )
     
 class UtilisateurDefi(Base):
     __tablename__ = 'UTILISATEUR_DEFI'
@@ -132,7 +146,97 @@ class UtilisateurDefi(Base):
     id_defi = Column(Integer, ForeignKey('DEFI.id_defi'), primary_key=True)
     temps_reussite =Column(Float, nullable=True)
     date_reussite = Column(DateTime, nullable=False, default=datetime.now, primary_key=True)
+
+    __table_args__ = (
+        Index('ix_utilisateur_defi_defi_pseudo_temps', 'id_defi', 'pseudo_utilisateur', 'temps_reussite'),
+    )
+
+# Meilleur temps de chaque utilisateur par défi, tenu à jour à chaque ajout/suppression de réussite
+class MeilleurTempsDefi(Base):
+    __tablename__ = 'MEILLEUR_TEMPS_DEFI'
+    id_defi = Column(Integer, ForeignKey('DEFI.id_defi'), primary_key=True)
+    pseudo_utilisateur = Column(String(15), ForeignKey('UTILISATEUR.pseudo'), primary_key=True)
+    temps_reussite = Column(Float, nullable=False)
+    date_reussite = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('ix_meilleur_temps_defi_classement', 'id_defi', 'temps_reussite', 'pseudo_utilisateur'),
+    )
     
+class ResumeDefiUtilisateur(Base):
+    __tablename__ = 'RESUME_DEFI_UTILISATEUR'
+    # Agrégats des réussites d'un utilisateur sur un défi, tenus à jour à chaque réussite (page de profil)
+    pseudo_utilisateur = Column(String(15), ForeignKey('UTILISATEUR.pseudo'), primary_key=True)
+    id_defi = Column(Integer, ForeignKey('DEFI.id_defi'), primary_key=True)
+    nb_tentatives = Column(Integer, nullable=False)
+    somme_temps = Column(Float, nullable=False)
+    meilleur_temps = Column(Float, nullable=False)
+    dernier_temps = Column(Float, nullable=False)
+    derniere_reussite = Column(DateTime, nullable=False)
+    # Pourcentage des joueurs du défi ayant un meilleur temps supérieur ou égal, lors de la dernière mise à jour
+    centile = Column(Float, nullable=False)
+
+    @property
+    def temps_moyen(self):
+        return self.somme_temps / self.nb_tentatives
+
+class ArchiveReussites(Base):
+    __tablename__ = 'ARCHIVE_REUSSITES'
+    # Un fichier par passage d'archivage : les réussites brutes de ces défis ne sont plus toutes en base
+    fichier = Column(String(128), primary_key=True)
+    id_defi = Column(Integer, ForeignKey('DEFI.id_defi'), nullable=False, index=True)
+    nb_reussites = Column(Integer, nullable=False)
+    date_archive = Column(Integer, nullable=False)
+
+class StatAgregat(Base):
+    __tablename__ = 'STATS_AGREGAT'
+    # Agrégats des stats par (utilisateur, type, résolution, début de période UTC), tenus à jour à chaque stat
+    pseudo_utilisateur = Column(String(15), ForeignKey('UTILISATEUR.pseudo'), primary_key=True)
+    type_stat = Column(String(10), primary_key=True)
+    resolution = Column(String(8), primary_key=True)  # jour, semaine (lundi), mois
+    debut = Column(Integer, primary_key=True)  # Timestamp du début de la période
+    nb = Column(Integer, nullable=False)
+    valeur_min = Column(Float, nullable=False)
+    valeur_max = Column(Float, nullable=False)
+    somme = Column(Float, nullable=False)
+    dernier = Column(Float, nullable=False)
+    date_dernier = Column(Integer, nullable=False)
+
+    @property
+    def moyenne(self):
+        return self.somme / self.nb
+
+class ClassementArchive(Base):
+    __tablename__ = 'CLASSEMENT_ARCHIVE'
+    # Classement final d'un défi de la semaine, figé au changement de semaine (historique)
+    id_defi = Column(Integer, ForeignKey('DEFI.id_defi'), primary_key=True)
+    rang = Column(Integer, primary_key=True)
+    pseudo_utilisateur = Column(String(15), nullable=False)
+    temps_reussite = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index('ix_classement_archive_utilisateur', 'pseudo_utilisateur', 'id_defi'),
+    )
+
+class ParametreCluster(Base):
+    __tablename__ = 'PARAMETRE_CLUSTER'
+    # Valeurs choisies une fois pour tous les workers (ex. coût bcrypt calibré au premier démarrage)
+    cle = Column(String(64), primary_key=True)
+    valeur = Column(String(256), nullable=False)
+
+class ExecutionTache(Base):
+    __tablename__ = 'EXECUTION_TACHE'
+    # Une ligne par occurrence planifiée d'une tâche de cluster : verrou (bail) puis historique
+    id_tache = Column(String(64), primary_key=True)
+    date_prevue = Column(DateTime, primary_key=True)
+    statut = Column(String(16), nullable=False)
+    detenteur = Column(String(128), nullable=False)
+    date_debut = Column(DateTime, nullable=False)
+    bail_expire = Column(DateTime, nullable=False)
+    date_fin = Column(DateTime)
+    duree_ms = Column(Float)
+    erreur = Column(String(500))
+
 class UtilisateurBadge(Base):
     __tablename__ = 'UTILISATEUR_BADGE'
     pseudo_utilisateur = Column(String(15), ForeignKey('UTILISATEUR.pseudo'), primary_key=True)
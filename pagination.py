@@ -0,0 +1,69 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+# En-tête portant le curseur de la page suivante (le corps des réponses reste une liste)
+EN_TETE_CURSEUR = "X-Next-Cursor"
+
+
+def _encoder_valeur(valeur):
+    if isinstance(valeur, datetime):
+        return {"dt": valeur.isoformat()}
+    raise TypeError(f"Valeur de curseur non sérialisable : {valeur!r}")
+
+
+def _decoder_valeur(objet):
+    if set(objet) == {"dt"}:
+        return datetime.fromisoformat(objet["dt"])
+    return objet
+
+
+def encoder_curseur(valeurs) -> str:
+    """Encode the sort key of the last row of a page into an opaque, URL-safe cursor."""
+    brut = json.dumps(list(valeurs), default=_encoder_valeur, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(brut).decode().rstrip("=")
+
+
+def decoder_curseur(curseur: str, nb_colonnes: int) -> list:
+    try:
+        brut = base64.urlsafe_b64decode(curseur + "=" * (-len(curseur) % 4))
+        valeurs = json.loads(brut, object_hook=_decoder_valeur)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+    if not isinstance(valeurs, list) or len(valeurs) != nb_colonnes:
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+    return valeurs
+
+
+def paginer(requete, colonnes, curseur: str | None, skip: int, limit: int):
+    """
+    Order a Query/Select by `colonnes` (an indexed, unique key) and restrict it to one page.
+
+    With a cursor the page starts right after the encoded key (keyset pagination, `skip`
+    is ignored); without one the old `skip` offset is used. One extra row is fetched to
+    know whether a next page exists. A negative `limit` keeps SQLite's meaning: no limit.
+    """
+    if curseur:
+        requete = requete.filter(tuple_(*colonnes) > tuple_(*decoder_curseur(curseur, len(colonnes))))
+    requete = requete.order_by(*colonnes)
+    if skip and not curseur:
+        requete = requete.offset(skip)
+    if limit < 0:
+        return requete
+    return requete.limit(limit + 1)
+
+
+def page(lignes, colonnes, limit: int, response: Response) -> list:
+    """Trim the extra row fetched by `paginer` and set the next-page cursor header when needed."""
+    if limit == 0:
+        return []
+    lignes = list(lignes)
+    # limit négative : toutes les lignes, donc jamais de page suivante
+    if 0 < limit < len(lignes):
+        lignes = lignes[:limit]
+        response.headers[EN_TETE_CURSEUR] = encoder_curseur(getattr(lignes[-1], colonne.key) for colonne in colonnes)
+    return lignes
@@ -1,16 +1,16 @@
 -- Photo 1
 
-INSERT INTO PROFILEPICTURE(chemin_image, nom_image)
-VALUES ('/pdp/IconCompte.png', 'Photo de base de compte');
+INSERT OR REPLACE INTO PROFILEPICTURE(id_photo, chemin_image, nom_image)
+VALUES (1, '/pdp/IconCompte.png', 'Photo de base de compte');
 
-INSERT INTO PROFILEPICTURE(chemin_image, nom_image) 
-VALUES ('/pdp/1.png', 'Photo d''un aventurier');
+INSERT OR REPLACE INTO PROFILEPICTURE(id_photo, chemin_image, nom_image) 
+VALUES (2, '/pdp/1.png', 'Photo d''un aventurier');
 
-INSERT INTO PROFILEPICTURE(chemin_image, nom_image) 
-VALUES ('/pdp/2.png', 'Photo d''un pirate');
+INSERT OR REPLACE INTO PROFILEPICTURE(id_photo, chemin_image, nom_image) 
+VALUES (3, '/pdp/2.png', 'Photo d''un pirate');
 
-INSERT INTO PROFILEPICTURE(chemin_image, nom_image) 
-VALUES ('/pdp/3.png', 'Photo d''un astronaute');
+INSERT OR REPLACE INTO PROFILEPICTURE(id_photo, chemin_image, nom_image) 
+VALUES (4, '/pdp/3.png', 'Photo d''un astronaute');
 
-INSERT INTO PROFILEPICTURE(chemin_image, nom_image) 
-VALUES ('/pdp/4.png', 'Photo d''un roi');
+INSERT OR REPLACE INTO PROFILEPICTURE(id_photo, chemin_image, nom_image) 
+VALUES (5, '/pdp/4.png', 'Photo d''un roi');
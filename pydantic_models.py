@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional, Tuple
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -23,6 +23,20 @@ class UtilisateurRenvoye(BaseModel):
     nom: str
     prenom: str
 
+# Instantané immuable de l'utilisateur authentifié (mis en cache par get_utilisateur_courant)
+class UtilisateurCourant(BaseModel):
+    pseudo: str
+    nom: Optional[str] = None
+    prenom: Optional[str] = None
+    courriel: Optional[str] = None
+    est_admin: bool = False
+    version_permissions: int = 0
+    # Classes dont l'utilisateur est admin, lues dans le jeton (None pour un ancien jeton sans ces claims)
+    classes_admin: Optional[Tuple[int, ...]] = None
+
+    class Config:
+        frozen = True
+
 class UtilisateurCompte(BaseModel):
     pseudo: str
     nom: str
@@ -50,6 +64,26 @@ class StatsUtilisateur(BaseModel):
     date_stat: int
     pseudo_utilisateur: str
 
+class StatBase(BaseModel):
+    type_stat: str
+    valeur_stat: float
+    date_stat: Optional[int] = None  # Horodatage (secondes) côté client, sinon heure de réception
+
+class LotStats(BaseModel):
+    pseudo_utilisateur: str
+    stats: List[StatBase]
+
+class AgregatStat(BaseModel):
+    debut: int  # Timestamp du début de la période (UTC)
+    nb: int
+    valeur_min: float
+    valeur_max: float
+    moyenne: float
+    dernier: float
+
+    class Config:
+        orm_mode = True
+
 class DefiBase(BaseModel):
     titre_defi: str
     description_defi: str
@@ -93,6 +127,39 @@ class UtilisateurDefiModele(UtilisateurDefiBase):
     class Config:
         orm_mode = True 
 
+class PositionClassement(BaseModel):
+    rang: int
+    pseudo_utilisateur: str
+    temps_reussite: float
+
+class RangClassement(PositionClassement):
+    total: int
+
+class VoisinsClassement(BaseModel):
+    au_dessus: List[PositionClassement]
+    utilisateur: PositionClassement
+    en_dessous: List[PositionClassement]
+    total: int
+
+class ClassementArchiveModele(PositionClassement):
+    id_defi: int
+
+    class Config:
+        orm_mode = True
+
+class ResumeDefiModele(BaseModel):
+    id_defi: int
+    pseudo_utilisateur: str
+    nb_tentatives: int
+    meilleur_temps: float
+    temps_moyen: float
+    dernier_temps: float
+    derniere_reussite: datetime
+    centile: float
+
+    class Config:
+        orm_mode = True
+
 class CoursBase(BaseModel):
     titre_cours: str
     description_cours: str
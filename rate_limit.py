@@ -0,0 +1,126 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from fastapi import HTTPException
+
+from auth import PASSWORD_HASH_WORKERS
+
+# Tentatives de connexion par pseudo : rafale puis débit de recharge
+LOGIN_RATE_PSEUDO_BURST = int(os.getenv("LOGIN_RATE_PSEUDO_BURST", "5"))
+LOGIN_RATE_PSEUDO_PER_MIN = float(os.getenv("LOGIN_RATE_PSEUDO_PER_MIN", "6"))
+# Par adresse IP : une classe entière peut se connecter derrière la même adresse
+LOGIN_RATE_IP_BURST = int(os.getenv("LOGIN_RATE_IP_BURST", "60"))
+LOGIN_RATE_IP_PER_MIN = float(os.getenv("LOGIN_RATE_IP_PER_MIN", "120"))
+# Vérifications bcrypt de connexion simultanées (le reste du pool reste disponible pour les autres routes)
+LOGIN_MAX_CONCURRENT = int(os.getenv("LOGIN_MAX_CONCURRENT", str(PASSWORD_HASH_WORKERS * 2)))
+# Nombre maximal de clés suivies par type de seau (les plus anciennes sont oubliées)
+LOGIN_RATE_MAX_KEYS = int(os.getenv("LOGIN_RATE_MAX_KEYS", "100000"))
+
+
+class TokenBuckets:
+    """
+    One token bucket per key, in memory and bounded in size (least recently used keys are dropped).
+
+    A dropped key starts again with a full bucket, which only ever makes the limiter more lenient.
+    """
+
+    def __init__(self, capacite: int, par_minute: float, maxsize: int, horloge=time.monotonic):
+        self.capacite = capacite
+        self.debit = par_minute / 60
+        self.maxsize = maxsize
+        self.horloge = horloge
+        self._seaux = OrderedDict()
+        self._lock = threading.Lock()
+
+    def prendre(self, cle) -> float:
+        """Take one token for `cle`. Return 0 when allowed, otherwise the seconds to wait for the next token."""
+        maintenant = self.horloge()
+        with self._lock:
+            jetons, dernier = self._seaux.get(cle, (self.capacite, maintenant))
+            jetons = min(self.capacite, jetons + (maintenant - dernier) * self.debit)
+            if jetons >= 1:
+                self._seaux[cle] = (jetons - 1, maintenant)
+                attente = 0.0
+            else:
+                self._seaux[cle] = (jetons, maintenant)
+                attente = (1 - jetons) / self.debit if self.debit > 0 else math.inf
+            self._seaux.move_to_end(cle)
+            while len(self._seaux) > self.maxsize:
+                self._seaux.popitem(last=False)
+            return attente
+
+    def __len__(self):
+        return len(self._seaux)
+
+
+class LoginAdmission:
+    """
+    Admission control in front of the login password check.
+
+    Requests are rejected with a 429 and a Retry-After header, before any hashing,
+    when the pseudo or the client IP exhausted its bucket or when too many
+    verifications are already running.
+    """
+
+    def __init__(self, par_pseudo: TokenBuckets, par_ip: TokenBuckets, max_concurrent: int):
+        self.par_pseudo = par_pseudo
+        self.par_ip = par_ip
+        self.max_concurrent = max_concurrent
+        self.en_cours = 0
+        self.admises = 0
+        self.refus = {"pseudo": 0, "ip": 0, "concurrence": 0}
+        self._lock = threading.Lock()
+
+    def _refuser(self, motif: str, attente: float):
+        with self._lock:
+            self.refus[motif] += 1
+        raise HTTPException(
+            status_code=429,
+            detail="Trop de tentatives de connexion, veuillez réessayer plus tard.",
+            headers={"Retry-After": str(max(1, math.ceil(min(attente, 86400))))},
+        )
+
+    @contextmanager
+    def admettre(self, pseudo: str, ip: str | None):
+        # Le compteur global d'abord : un refus pour surcharge ne consomme pas les seaux
+        with self._lock:
+            sature = self.en_cours >= self.max_concurrent
+        if sature:
+            self._refuser("concurrence", 1)
+        attente = self.par_ip.prendre(ip)
+        if attente:
+            self._refuser("ip", attente)
+        attente = self.par_pseudo.prendre(pseudo)
+        if attente:
+            self._refuser("pseudo", attente)
+
+        with self._lock:
+            self.en_cours += 1
+            self.admises += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.en_cours -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "en_cours": self.en_cours,
+                "max_simultanees": self.max_concurrent,
+                "admises": self.admises,
+                "refus": dict(self.refus),
+                "pseudos_suivis": len(self.par_pseudo),
+                "ips_suivies": len(self.par_ip),
+            }
+
+
+login_admission = LoginAdmission(
+    par_pseudo=TokenBuckets(LOGIN_RATE_PSEUDO_BURST, LOGIN_RATE_PSEUDO_PER_MIN, LOGIN_RATE_MAX_KEYS),
+    par_ip=TokenBuckets(LOGIN_RATE_IP_BURST, LOGIN_RATE_IP_PER_MIN, LOGIN_RATE_MAX_KEYS),
+    max_concurrent=LOGIN_MAX_CONCURRENT,
+)
@@ -0,0 +1,85 @@
+import hashlib
+import logging
+import re
+import sqlite3
+import time
+from pathlib import Path
+
+from sqlalchemy import text
+
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+SEED_DIR = Path(__file__).parent
+
+# Fichiers de données initiales, dans l'ordre d'application.
+# Ils doivent rester idempotents (INSERT OR REPLACE avec identifiants explicites) :
+# un fichier modifié est rejoué en entier.
+SEED_FILES = ["cours.sql", "exercices.sql", "badges.sql", "defi.sql", "photodeprofil.sql"]
+
+_INSERT_INTO = re.compile(r'INSERT\s+(?:OR\s+\w+\s+)?INTO\s+"?(\w+)"?', re.IGNORECASE)
+
+
+def _instructions(script: str):
+    """Split a SQL script into complete statements."""
+    instruction = ""
+    for ligne in script.splitlines(keepends=True):
+        instruction += ligne
+        if sqlite3.complete_statement(instruction):
+            yield instruction.strip()
+            instruction = ""
+    reste = "\n".join(l for l in instruction.splitlines() if not l.strip().startswith("--")).strip()
+    if reste:
+        yield reste
+
+
+def _tables_cibles(script: str) -> set:
+    """Tables a seed script inserts into."""
+    return {table.upper() for table in _INSERT_INTO.findall(script)}
+
+
+def appliquer_seeds(bind=engine, seed_dir: Path = SEED_DIR, fichiers=SEED_FILES):
+    """
+    Apply the seed files whose content hash is not recorded yet, in a single transaction.
+
+    A file never recorded whose tables already hold rows (database seeded before SEED_VERSIONS,
+    then edited by admins) is only recorded, like the old startup check did; it is replayed once
+    its content changes. Returns the list of applied files (empty when everything is up to date).
+    """
+    contenus = {fichier: (seed_dir / fichier).read_bytes() for fichier in fichiers}
+    hashes = {fichier: hashlib.sha256(contenu).hexdigest() for fichier, contenu in contenus.items()}
+
+    with bind.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE IF NOT EXISTS "SEED_VERSIONS" ('
+            'fichier VARCHAR(128) PRIMARY KEY, '
+            'hash VARCHAR(64) NOT NULL, '
+            'date_application INTEGER NOT NULL)'
+        ))
+        deja_appliques = dict(conn.execute(text('SELECT fichier, hash FROM "SEED_VERSIONS"')).all())
+        en_attente = [fichier for fichier in fichiers if deja_appliques.get(fichier) != hashes[fichier]]
+
+        appliques, adoptes = [], []
+        for fichier in en_attente:
+            script = contenus[fichier].decode("utf-8")
+            if fichier not in deja_appliques and any(
+                conn.execute(text(f'SELECT EXISTS (SELECT 1 FROM "{table}")')).scalar()
+                for table in _tables_cibles(script)
+            ):
+                adoptes.append(fichier)
+            else:
+                for instruction in _instructions(script):
+                    conn.exec_driver_sql(instruction)
+                appliques.append(fichier)
+            conn.execute(
+                text('INSERT OR REPLACE INTO "SEED_VERSIONS" (fichier, hash, date_application) '
+                     'VALUES (:fichier, :hash, :date_application)'),
+                {"fichier": fichier, "hash": hashes[fichier], "date_application": int(time.time())},
+            )
+
+    for fichier in adoptes:
+        logger.info("Données initiales déjà présentes, version enregistrée sans les rejouer : %s", fichier)
+    for fichier in appliques:
+        logger.info("Données initiales appliquées : %s", fichier)
+    return appliques
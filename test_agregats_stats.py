@@ -0,0 +1,65 @@
+import random
+import unittest
+from datetime import datetime, timezone
+
+
+from base_tests import TestBaseSQLite
+import models
+from agregats_stats import debut_periode, maj_agregats_stat, reconstruire_agregats_stats
+from write_queue import WriteQueue
+
+
+def horodatage(*date):
+    return int(datetime(*date, tzinfo=timezone.utc).timestamp())
+
+
+class TestAgregatsStats(TestBaseSQLite):
+    """Test the day / week / month stat rollups."""
+
+    def setUp(self):
+        super().setUp()
+        self.write_queue = WriteQueue(self.SessionTest, max_batch=50, max_delay_ms=5)
+
+    def tearDown(self):
+        self.write_queue.stop()
+
+    def agregats(self):
+        with self.SessionTest() as db:
+            return sorted(
+                (a.type_stat, a.resolution, a.debut, a.nb, a.valeur_min, a.valeur_max, round(a.moyenne, 9), a.dernier)
+                for a in db.query(models.StatAgregat)
+            )
+
+    def test_period_starts(self):
+        mercredi = horodatage(2024, 3, 13, 17, 30)
+        self.assertEqual(debut_periode(mercredi, "jour"), horodatage(2024, 3, 13))
+        self.assertEqual(debut_periode(mercredi, "semaine"), horodatage(2024, 3, 11))
+        self.assertEqual(debut_periode(horodatage(2024, 3, 11), "semaine"), horodatage(2024, 3, 11))
+        self.assertEqual(debut_periode(mercredi, "mois"), horodatage(2024, 3, 1))
+
+    def test_incremental_matches_rebuild(self):
+        """Rollups folded in by the write queue equal the ones rebuilt from STATS, including the last value."""
+        rng = random.Random(4)
+        debut = horodatage(2024, 1, 1)
+        lots = [
+            [models.Stat(pseudo_utilisateur="eleve", type_stat=rng.choice(["wpm", "precision"]),
+                         valeur_stat=rng.randint(10, 100), date_stat=debut + rng.randint(0, 90 * 86400))
+             for _ in range(20)]
+            for _ in range(10)
+        ]
+        # Deux stats à la même seconde : la dernière insérée est la dernière valeur
+        lots.append([models.Stat(pseudo_utilisateur="eleve", type_stat="wpm", valeur_stat=v, date_stat=debut + 200 * 86400)
+                     for v in (50, 40)])
+        for future in [self.write_queue.submit_lot(lot, apres=maj_agregats_stat) for lot in lots]:
+            future.result(timeout=5)
+        incrementaux = self.agregats()
+
+        with self.engine.begin() as conn:
+            reconstruire_agregats_stats(conn)
+        self.assertEqual(self.agregats(), incrementaux)
+        self.assertEqual(sum(a[3] for a in incrementaux if a[1] == "mois"), 202)
+        self.assertIn(("wpm", "jour", debut + 200 * 86400, 2, 40, 50, 45, 40), incrementaux)
+
+
+if __name__ == "__main__":
+    unittest.main()
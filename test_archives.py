@@ -0,0 +1,117 @@
+import gzip
+import json
+import unittest
+from datetime import datetime, timedelta
+
+
+from base_tests import TestBaseSQLite
+import models
+from archives import archiver_classement, archiver_reussites
+from classement import (
+    maj_apres_reussite, recalculer_meilleur_temps, recalculer_resume_defi, reconstruire_meilleurs_temps,
+    reconstruire_resumes_defi,
+)
+
+
+class TestArchives(TestBaseSQLite):
+    """Test the weekly leaderboard snapshots and the archiving of raw attempts."""
+
+    def setUp(self):
+        super().setUp()
+        debut = datetime(2024, 1, 1)
+        with self.SessionTest() as db:
+            for i, (pseudo, id_defi, temps) in enumerate([
+                ("alice", 1, 40.0), ("bob", 1, 30.0), ("alice", 1, 25.0), ("carol", 1, 30.0), ("alice", 2, 50.0),
+            ]):
+                reussite = models.UtilisateurDefi(pseudo_utilisateur=pseudo, id_defi=id_defi, temps_reussite=temps,
+                                                  date_reussite=debut + timedelta(seconds=i))
+                db.add(reussite)
+                db.flush()
+                maj_apres_reussite(db, reussite)
+            db.commit()
+
+    def archive(self, id_defi):
+        with self.SessionTest() as db:
+            lignes = db.query(models.ClassementArchive).filter(models.ClassementArchive.id_defi == id_defi).order_by(
+                models.ClassementArchive.rang
+            ).all()
+            return [(ligne.rang, ligne.pseudo_utilisateur, ligne.temps_reussite) for ligne in lignes]
+
+    def test_snapshot_is_frozen_once(self):
+        """Ties are broken by pseudo, and archiving the same challenge twice changes nothing."""
+        with self.SessionTest() as db:
+            self.assertEqual(archiver_classement(db, 1), 3)
+            db.commit()
+            db.add(models.MeilleurTempsDefi(pseudo_utilisateur="dave", id_defi=1, temps_reussite=1.0,
+                                            date_reussite=datetime(2024, 1, 2)))
+            self.assertEqual(archiver_classement(db, 1), 0)
+            db.commit()
+        self.assertEqual(self.archive(1), [(1, "alice", 25.0), (2, "bob", 30.0), (3, "carol", 30.0)])
+        self.assertEqual(self.archive(2), [])
+
+    def test_raw_attempts_archived_to_file(self):
+        """Only attempts of archived challenges are moved out; the snapshot stays queryable."""
+        with self.SessionTest() as db:
+            archiver_classement(db, 1)
+            archiver_classement(db, 2)
+            db.commit()
+        dossier = self.dossier / "archives"
+        self.assertEqual(archiver_reussites(self.SessionTest, 1, dossier), [1])
+
+        self.assertEqual(sorted(ligne["temps_reussite"] for ligne in self.lignes_archivees(dossier)), [25.0, 30.0, 30.0, 40.0])
+        with self.SessionTest() as db:
+            self.assertEqual([r.id_defi for r in db.query(models.UtilisateurDefi)], [2])
+        self.assertEqual(len(self.archive(1)), 3)
+        self.assertEqual(archiver_reussites(self.SessionTest, 1, dossier), [])
+
+    def lignes_archivees(self, dossier):
+        lignes = []
+        for chemin in sorted(dossier.glob("reussites_defi_1_*.jsonl.gz")):
+            with gzip.open(chemin, "rt", encoding="utf-8") as fichier:
+                lignes += [json.loads(ligne) for ligne in fichier]
+        return lignes
+
+    def test_second_run_keeps_first_archive(self):
+        """Attempts arriving on an archived challenge go to a new file; earlier archives are kept."""
+        with self.SessionTest() as db:
+            archiver_classement(db, 1)
+            db.commit()
+        dossier = self.dossier / "archives"
+        archiver_reussites(self.SessionTest, 1, dossier)
+        with self.SessionTest() as db:
+            reussite = models.UtilisateurDefi(pseudo_utilisateur="dave", id_defi=1, temps_reussite=20.0,
+                                              date_reussite=datetime(2024, 2, 1))
+            db.add(reussite)
+            db.flush()
+            maj_apres_reussite(db, reussite)
+            db.commit()
+        self.assertEqual(archiver_reussites(self.SessionTest, 1, dossier), [1])
+
+        self.assertEqual(len(list(dossier.glob("reussites_defi_1_*.jsonl.gz"))), 2)
+        self.assertEqual(sorted(ligne["pseudo_utilisateur"] for ligne in self.lignes_archivees(dossier)),
+                         ["alice", "alice", "bob", "carol", "dave"])
+        with self.SessionTest() as db:
+            self.assertEqual(db.query(models.ArchiveReussites).count(), 2)
+
+    def test_archived_challenge_not_recomputed(self):
+        """Best times and summaries of an archived challenge survive deletions and rebuilds."""
+        with self.SessionTest() as db:
+            archiver_classement(db, 1)
+            db.commit()
+        archiver_reussites(self.SessionTest, 1, self.dossier / "archives")
+        with self.SessionTest() as db, self.assertLogs("classement", "WARNING"):
+            self.assertEqual(recalculer_meilleur_temps(db, 1, "alice"), 25.0)
+            recalculer_resume_defi(db, 1, "alice")
+            db.commit()
+        with self.engine.begin() as conn:
+            reconstruire_meilleurs_temps(conn)
+            reconstruire_resumes_defi(conn)
+        with self.SessionTest() as db:
+            self.assertEqual(db.query(models.MeilleurTempsDefi).filter_by(id_defi=1).count(), 3)
+            self.assertEqual(db.get(models.ResumeDefiUtilisateur, ("alice", 1)).nb_tentatives, 2)
+            # Défi 2 non archivé : toujours reconstruit à partir des réussites
+            self.assertEqual(db.get(models.MeilleurTempsDefi, (2, "alice")).temps_reussite, 50.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from datetime import datetime
+
+from sqlalchemy import event
+
+from base_tests import TestBaseSQLite
+import models
+from badges_classement import attribuer_badges_defi
+
+
+class TestBadgesClassement(TestBaseSQLite):
+    """Test the set-based weekly leaderboard badge awarding."""
+
+    def setUp(self):
+        super().setUp()
+        with self.SessionTest() as db:
+            db.add_all(
+                models.MeilleurTempsDefi(id_defi=1, pseudo_utilisateur=f"u{i:02}", temps_reussite=float(i),
+                                         date_reussite=datetime(2024, 1, 1))
+                for i in range(1, 13)
+            )
+            # Un utilisateur déjà titulaire du badge du top 10
+            db.add(models.UtilisateurBadge(pseudo_utilisateur="u02", id_badge=1))
+            db.commit()
+
+    def badges(self):
+        with self.SessionTest() as db:
+            return sorted((b.pseudo_utilisateur, b.id_badge) for b in db.query(models.UtilisateurBadge).all())
+
+    def test_badges_by_rank(self):
+        """Badge 3 for the first, 2 for the top 5, 1 for the top 10, existing badges untouched."""
+        with self.SessionTest() as db:
+            attributions = attribuer_badges_defi(db, 1)
+            db.commit()
+        self.assertEqual(len(attributions), 16)
+        self.assertEqual([a["deja_obtenu"] for a in attributions if a["pseudo_utilisateur"] == "u02"], [True, False])
+        attendus = {(f"u{i:02}", 1) for i in range(1, 11)} | {(f"u{i:02}", 2) for i in range(1, 6)} | {("u01", 3)}
+        self.assertEqual(self.badges(), sorted(attendus))
+
+    def test_simulation_and_constant_queries(self):
+        """The dry run writes nothing, and a run issues the same statements whatever the number of attempts."""
+        requetes = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: requetes.append(args[2]))
+        with self.SessionTest() as db:
+            attribuer_badges_defi(db, 1, simulation=True)
+            db.commit()
+            self.assertEqual(len(requetes), 1)
+            self.assertEqual(self.badges(), [("u02", 1)])
+            del requetes[:]
+            attribuer_badges_defi(db, 1)
+            self.assertEqual(len(requetes), 2)
+            db.commit()
+        with self.SessionTest() as db:
+            self.assertTrue(all(a["deja_obtenu"] for a in attribuer_badges_defi(db, 1, simulation=True)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import hashlib
+import tempfile
+import unittest
+from pathlib import Path
+
+from breached_passwords import BreachedPasswordList, compiler
+
+
+class TestBreachedPasswords(unittest.TestCase):
+    """Test the compiled, memory-mapped breached password list."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dossier = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def compiler_liste(self, lignes, sha1=False):
+        source = self.dossier / "source.txt"
+        source.write_text("\n".join(lignes) + "\n", encoding="utf-8")
+        destination = self.dossier / "liste.bin"
+        nb = compiler(source, destination, sha1=sha1)
+        return nb, BreachedPasswordList(destination)
+
+    def test_wordlist_lookup(self):
+        """Every compiled password is found, including its lowercase form; other passwords are not."""
+        mots = [f"motdepasse{i}" for i in range(1000)] + ["Tr0ub4dor&3", "motdepasse1"]
+        nb, liste = self.compiler_liste(mots)
+        self.assertEqual(nb, 1001)
+        for mot in mots:
+            self.assertIn(mot, liste)
+        self.assertIn("MOTDEPASSE42", liste)
+        self.assertNotIn("Zz9!kqpw-inconnu", liste)
+
+    def test_sha1_source(self):
+        """A list of SHA-1 digests with counts (Pwned Passwords format) is accepted."""
+        lignes = [hashlib.sha1(mot.encode()).hexdigest().upper() + ":12" for mot in ("azerty123", "soleil2024")]
+        _, liste = self.compiler_liste(lignes, sha1=True)
+        self.assertIn("azerty123", liste)
+        self.assertNotIn("azerty1234", liste)
+
+    def test_missing_file_accepts_everything(self):
+        """Without a compiled file, no password is reported as breached."""
+        liste = BreachedPasswordList(self.dossier / "absent.bin")
+        self.assertNotIn("123456", liste)
+
+    def test_invalid_file_is_rejected(self):
+        """A file without the expected header fails loudly instead of silently disabling the check."""
+        chemin = self.dossier / "invalide.bin"
+        chemin.write_bytes(b"pas une liste compilee")
+        with self.assertRaises(ValueError):
+            BreachedPasswordList(chemin).charger()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import time
+import unittest
+
+from cache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+    """Test the per-worker TTL + LRU cache."""
+
+    def test_expiry_and_lru(self):
+        cache = TTLCache(ttl=0.05, maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)  # "b" est le moins récemment utilisé
+        self.assertIsNone(cache.get("b"))
+        time.sleep(0.06)
+        self.assertIsNone(cache.get("a"))
+
+    def test_invalidation_by_predicate(self):
+        """Class leaderboards of one group are dropped together, other groups are kept."""
+        cache = TTLCache(ttl=60, maxsize=10)
+        for cle in [(1, 1), (1, 2), (2, 1)]:
+            cache.set(cle, [])
+        cache.invalider_si(lambda cle: cle[0] == 1)
+        self.assertEqual([cle for cle in [(1, 1), (1, 2), (2, 1)] if cache.get(cle) is not None], [(2, 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+
+from base_tests import TestBaseSQLite
+import models
+from classement import (
+    maj_apres_reussite, recalculer_meilleur_temps, recalculer_resume_defi, reconstruire_meilleurs_temps,
+    reconstruire_resumes_defi,
+)
+from write_queue import WriteQueue
+
+
+class TestMeilleurTempsDefi(TestBaseSQLite):
+    """Test the incrementally maintained best-time leaderboard table."""
+
+    def setUp(self):
+        super().setUp()
+        self.write_queue = WriteQueue(self.SessionTest, max_batch=50, max_delay_ms=5)
+        self.debut = datetime(2024, 1, 1)
+
+    def tearDown(self):
+        self.write_queue.stop()
+
+    def ajouter(self, reussites):
+        async def inserer():
+            return await asyncio.gather(*(
+                self.write_queue.ajouter(
+                    models.UtilisateurDefi(pseudo_utilisateur=pseudo, id_defi=1, temps_reussite=temps,
+                                           date_reussite=self.debut + timedelta(seconds=i)),
+                    apres=maj_apres_reussite,
+                )
+                for i, (pseudo, temps) in enumerate(reussites)
+            ))
+        asyncio.run(inserer())
+
+    def classement(self):
+        db = self.SessionTest()
+        lignes = db.query(models.MeilleurTempsDefi).filter(models.MeilleurTempsDefi.id_defi == 1).order_by(
+            models.MeilleurTempsDefi.temps_reussite
+        ).all()
+        db.close()
+        return [(ligne.pseudo_utilisateur, ligne.temps_reussite) for ligne in lignes]
+
+    def test_only_best_time_is_kept(self):
+        """Several attempts in the same batch keep only each user's best time."""
+        self.ajouter([("alice", 40.0), ("bob", 30.0), ("alice", 25.0), ("alice", 35.0)])
+        self.assertEqual(self.classement(), [("alice", 25.0), ("bob", 30.0)])
+
+    def test_deletion_falls_back_to_next_best(self):
+        """Deleting the best attempt promotes the user's next best one, or removes the user."""
+        self.ajouter([("alice", 25.0), ("alice", 35.0), ("bob", 30.0)])
+        db = self.SessionTest()
+        db.query(models.UtilisateurDefi).filter(models.UtilisateurDefi.temps_reussite.in_([25.0, 30.0])).delete()
+        recalculer_meilleur_temps(db, 1, "alice")
+        recalculer_meilleur_temps(db, 1, "bob")
+        db.commit()
+        db.close()
+        self.assertEqual(self.classement(), [("alice", 35.0)])
+
+    def test_rebuild_matches_incremental_table(self):
+        """A full rebuild from UTILISATEUR_DEFI gives the same table as the incremental updates."""
+        self.ajouter([("alice", 40.0), ("bob", 30.0), ("alice", 25.0), ("carol", 50.0)])
+        incremental = self.classement()
+        with self.engine.begin() as conn:
+            reconstruire_meilleurs_temps(conn)
+        self.assertEqual(self.classement(), incremental)
+
+    def resumes(self):
+        db = self.SessionTest()
+        lignes = db.query(models.ResumeDefiUtilisateur).order_by(models.ResumeDefiUtilisateur.pseudo_utilisateur).all()
+        db.close()
+        return [(r.pseudo_utilisateur, r.nb_tentatives, r.meilleur_temps, r.temps_moyen, r.dernier_temps, round(r.centile, 2))
+                for r in lignes]
+
+    def test_summary_is_maintained(self):
+        """Count, best, mean, last attempt and percentile are folded in at each success, and match a rebuild."""
+        self.ajouter([("alice", 40.0), ("bob", 30.0), ("alice", 20.0), ("carol", 50.0), ("alice", 30.0)])
+        incremental = self.resumes()
+        self.assertEqual(incremental, [
+            ("alice", 3, 20.0, 30.0, 30.0, 100.0),
+            ("bob", 1, 30.0, 30.0, 30.0, 100.0),  # 1er sur 2 lors de sa réussite
+            ("carol", 1, 50.0, 50.0, 50.0, 33.33),
+        ])
+        with self.engine.begin() as conn:
+            reconstruire_meilleurs_temps(conn)
+            reconstruire_resumes_defi(conn)
+        # Le centile reconstruit est celui d'aujourd'hui, les autres agrégats sont identiques
+        self.assertEqual([r[:5] for r in self.resumes()], [r[:5] for r in incremental])
+        self.assertEqual(self.resumes()[1][5], 66.67)
+
+    def test_summary_after_deletion(self):
+        """Deleted attempts leave the summary; a user without attempts loses it, and percentiles follow."""
+        self.ajouter([("alice", 25.0), ("alice", 35.0), ("bob", 30.0)])
+        db = self.SessionTest()
+        db.query(models.UtilisateurDefi).filter(models.UtilisateurDefi.temps_reussite == 35.0).delete()
+        recalculer_meilleur_temps(db, 1, "alice")
+        recalculer_resume_defi(db, 1, "alice")
+        db.query(models.UtilisateurDefi).filter(models.UtilisateurDefi.pseudo_utilisateur == "bob").delete()
+        recalculer_meilleur_temps(db, 1, "bob")
+        recalculer_resume_defi(db, 1, "bob")
+        db.commit()
+        db.close()
+        self.assertEqual(self.resumes(), [("alice", 1, 25.0, 25.0, 25.0, 100.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+
+from base_tests import TestBaseApp
+import models
+
+
+class TestClassementGroupe(TestBaseApp):
+    """Test the class-scoped challenge leaderboard and its cache."""
+
+    ID_DEFI = 1
+
+    def setUp(self):
+        self.prof = self.creer_utilisateur()
+        self.id_groupe = self.creer_groupe(self.prof)
+        self.entetes_prof = self.entetes(self.prof)
+        self.url = f"/groupe/{self.id_groupe}/classement/{self.ID_DEFI}"
+
+    def eleve(self, *temps):
+        """Create a student who joins the class, then records the given times."""
+        pseudo = self.creer_utilisateur()
+        entetes = self.entetes(pseudo)
+        self.rejoindre(pseudo, entetes)
+        for t in temps:
+            self.reussir(entetes, t)
+        return pseudo, entetes
+
+    def rejoindre(self, pseudo, entetes):
+        reponse = self.client.post("/membre_classe/", params={
+            "id_groupe": self.id_groupe, "pseudo_utilisateur": pseudo, "est_admin": False
+        }, headers=entetes)
+        self.assertEqual(reponse.status_code, 200, reponse.text)
+
+    def reussir(self, entetes, temps):
+        reponse = self.client.post("/reussites_defi/", params={"id_defi": self.ID_DEFI, "temps_reussite": temps},
+                                   headers=entetes)
+        self.assertEqual(reponse.status_code, 200, reponse.text)
+
+    def classement(self):
+        reponse = self.client.get(self.url, headers=self.entetes_prof)
+        self.assertEqual(reponse.status_code, 200, reponse.text)
+        return [(ligne["rang"], ligne["pseudo_utilisateur"], ligne["temps_reussite"]) for ligne in reponse.json()]
+
+    def test_ordering(self):
+        """Students are ranked by best time then pseudo; class admins and outsiders are left out."""
+        lent, _ = self.eleve(30.0)
+        rapide, _ = self.eleve(25.0, 10.0)
+        ex_aequo = sorted([self.eleve(20.0)[0], self.eleve(20.0)[0]])
+        self.reussir(self.entetes_prof, 1.0)
+        exterieur = self.creer_utilisateur()
+        self.reussir(self.entetes(exterieur), 2.0)
+
+        self.assertEqual(self.classement(), [
+            (1, rapide, 10.0), (2, ex_aequo[0], 20.0), (3, ex_aequo[1], 20.0), (4, lent, 30.0),
+        ])
+
+    def test_non_member_rejected(self):
+        """Only members of the class may read its leaderboard."""
+        _, entetes_eleve = self.eleve(15.0)
+        exterieur = self.creer_utilisateur()
+        self.assertEqual(self.client.get(self.url, headers=self.entetes(exterieur)).status_code, 403)
+        self.assertEqual(self.client.get(self.url, headers=entetes_eleve).status_code, 200)
+
+    def test_cache_invalidated_by_new_reussite(self):
+        """The leaderboard is served from the cache until a member records a new time."""
+        pseudo, entetes = self.eleve(40.0)
+        self.assertEqual(self.classement(), [(1, pseudo, 40.0)])
+        # Modification hors des routes : invisible tant que l'entrée du cache est valide
+        with self.main.SessionLocal() as db:
+            db.get(models.MeilleurTempsDefi, (self.ID_DEFI, pseudo)).temps_reussite = 35.0
+            db.commit()
+        self.assertEqual(self.classement(), [(1, pseudo, 40.0)])
+
+        self.reussir(entetes, 12.0)
+        self.assertEqual(self.classement(), [(1, pseudo, 12.0)])
+
+    def test_cache_invalidated_by_membership_change(self):
+        """Joining, leaving and being promoted class admin all refresh the cached leaderboard."""
+        premier, _ = self.eleve(30.0)
+        self.assertEqual(self.classement(), [(1, premier, 30.0)])
+
+        # Temps déjà enregistré avant d'entrer dans la classe
+        nouveau = self.creer_utilisateur()
+        entetes_nouveau = self.entetes(nouveau)
+        self.reussir(entetes_nouveau, 20.0)
+        self.assertEqual(self.classement(), [(1, premier, 30.0)])
+        self.rejoindre(nouveau, entetes_nouveau)
+        self.assertEqual(self.classement(), [(1, nouveau, 20.0), (2, premier, 30.0)])
+
+        self.client.request("DELETE", "/membres_classe", params={
+            "id_groupe": self.id_groupe, "pseudo_utilisateur": nouveau
+        }, headers=entetes_nouveau)
+        self.assertEqual(self.classement(), [(1, premier, 30.0)])
+
+        self.client.patch("/admin_classe/", params={
+            "id_groupe": self.id_groupe, "pseudo_utilisateur": premier, "est_admin": True
+        }, headers=self.entetes_prof)
+        self.assertEqual(self.classement(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
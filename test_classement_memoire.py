@@ -0,0 +1,66 @@
+import unittest
+
+from classement_memoire import ClassementDefi, ClassementsEnMemoire
+
+
+class TestClassementDefi(unittest.TestCase):
+    """Test the in-memory ranked leaderboard of a challenge."""
+
+    def setUp(self):
+        self.classement = ClassementDefi([(30.0, "alice"), (10.0, "bob"), (20.0, "carol"), (40.0, "dave")])
+
+    def test_rank_and_top(self):
+        """Ranks follow the best times, ties being broken by pseudo."""
+        self.assertEqual(self.classement.rang("carol"), {"rang": 2, "pseudo_utilisateur": "carol", "temps_reussite": 20.0})
+        self.assertEqual([p["pseudo_utilisateur"] for p in self.classement.top(3)], ["bob", "carol", "alice"])
+        self.assertIsNone(self.classement.rang("eve"))
+
+    def test_only_improvements_move_a_user(self):
+        """A slower attempt is ignored, a faster one moves the user up."""
+        self.classement.proposer("dave", 50.0)
+        self.assertEqual(self.classement.rang("dave")["rang"], 4)
+        self.classement.proposer("dave", 5.0)
+        self.assertEqual(self.classement.rang("dave")["rang"], 1)
+        self.assertEqual(len(self.classement), 4)
+
+    def test_moves_are_reported(self):
+        """Updates return the rank move they caused, or None when the ranking is unchanged."""
+        self.assertIsNone(self.classement.proposer("alice", 35.0))
+        self.assertEqual(self.classement.proposer("alice", 15.0),
+                         {"pseudo_utilisateur": "alice", "temps_reussite": 15.0, "rang": 2, "ancien_rang": 3})
+        self.assertEqual(self.classement.proposer("eve", 1.0)["ancien_rang"], None)
+        version = self.classement.version
+        self.assertIsNone(self.classement.remplacer("bob", 10.0))
+        self.assertEqual(self.classement.version, version)
+        self.assertEqual(self.classement.remplacer("bob", None)["rang"], None)
+        self.assertNotEqual(self.classement.version, version)
+
+    def test_neighbours(self):
+        """Neighbours are clipped at both ends of the ranking."""
+        au_dessus, utilisateur, en_dessous = self.classement.voisins("bob", 2)
+        self.assertEqual(au_dessus, [])
+        self.assertEqual(utilisateur["rang"], 1)
+        self.assertEqual([p["pseudo_utilisateur"] for p in en_dessous], ["carol", "alice"])
+        self.classement.remplacer("bob", None)
+        self.assertIsNone(self.classement.voisins("bob", 2))
+
+
+class TestClassementsEnMemoire(unittest.TestCase):
+    """Test the per-worker LRU of challenge leaderboards."""
+
+    def test_pinned_challenges_are_not_evicted(self):
+        """A challenge with live subscribers stays in memory; the least recently used other one goes."""
+        suivis = {1}
+        classements = ClassementsEnMemoire(2, epingle=lambda id_defi: id_defi in suivis)
+        for id_defi in (1, 2, 3):
+            classements.installer(id_defi, [(10.0, "alice")])
+        self.assertEqual(sorted(classements.stats()), [1, 3])
+        self.assertIsNotNone(classements.proposer(1, "bob", 5.0))
+        # Tous épinglés : la limite est dépassée plutôt que de figer un flux
+        suivis.update({3, 4})
+        classements.installer(4, [])
+        self.assertEqual(sorted(classements.stats()), [1, 3, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+
+from base_tests import TestBaseSQLite
+from cluster_jobs import ClusterJobs, Execution, derniere_occurrence
+
+
+class TestClusterJobs(TestBaseSQLite):
+    """Test that scheduled jobs run once per cluster, with takeover, catch-up and history."""
+
+    def setUp(self):
+        super().setUp()
+        self.trigger = CronTrigger(minute=0, timezone=timezone.utc)
+        self.executions = []
+        # Deux workers partageant la même base
+        self.workers = [self.worker(f"worker-{i}") for i in range(2)]
+
+    def worker(self, nom, bail_s=900, fonction=None):
+        jobs = ClusterJobs(self.SessionTest, bail_s=bail_s, rattrapage_max_s=7200, detenteur=nom)
+        jobs.ajouter(BackgroundScheduler(), fonction or (lambda: self.executions.append(nom)), self.trigger, "tache")
+        return jobs
+
+    def test_occurrence_runs_once(self):
+        """Every worker fires, only the first claim runs the job."""
+        date_prevue = datetime(2024, 1, 1, 4, 0, tzinfo=timezone.utc)
+        resultats = [jobs.executer("tache", date_prevue) for jobs in self.workers + self.workers]
+        self.assertEqual(resultats, [True, False, False, False])
+        self.assertEqual(self.executions, ["worker-0"])
+        historique = self.workers[1].historique()
+        self.assertEqual(len(historique), 1)
+        self.assertEqual(historique[0]["statut"], "succes")
+        self.assertIsNotNone(historique[0]["duree_ms"])
+
+    def test_expired_lease_is_taken_over(self):
+        """An occurrence left running by a dead worker is run again once its lease expired."""
+        date_prevue = datetime(2024, 1, 1, 4, 0)
+        mort = self.worker("mort", bail_s=-1)
+        self.assertTrue(mort._reserver("tache", date_prevue))
+        self.assertTrue(self.workers[0].executer("tache", date_prevue.replace(tzinfo=timezone.utc)))
+        self.assertEqual(self.executions, ["worker-0"])
+
+    def test_failure_is_recorded(self):
+        def echouer():
+            raise RuntimeError("panne")
+        with self.assertLogs("cluster_jobs", level="ERROR"):
+            self.assertTrue(self.worker("w", fonction=echouer).executer("tache"))
+        ligne = self.workers[0].historique()[0]
+        self.assertEqual(ligne["statut"], "echec")
+        self.assertIn("panne", ligne["erreur"])
+
+    def test_catch_up(self):
+        """The first catch-up only records a baseline, a later one runs the missed occurrence once."""
+        self.workers[0].rattraper()
+        self.assertEqual(self.executions, [])
+        self.assertEqual(self.workers[0].historique()[0]["statut"], "ignoree")
+
+        # Occurrence précédente exécutée, la dernière a été manquée
+        derniere = derniere_occurrence(self.trigger, datetime.now(timezone.utc), timedelta(hours=2))
+        with self.SessionTest() as session:
+            session.execute(Execution.delete())
+            session.commit()
+        self.workers[0].executer("tache", derniere - timedelta(hours=1))
+        for jobs in self.workers:
+            jobs.rattraper()
+        self.assertEqual(self.executions, ["worker-0", "worker-0"])
+        self.assertEqual([ligne["statut"] for ligne in self.workers[0].historique()], ["succes", "succes"])
+
+
+if __name__ == "__main__":
+    unittest.main()
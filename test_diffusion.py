@@ -0,0 +1,61 @@
+import asyncio
+import unittest
+
+from diffusion import PING, Diffuseur, message_sse
+
+
+class TestDiffuseur(unittest.TestCase):
+    """Test the server-sent events fan-out of the live leaderboard."""
+
+    def test_shared_serialization(self):
+        """All subscribers receive the very same bytes, serialized once."""
+        async def scenario():
+            diffuseur = Diffuseur(ping_s=60)
+            flux = [diffuseur.flux(1, lambda: b"instantane") for _ in range(3)]
+            self.assertEqual([await anext(f) for f in flux], [b"instantane"] * 3)
+            diffuseur.publier(1, "rang", {"rang": 1})
+            diffuseur.publier(2, "rang", {"rang": 1})  # autre défi : aucun abonné
+            messages = [await anext(f) for f in flux]
+            self.assertEqual(messages[0], message_sse("rang", {"rang": 1}))
+            self.assertTrue(all(message is messages[0] for message in messages))
+            self.assertEqual(diffuseur.publies, 1)
+            for f in flux:
+                await f.aclose()
+            self.assertEqual(diffuseur.stats()["abonnes"], {})
+        asyncio.run(scenario())
+
+    def test_snapshot_cached_by_version(self):
+        constructions = []
+
+        def construire():
+            constructions.append(1)
+            return {"top": []}
+        diffuseur = Diffuseur()
+        premier = diffuseur.instantane(1, 7, "classement", construire)
+        self.assertIs(diffuseur.instantane(1, 7, "classement", construire), premier)
+        diffuseur.instantane(1, 8, "classement", construire)
+        self.assertEqual(len(constructions), 2)
+        # Sans abonné, rien n'est construit ni envoyé
+        diffuseur.publier_instantane(1, 9, "classement", construire)
+        self.assertEqual(len(constructions), 2)
+
+    def test_slow_subscriber_disconnected(self):
+        async def scenario():
+            diffuseur = Diffuseur(max_attente=2, ping_s=0.01)
+            lent = diffuseur.flux(1, lambda: b"instantane")
+            await anext(lent)
+            for rang in range(3):
+                diffuseur.publier(1, "rang", {"rang": rang})
+            self.assertEqual(diffuseur.deconnexions, 1)
+            # Le flux se termine : le client se reconnecte et repart d'un instantané
+            self.assertEqual([message async for message in lent], [])
+
+            actif = diffuseur.flux(1, lambda: b"instantane")
+            await anext(actif)
+            self.assertEqual(await anext(actif), PING)
+            await actif.aclose()
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from base_tests import TestBaseSQLite
+from instrumentation import SQL_N_PLUS_ONE_THRESHOLD, instrumenter_engine, lire_stats_routes, mesurer_requetes_sql
+
+
+class TestInstrumentation(TestBaseSQLite):
+    """Test the per-request SQL counters, the Server-Timing header and the N+1 warning."""
+
+    def setUp(self):
+        super().setUp()
+        instrumenter_engine(self.engine)
+        app = FastAPI()
+        app.middleware("http")(mesurer_requetes_sql)
+
+        @app.get("/instrumentation/{nb}")
+        def executer(nb: int):
+            with self.engine.connect() as conn:
+                for i in range(nb):
+                    conn.execute(text("SELECT :i"), {"i": i})
+            return {}
+
+        self.client = TestClient(app)
+
+    def test_counts_and_server_timing(self):
+        """Each statement of the request is counted, reported in Server-Timing and added to the route totals."""
+        route = "GET /instrumentation/{nb}"
+        avant = lire_stats_routes().get(route, {"appels": 0, "requetes_sql": 0})
+        reponse = self.client.get("/instrumentation/3")
+        self.assertEqual(reponse.status_code, 200)
+        self.assertRegex(reponse.headers["Server-Timing"], r'^db;desc="SQL \(3\)";dur=\d+\.\d{2}$')
+
+        self.client.get("/instrumentation/1")
+        stats = lire_stats_routes()[route]
+        self.assertEqual(stats["appels"] - avant["appels"], 2)
+        self.assertEqual(stats["requetes_sql"] - avant["requetes_sql"], 4)
+        self.assertGreaterEqual(stats["max_requetes_sql"], 3)
+
+    def test_repeated_statement_warns(self):
+        """A statement repeated beyond the threshold in one request is logged as a probable N+1."""
+        with self.assertLogs("instrumentation", "WARNING") as logs:
+            self.client.get(f"/instrumentation/{SQL_N_PLUS_ONE_THRESHOLD + 1}")
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("N+1 probable sur GET /instrumentation/{nb}", logs.output[0])
+        self.assertIn(f"{SQL_N_PLUS_ONE_THRESHOLD + 1} fois : SELECT ?", logs.output[0])
+
+        with self.assertNoLogs("instrumentation", "WARNING"):
+            self.client.get(f"/instrumentation/{SQL_N_PLUS_ONE_THRESHOLD}")
+
+
+if __name__ == "__main__":
+    unittest.main()
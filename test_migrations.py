@@ -0,0 +1,39 @@
+import unittest
+
+from sqlalchemy import inspect, text
+
+from base_tests import TestBaseSQLite
+from migrations import MIGRATIONS, appliquer_migrations, versions_appliquees
+
+
+class TestMigrations(TestBaseSQLite):
+    """Test the versioned schema migrations on a temporary SQLite database."""
+
+    def setUp(self):
+        super().setUp()
+
+    def test_migrations_are_applied_once(self):
+        """Pending migrations are applied on the first run and skipped on the next one."""
+        self.assertEqual(appliquer_migrations(self.engine), [version for version, _, _ in MIGRATIONS])
+        self.assertEqual(appliquer_migrations(self.engine), [])
+        self.assertEqual(versions_appliquees(self.engine), {version for version, _, _ in MIGRATIONS})
+
+    def test_indexes_added_to_existing_database(self):
+        """Indexes missing from a database created before they existed are added by the migrations."""
+        with self.engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_stats_utilisateur_type_date"))
+        appliquer_migrations(self.engine)
+        index_stats = {index["name"] for index in inspect(self.engine).get_indexes("STATS")}
+        self.assertIn("ix_stats_utilisateur_type_date", index_stats)
+
+    def test_column_added_to_existing_database(self):
+        """A column missing from an older database is added, an existing one is left untouched."""
+        with self.engine.begin() as conn:
+            conn.execute(text('ALTER TABLE "UTILISATEUR" DROP COLUMN version_permissions'))
+        appliquer_migrations(self.engine)
+        colonnes = {colonne["name"] for colonne in inspect(self.engine).get_columns("UTILISATEUR")}
+        self.assertIn("version_permissions", colonnes)
+
+
+if __name__ == "__main__":
+    unittest.main()
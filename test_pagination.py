@@ -0,0 +1,77 @@
+import unittest
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, Response
+from sqlalchemy import select
+
+from base_tests import TestBaseSQLite
+import models
+from pagination import EN_TETE_CURSEUR, decoder_curseur, encoder_curseur, page, paginer
+
+
+class TestCurseur(unittest.TestCase):
+    """Test the opaque cursor encoding."""
+
+    def test_aller_retour(self):
+        """A cursor decodes back to the key values it was built from."""
+        valeurs = [datetime(2024, 1, 2, 3, 4, 5), 12.5, "pseudo"]
+        self.assertEqual(decoder_curseur(encoder_curseur(valeurs), 3), valeurs)
+
+    def test_curseur_invalide(self):
+        """Malformed cursors, or ones with the wrong number of values, are rejected with a 400."""
+        for curseur in ("xx", encoder_curseur([1]), "!!!"):
+            with self.assertRaises(HTTPException) as ctx:
+                decoder_curseur(curseur, 2)
+            self.assertEqual(ctx.exception.status_code, 400)
+
+
+class TestPaginer(TestBaseSQLite):
+    """Test keyset pagination against a real SQLite database, including ties on the first key column."""
+
+    def setUp(self):
+        super().setUp()
+        debut = datetime(2024, 1, 1)
+        with self.SessionTest() as session:
+            session.add_all(
+                models.MeilleurTempsDefi(id_defi=1, pseudo_utilisateur=f"u{i:02}", temps_reussite=float(i // 3),
+                                         date_reussite=debut + timedelta(seconds=i))
+                for i in range(10)
+            )
+            session.commit()
+
+    def lire_page(self, session, curseur, skip=0, limit=4):
+        cle = [models.MeilleurTempsDefi.temps_reussite, models.MeilleurTempsDefi.pseudo_utilisateur]
+        response = Response()
+        lignes = session.scalars(paginer(select(models.MeilleurTempsDefi), cle, curseur, skip, limit)).all()
+        lignes = page(lignes, cle, limit, response)
+        return [ligne.pseudo_utilisateur for ligne in lignes], response.headers.get(EN_TETE_CURSEUR)
+
+    def test_parcours_complet(self):
+        """Following the cursor header visits every row exactly once, ties included, then stops."""
+        vus, curseur = [], None
+        with self.SessionTest() as session:
+            while True:
+                pseudos, curseur = self.lire_page(session, curseur)
+                vus += pseudos
+                if curseur is None:
+                    break
+        self.assertEqual(vus, [f"u{i:02}" for i in range(10)])
+
+    def test_skip_sans_curseur(self):
+        """Without a cursor, skip still offsets the first page, and the last page returns no cursor."""
+        with self.SessionTest() as session:
+            pseudos, curseur = self.lire_page(session, None, skip=8)
+        self.assertEqual(pseudos, ["u08", "u09"])
+        self.assertIsNone(curseur)
+
+    def test_limite_nulle_ou_negative(self):
+        """limit=0 returns an empty page and a negative limit returns every row, both without a cursor."""
+        with self.SessionTest() as session:
+            self.assertEqual(self.lire_page(session, None, limit=0), ([], None))
+            pseudos, curseur = self.lire_page(session, None, limit=-1)
+        self.assertEqual(pseudos, [f"u{i:02}" for i in range(10)])
+        self.assertIsNone(curseur)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from fastapi import HTTPException
+
+import auth
+from auth import (PASSWORD_HASH_MAX_ROUNDS, PASSWORD_HASH_MIN_ROUNDS, PasswordHashPool, calibrer_cout,
+                  configurer_cout_hachage, cout_calibre_cluster, cout_hachage, pwd_context)
+from base_tests import TestBaseSQLite
+
+
+class TestPasswordHashPool(unittest.TestCase):
+    """Test the bounded bcrypt process pool."""
+
+    def setUp(self):
+        self.cout_initial = cout_hachage()
+        self.pool = PasswordHashPool(workers=1, max_queue=0)
+
+    def tearDown(self):
+        self.pool.arreter()
+        configurer_cout_hachage(self.cout_initial)
+
+    def test_hash_and_verify(self):
+        """A hash computed in the pool verifies the right password only."""
+        async def scenario():
+            mdp_hashe = await self.pool.hasher("Test123!")
+            return await self.pool.verifier("Test123!", mdp_hashe), await self.pool.verifier("Mauvais1!", mdp_hashe)
+
+        self.assertEqual(asyncio.run(scenario()), (True, False))
+        self.assertEqual(self.pool.stats()["operations"], 3)
+
+    def test_full_queue_is_rejected(self):
+        """Once every worker is busy and the queue is full, new operations get a 503 with Retry-After."""
+        async def scenario():
+            return await asyncio.gather(
+                self.pool.hasher("Test123!"), self.pool.hasher("Test123!"), return_exceptions=True
+            )
+
+        premier, second = asyncio.run(scenario())
+        self.assertIsInstance(premier, str)
+        self.assertIsInstance(second, HTTPException)
+        self.assertEqual(second.status_code, 503)
+        self.assertIn("Retry-After", second.headers)
+        self.assertEqual(self.pool.stats()["refus"], 1)
+
+    def test_workers_use_configured_cost(self):
+        """Pool processes hash at the configured cost; hashes at any other cost, lower or higher, need an update."""
+        configurer_cout_hachage(5)
+        mdp_hashe = asyncio.run(self.pool.hasher("Test123!"))
+        self.assertTrue(mdp_hashe.startswith("$2b$05$"))
+        self.assertFalse(pwd_context.needs_update(mdp_hashe))
+        for cout in (4, 6):
+            ancien_hash = pwd_context.handler("bcrypt").using(rounds=cout).hash("Test123!")
+            self.assertTrue(pwd_context.needs_update(ancien_hash))
+            self.assertTrue(pwd_context.verify("Test123!", ancien_hash))
+
+    def test_calibration_stays_within_bounds(self):
+        """Calibration never goes below the minimum cost nor above the maximum one."""
+        self.assertEqual(calibrer_cout(0.001), PASSWORD_HASH_MIN_ROUNDS)
+        self.assertEqual(calibrer_cout(10 ** 9), PASSWORD_HASH_MAX_ROUNDS)
+
+
+class TestCoutCluster(TestBaseSQLite):
+    """Test the bcrypt cost shared by the cluster through PARAMETRE_CLUSTER."""
+
+    def test_calibration_shared_by_cluster(self):
+        """The first calibrated cost is stored and reused by every other worker."""
+        with mock.patch.object(auth, "calibrer_cout", return_value=15):
+            self.assertEqual(cout_calibre_cluster(self.SessionTest), 15)
+        with mock.patch.object(auth, "calibrer_cout", return_value=14) as calibration:
+            self.assertEqual(cout_calibre_cluster(self.SessionTest), 15)
+        calibration.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+
+from base_tests import TestBaseApp
+import models
+from pydantic_models import UtilisateurCourant
+
+
+class TestPermissionsJeton(TestBaseApp):
+    """Test the roles carried by access tokens (adm, cls) and their permission version (pv)."""
+
+    def changer_admin_global(self, pseudo, est_admin):
+        with self.main.SessionLocal() as db:
+            db.get(models.Utilisateur, pseudo).est_admin = est_admin
+            self.main.incrementer_version_permissions(db, pseudo)
+            db.commit()
+
+    def est_admin_de(self, id_groupe, entetes):
+        reponse = self.client.get(f"/membre_est_admin/{id_groupe}", headers=entetes)
+        return reponse.json() if reponse.status_code == 200 else reponse.status_code
+
+    def test_stale_version_rereads_roles(self):
+        """A token older than the user's permission version picks up the roles granted since, from the database."""
+        prof = self.creer_utilisateur()
+        ancien_jeton = self.entetes(prof)
+        id_groupe = self.creer_groupe(prof)
+
+        self.assertEqual(self.est_admin_de(id_groupe, ancien_jeton), True)
+        # Rôles relus une fois, puis servis par le cache
+        self.assertEqual(self.main.principal_cache.get(prof).classes_admin, (id_groupe,))
+
+    def test_class_promotion_and_demotion(self):
+        """A promoted member is class admin at once; a demoted one must log in again, then is a plain member."""
+        prof = self.creer_utilisateur()
+        id_groupe = self.creer_groupe(prof)
+        entetes_prof = self.entetes(prof)
+        eleve = self.creer_utilisateur()
+        self.client.post("/membre_classe/", params={"id_groupe": id_groupe, "pseudo_utilisateur": eleve,
+                                                    "est_admin": False}, headers=entetes_prof)
+        entetes_eleve = self.entetes(eleve)
+        self.assertEqual(self.est_admin_de(id_groupe, entetes_eleve), False)
+
+        self.client.patch("/admin_classe/", params={"id_groupe": id_groupe, "pseudo_utilisateur": eleve,
+                                                   "est_admin": True}, headers=entetes_prof)
+        self.assertEqual(self.est_admin_de(id_groupe, entetes_eleve), True)
+
+        entetes_eleve = self.entetes(eleve)
+        self.client.patch("/admin_classe/", params={"id_groupe": id_groupe, "pseudo_utilisateur": eleve,
+                                                   "est_admin": False}, headers=entetes_prof)
+        self.assertEqual(self.est_admin_de(id_groupe, entetes_eleve), 401)
+        self.assertEqual(self.est_admin_de(id_groupe, self.entetes(eleve)), False)
+
+    def test_global_promotion_and_demotion(self):
+        """Granting the global admin flag applies to existing tokens; revoking it invalidates them."""
+        utilisateur = self.creer_utilisateur()
+        entetes = self.entetes(utilisateur)
+        self.assertEqual(self.client.get("/admin/sqlite", headers=entetes).status_code, 403)
+
+        self.changer_admin_global(utilisateur, True)
+        self.assertEqual(self.client.get("/admin/sqlite", headers=entetes).status_code, 200)
+
+        entetes = self.entetes(utilisateur)
+        self.changer_admin_global(utilisateur, False)
+        self.assertEqual(self.client.get("/admin/sqlite", headers=entetes).status_code, 401)
+        self.assertEqual(self.client.get("/admin/sqlite", headers=self.entetes(utilisateur)).status_code, 403)
+
+    def test_legacy_token_without_claims(self):
+        """A token with only `sub` and `exp` still resolves: global role from the user row, class roles from the database."""
+        admin = self.creer_utilisateur(est_admin=True)
+        id_groupe = self.creer_groupe(admin)
+        eleve = self.creer_utilisateur()
+        ancien = {pseudo: {"Authorization": f"Bearer {self.main.creer_token_acces({'sub': pseudo})}"}
+                  for pseudo in (admin, eleve)}
+
+        self.assertEqual(self.client.get("/admin/sqlite", headers=ancien[admin]).status_code, 200)
+        self.assertEqual(self.client.get("/admin/sqlite", headers=ancien[eleve]).status_code, 403)
+        self.assertEqual(self.est_admin_de(id_groupe, ancien[admin]), True)
+        self.assertEqual(self.est_admin_de(id_groupe, ancien[eleve]), False)
+
+    def test_class_admin_follows_claims(self):
+        """est_admin_classe decides from `cls` alone when the token carries it, without reading the database."""
+        utilisateur = UtilisateurCourant(pseudo="eleve", classes_admin=(3, 7))
+        self.assertTrue(self.main.est_admin_classe(utilisateur, 7, db=None))
+        self.assertFalse(self.main.est_admin_classe(utilisateur, 4, db=None))
+        self.assertFalse(self.main.est_admin_classe(utilisateur.model_copy(update={"classes_admin": ()}), 3, db=None))
+
+
+if __name__ == "__main__":
+    unittest.main()
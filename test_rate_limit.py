@@ -0,0 +1,77 @@
+import unittest
+
+from fastapi import HTTPException
+
+from rate_limit import LoginAdmission, TokenBuckets
+
+
+class HorlogeFactice:
+    def __init__(self):
+        self.maintenant = 0.0
+
+    def __call__(self):
+        return self.maintenant
+
+
+class TestTokenBuckets(unittest.TestCase):
+    """Test the per-key token buckets with a fake clock."""
+
+    def setUp(self):
+        self.horloge = HorlogeFactice()
+        self.seaux = TokenBuckets(capacite=3, par_minute=60, maxsize=2, horloge=self.horloge)
+
+    def test_burst_then_refill(self):
+        """A full bucket allows a burst, then one token per second comes back."""
+        self.assertEqual([self.seaux.prendre("a") for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(self.seaux.prendre("a"), 1.0)
+        self.horloge.maintenant = 1.0
+        self.assertEqual(self.seaux.prendre("a"), 0.0)
+
+    def test_keys_are_independent_and_bounded(self):
+        """Each key has its own bucket and only the most recent keys are kept."""
+        for _ in range(3):
+            self.seaux.prendre("a")
+        self.assertEqual(self.seaux.prendre("b"), 0.0)
+        self.seaux.prendre("c")
+        self.assertEqual(len(self.seaux), 2)
+
+
+class TestLoginAdmission(unittest.TestCase):
+    """Test the login admission layer."""
+
+    def setUp(self):
+        self.horloge = HorlogeFactice()
+        self.admission = LoginAdmission(
+            par_pseudo=TokenBuckets(2, 6, 100, horloge=self.horloge),
+            par_ip=TokenBuckets(10, 60, 100, horloge=self.horloge),
+            max_concurrent=1,
+        )
+
+    def test_pseudo_throttled_with_retry_after(self):
+        """Once a pseudo's bucket is empty, a 429 with Retry-After is raised."""
+        for _ in range(2):
+            with self.admission.admettre("eleve", "10.0.0.1"):
+                pass
+        with self.assertRaises(HTTPException) as ctx:
+            with self.admission.admettre("eleve", "10.0.0.2"):
+                pass
+        self.assertEqual(ctx.exception.status_code, 429)
+        self.assertEqual(ctx.exception.headers["Retry-After"], "10")
+        self.assertEqual(self.admission.stats()["refus"]["pseudo"], 1)
+
+    def test_concurrency_cap(self):
+        """A verification beyond the concurrency cap is refused while the first one runs."""
+        with self.admission.admettre("eleve1", "10.0.0.1"):
+            with self.assertRaises(HTTPException):
+                with self.admission.admettre("eleve2", "10.0.0.1"):
+                    pass
+        with self.admission.admettre("eleve2", "10.0.0.1"):
+            pass
+        stats = self.admission.stats()
+        self.assertEqual(stats["refus"]["concurrence"], 1)
+        self.assertEqual(stats["admises"], 2)
+        self.assertEqual(stats["en_cours"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
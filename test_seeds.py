@@ -0,0 +1,66 @@
+import shutil
+import unittest
+
+from sqlalchemy import text
+
+from base_tests import TestBaseSQLite
+from seeds import SEED_DIR, SEED_FILES, appliquer_seeds
+
+
+class TestSeeds(TestBaseSQLite):
+    """Test the versioned seed loader on a temporary SQLite database."""
+
+    def setUp(self):
+        super().setUp()
+        self.seed_dir = self.dossier
+        for fichier in SEED_FILES:
+            shutil.copy(SEED_DIR / fichier, self.seed_dir / fichier)
+
+    def compter(self, table):
+        with self.engine.connect() as conn:
+            return conn.execute(text(f'SELECT count(*) FROM "{table}"')).scalar()
+
+    def test_seeds_applied_once(self):
+        """Every file is applied on an empty database, then nothing is pending."""
+        self.assertEqual(appliquer_seeds(self.engine, self.seed_dir), SEED_FILES)
+        self.assertEqual(appliquer_seeds(self.engine, self.seed_dir), [])
+        self.assertEqual(self.compter("BADGES"), 16)
+        self.assertEqual(self.compter("COURS"), 4)
+
+    def test_modified_seed_is_replayed_without_duplicates(self):
+        """A modified file is applied again, and only that file."""
+        appliquer_seeds(self.engine, self.seed_dir)
+        with open(self.seed_dir / "defi.sql", "a", encoding="utf-8") as fichier:
+            fichier.write("\n\nINSERT OR REPLACE INTO DEFI (id_defi, titre_defi, description_defi) VALUES\n"
+                          "(3, 'Defi troisieme semaine', 'Texte du défi.');\n")
+
+        self.assertEqual(appliquer_seeds(self.engine, self.seed_dir), ["defi.sql"])
+        self.assertEqual(self.compter("DEFI"), 3)
+        self.assertEqual(self.compter("BADGES"), 16)
+
+    def badge(self, id_badge):
+        with self.engine.connect() as conn:
+            return conn.execute(text('SELECT titre_badge FROM "BADGES" WHERE id_badge = :id'), {"id": id_badge}).scalar()
+
+    def test_existing_data_is_not_replayed(self):
+        """On a database seeded before SEED_VERSIONS, admin edits survive restarts until a file changes."""
+        appliquer_seeds(self.engine, self.seed_dir)
+        with self.engine.begin() as conn:
+            conn.execute(text('DROP TABLE "SEED_VERSIONS"'))
+            conn.execute(text('UPDATE "BADGES" SET titre_badge = \'Renommé\' WHERE id_badge = 1'))
+            conn.execute(text('DELETE FROM "BADGES" WHERE id_badge = 2'))
+
+        with self.assertLogs("seeds", "INFO"):
+            self.assertEqual(appliquer_seeds(self.engine, self.seed_dir), [])
+        self.assertEqual(appliquer_seeds(self.engine, self.seed_dir), [])
+        self.assertEqual((self.badge(1), self.badge(2), self.compter("BADGES")), ("Renommé", None, 15))
+
+        # Contenu modifié : le fichier est rejoué, et lui seul
+        with open(self.seed_dir / "badges.sql", "a", encoding="utf-8") as fichier:
+            fichier.write("\n-- Badge 1 renommé dans les sources\n")
+        self.assertEqual(appliquer_seeds(self.engine, self.seed_dir), ["badges.sql"])
+        self.assertEqual((self.badge(1), self.compter("BADGES")), ("Top 10", 16))
+
+
+if __name__ == "__main__":
+    unittest.main()
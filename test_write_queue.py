@@ -0,0 +1,115 @@
+import asyncio
+import unittest
+
+from fastapi import HTTPException
+
+from base_tests import TestBaseSQLite
+import models
+from write_queue import WriteQueue
+
+
+class TestWriteQueue(TestBaseSQLite):
+    """Test the group-commit write queue against a temporary SQLite database."""
+
+    def setUp(self):
+        super().setUp()
+        self.write_queue = WriteQueue(self.SessionTest, max_batch=50, max_delay_ms=5)
+
+    def tearDown(self):
+        self.write_queue.stop()
+
+    def test_concurrent_inserts_get_their_ids(self):
+        """Every caller gets its own committed row back with a generated id."""
+        async def inserer():
+            stats = [
+                models.Stat(pseudo_utilisateur="eleve", type_stat="wpm", valeur_stat=i, date_stat=0)
+                for i in range(120)
+            ]
+            return await asyncio.gather(*(self.write_queue.ajouter(stat) for stat in stats))
+
+        resultats = asyncio.run(inserer())
+        ids = [stat.id_stat for stat in resultats]
+        self.assertEqual(len(set(ids)), 120)
+        self.assertEqual([stat.valeur_stat for stat in resultats], list(range(120)))
+
+        db = self.SessionTest()
+        self.assertEqual(db.query(models.Stat).count(), 120)
+        db.close()
+
+    def test_failing_row_does_not_reject_its_batch(self):
+        """A row violating a constraint fails alone, the rest of its batch is committed."""
+        async def inserer():
+            stats = [
+                models.Stat(pseudo_utilisateur="eleve", type_stat="wpm", valeur_stat=1, date_stat=0),
+                models.Stat(pseudo_utilisateur="eleve", type_stat=None, valeur_stat=2, date_stat=0),
+                models.Stat(pseudo_utilisateur="eleve", type_stat="wpm", valeur_stat=3, date_stat=0),
+            ]
+            return await asyncio.gather(
+                *(self.write_queue.ajouter(stat) for stat in stats), return_exceptions=True
+            )
+
+        resultats = asyncio.run(inserer())
+        self.assertIsInstance(resultats[1], Exception)
+        self.assertEqual(resultats[0].valeur_stat, 1)
+        self.assertEqual(resultats[2].valeur_stat, 3)
+
+        db = self.SessionTest()
+        self.assertEqual(db.query(models.Stat).count(), 2)
+        db.close()
+
+    def test_lots_share_a_transaction(self):
+        """Submitted lots are committed together with single rows, and fail as a whole."""
+        def lot(valeurs, type_stat="wpm"):
+            return [models.Stat(pseudo_utilisateur="eleve", type_stat=type_stat, valeur_stat=v, date_stat=0) for v in valeurs]
+        with self.assertLogs("write_queue", "ERROR") as journal:
+            futures = [
+                self.write_queue.submit_lot(lot(range(3))),
+                self.write_queue.submit_lot(lot([9, 8], type_stat=None), description="stats de eleve"),
+                self.write_queue.submit(lot([4])[0]),
+            ]
+            self.assertEqual(len(futures[0].result(timeout=5)), 3)
+            self.assertIsInstance(futures[1].exception(timeout=5), Exception)
+            self.assertEqual(futures[2].result(timeout=5).valeur_stat, 4)
+        # Écriture différée : le lot perdu est journalisé avec sa taille et son propriétaire
+        self.assertIn("Lot perdu (2 lignes, stats de eleve)", "\n".join(journal.output))
+
+        db = self.SessionTest()
+        self.assertEqual(sorted(v for (v,) in db.query(models.Stat.valeur_stat)), [0, 1, 2, 4])
+        db.close()
+
+    def test_unexpected_error_keeps_writer_alive(self):
+        """A failing session fails its batch with the error, later rows are still written."""
+        pannes = [RuntimeError("base indisponible")]
+
+        def session_factory(**kwargs):
+            if pannes:
+                raise pannes.pop()
+            return self.SessionTest(**kwargs)
+
+        write_queue = WriteQueue(session_factory, max_batch=50, max_delay_ms=5)
+        try:
+            stat = models.Stat(pseudo_utilisateur="eleve", type_stat="wpm", valeur_stat=1, date_stat=0)
+            with self.assertLogs("write_queue", "ERROR"):
+                self.assertIsInstance(write_queue.submit(stat).exception(timeout=5), RuntimeError)
+            stat = models.Stat(pseudo_utilisateur="eleve", type_stat="wpm", valeur_stat=2, date_stat=0)
+            self.assertEqual(write_queue.submit(stat).result(timeout=5).valeur_stat, 2)
+        finally:
+            write_queue.stop()
+
+    def test_full_queue_is_rejected(self):
+        """Beyond `max_attente` pending rows, submissions get a 503 instead of growing the queue."""
+        write_queue = WriteQueue(self.SessionTest, max_batch=50, max_delay_ms=5, max_attente=3)
+        try:
+            lot = [models.Stat(pseudo_utilisateur="eleve", type_stat="wpm", valeur_stat=v, date_stat=0) for v in range(4)]
+            with self.assertRaises(HTTPException) as erreur:
+                write_queue.submit_lot(lot)
+            self.assertEqual(erreur.exception.status_code, 503)
+            self.assertEqual(write_queue.refus, 1)
+            write_queue.submit_lot(lot[:3]).result(timeout=5)
+            self.assertEqual(write_queue.en_attente, 0)
+        finally:
+            write_queue.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from fastapi import HTTPException
+
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+WRITE_QUEUE_MAX_BATCH = int(os.getenv("WRITE_QUEUE_MAX_BATCH", "200"))
+WRITE_QUEUE_MAX_DELAY_MS = int(os.getenv("WRITE_QUEUE_MAX_DELAY_MS", "5"))
+# Lignes en attente d'écriture au-delà desquelles les nouvelles sont refusées (503)
+WRITE_QUEUE_MAX_ATTENTE = int(os.getenv("WRITE_QUEUE_MAX_ATTENTE", "20000"))
+
+_STOP = object()
+
+
+def _objets(obj) -> list:
+    return obj if isinstance(obj, list) else [obj]
+
+
+class WriteQueue:
+    """
+    Single writer thread that groups pending inserts into one transaction.
+
+    Rows are committed every `max_delay_ms` milliseconds or every `max_batch` rows,
+    whichever comes first. Each caller gets its own row back (with generated ids)
+    or the exception raised while inserting it. An optional `apres(session, obj)`
+    hook runs in the same transaction, for tables derived from the inserted row.
+    A list submitted with `submit_lot` is one item: its rows succeed or fail together.
+    Any error while committing a batch fails the futures of that batch only; the
+    writer thread keeps running. When more than `max_attente` rows are waiting
+    (overload, slow disk), new submissions are rejected with a 503.
+    """
+
+    def __init__(self, session_factory, max_batch: int = 200, max_delay_ms: int = 5, max_attente: int = 20000):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.max_attente = max_attente
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._lock_attente = threading.Lock()
+        self.en_attente = 0
+        self.refus = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread:
+                if self._thread.is_alive():
+                    return
+                # Thread mort sans stop() : refuser plutôt que laisser les appelants attendre
+                raise RuntimeError("La file d'écriture est arrêtée")
+            self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Flush everything still pending, then stop the writer thread."""
+        with self._lock:
+            if not self._thread:
+                return
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, obj, apres=None) -> Future:
+        self.start()
+        nb_lignes = len(_objets(obj))
+        with self._lock_attente:
+            if self.en_attente + nb_lignes > self.max_attente:
+                self.refus += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Serveur surchargé, veuillez réessayer dans quelques instants.",
+                    headers={"Retry-After": "1"},
+                )
+            self.en_attente += nb_lignes
+        future = Future()
+        self._queue.put((obj, apres, future))
+        return future
+
+    def submit_lot(self, objs: list, apres=None, description: str = "lot") -> Future:
+        """
+        Queue several rows at once. Write-behind callers may ignore the returned future:
+        a rejected lot is logged as an error with its size and `description`.
+        """
+        objs = list(objs)
+        future = self.submit(objs, apres)
+
+        def signaler_perte(future):
+            if future.exception() is not None:
+                logger.error("Lot perdu (%s lignes, %s) : %s", len(objs), description, future.exception())
+        future.add_done_callback(signaler_perte)
+        return future
+
+    async def ajouter(self, obj, apres=None):
+        """Queue `obj` for insertion and wait until its batch is committed."""
+        return await asyncio.wrap_future(self.submit(obj, apres))
+
+    def _run(self):
+        running = True
+        while running:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            nb_lignes = len(_objets(item[0]))
+            deadline = time.monotonic() + self.max_delay
+            while nb_lignes < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    running = False
+                    break
+                batch.append(item)
+                nb_lignes += len(_objets(item[0]))
+            self._commit_protege(batch)
+        # Vider ce qui reste après la demande d'arrêt
+        remaining = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                remaining.append(item)
+        if remaining:
+            self._commit_protege(remaining)
+
+    def _commit_protege(self, batch):
+        # Lignes sorties de la file : elles ne comptent plus dans la limite d'attente
+        with self._lock_attente:
+            self.en_attente -= sum(len(_objets(obj)) for obj, _, _ in batch)
+        try:
+            self._commit(batch)
+        except Exception as e:
+            # Erreur hors des cas prévus (session, rollback...) : le lot échoue, le thread continue
+            logger.exception("Lot de la file d'écriture en échec")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def _commit(self, batch):
+        db = self.session_factory(expire_on_commit=False)
+        try:
+            db.add_all([ligne for obj, _, _ in batch for ligne in _objets(obj)])
+            for obj, apres, _ in batch:
+                if apres:
+                    for ligne in _objets(obj):
+                        apres(db, ligne)
+            db.commit()
+        except Exception:
+            db.rollback()
+            db.close()
+            # Un lot en échec : rejouer chaque ligne seule pour isoler l'erreur
+            for obj, apres, future in batch:
+                self._commit_one(obj, apres, future)
+            return
+        db.close()
+        for obj, _, future in batch:
+            future.set_result(obj)
+
+    def _commit_one(self, obj, apres, future):
+        try:
+            db = self.session_factory(expire_on_commit=False)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        try:
+            db.add_all(_objets(obj))
+            if apres:
+                for ligne in _objets(obj):
+                    apres(db, ligne)
+            db.commit()
+            future.set_result(obj)
+        except Exception as e:
+            try:
+                db.rollback()
+            except Exception:
+                logger.exception("Rollback impossible dans la file d'écriture")
+            logger.warning("Insertion rejetée par la file d'écriture : %s", e)
+            future.set_exception(e)
+        finally:
+            db.close()
+
+
+write_queue = WriteQueue(SessionLocal, WRITE_QUEUE_MAX_BATCH, WRITE_QUEUE_MAX_DELAY_MS, WRITE_QUEUE_MAX_ATTENTE)